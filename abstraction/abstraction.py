@@ -21,6 +21,13 @@
 from abc import ABC, abstractmethod
 from netmiko import ConnectHandler
 from datetime import datetime
+import time  # For measuring wall time per device
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "oop_backup_config"))
+from phase_timing import PhaseHistograms, PhaseTimer, open_netmiko  # Time spent in connect / auth / prompt / command / write
+
+metrics = PhaseHistograms()  # Phase timings of every device in this run
 
 # Step 2: Define an Abstract Base Class
 class NetworkDevice(ABC):
@@ -35,6 +42,24 @@ class NetworkDevice(ABC):
     def run_show_command(self):
         pass
 
+    # Shared by all child classes: log in once and run a list of commands in the same session
+    # Returns a dictionary {command: output}
+    def run_commands(self, commands):
+        start_time = time.time()
+        connection = ConnectHandler(
+            device_type=self.device_type,
+            host=self.hostname,
+            username=self.username,
+            password=self.password
+        )
+        results = {}
+        for command in commands:
+            results[command] = connection.send_command(command)
+        connection.disconnect()
+
+        print(f"{self.hostname}: {len(commands)} commands in one session took {time.time() - start_time:.2f} seconds")
+        return results
+
 # Step 3: Implement Cisco Device Class
 class CiscoDevice(NetworkDevice):
     def __init__(self, hostname, username="rviews", password=""):
@@ -43,21 +68,25 @@ class CiscoDevice(NetworkDevice):
 
     # Implementation of the abstract method
     def run_show_command(self):
-        connection = ConnectHandler(
+        timer = PhaseTimer()
+        connection = open_netmiko(
+            timer,
             device_type=self.device_type,
             host=self.hostname,
             username=self.username,
             password=self.password
         )
-        output = connection.send_command("show ip bgp summary")
+        with timer.phase("command"):
+            output = connection.send_command("show ip bgp summary")
         connection.disconnect()
 
         # Save output with timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         filename = f"{self.hostname}_cisco_bgp_summary_{timestamp}.txt"
 
-        with open(filename, "w") as file:
+        with timer.phase("write"), open(filename, "w") as file:
             file.write(output)
+        metrics.observe("run_show_command", self.device_type, timer.phases)
         print(f"Cisco: 'show ip bgp summary' saved in {filename}")
 
 # Step 4: Implement Juniper Device Class
@@ -68,21 +97,25 @@ class JuniperDevice(NetworkDevice):
 
     # Implementation of the abstract method
     def run_show_command(self):
-        connection = ConnectHandler(
+        timer = PhaseTimer()
+        connection = open_netmiko(
+            timer,
             device_type=self.device_type,
             host=self.hostname,
             username=self.username,
             password=self.password
         )
-        output = connection.send_command("show bgp summary")
+        with timer.phase("command"):
+            output = connection.send_command("show bgp summary")
         connection.disconnect()
 
         # Save output with timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         filename = f"{self.hostname}_juniper_bgp_summary_{timestamp}.txt"
 
-        with open(filename, "w") as file:
+        with timer.phase("write"), open(filename, "w") as file:
             file.write(output)
+        metrics.observe("run_show_command", self.device_type, timer.phases)
         print(f"Juniper: 'show bgp summary' saved in {filename}")
 
 # Step 5: Instantiate Device Objects
@@ -96,6 +129,17 @@ devices = [cisco, juniper]
 for device in devices:
     device.run_show_command()
 
+# Step 7: Run Several Commands in One Session
+# One login per device instead of one login per command.
+results = cisco.run_commands(["show version", "show ip bgp summary"])
+for command, output in results.items():
+    print(f"--- {command} ---")
+    print(output)
+
+# Step 8: Print Where the Time Went and Save the Phase Timings
+print(metrics.summary())
+metrics.export("phase_timings")  # phase_timings.json and phase_timings.prom
+
 # Note:
 # If you try to instantiate NetworkDevice directly:
 # base = NetworkDevice("1.1.1.1", "cisco_ios", "user", "pass")
@@ -0,0 +1,105 @@
+"""
+Benchmark: start-up and import time of network_cli.py
+
+Runs every case several times in a fresh Python process with -X importtime and prints:
+- wall time of the whole process (median)
+- total time spent importing modules, and the heaviest top-level imports
+
+Cases:
+    eager imports        → what every old script pays before doing anything: import pandas + netmiko
+    --help               → network_cli.py --help
+    argument error       → network_cli.py run-command with a missing required argument
+    backup (real run)    → network_cli.py backup against fake Telnet devices (asyncio, no netmiko)
+    run-command (real)   → network_cli.py run-command against a fake Telnet device (needs netmiko)
+
+The fake devices come from oop_backup_config/fake_telnet_server.py and run in this process.
+
+📌 Example:
+    python benchmark_cli_import_time.py --repeat 5
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.join(HERE, "network_cli.py")
+sys.path.insert(0, os.path.join(HERE, "oop_backup_config"))
+
+
+# ------------------------------------------------------
+# 1. Run one case and parse the -X importtime report
+# ------------------------------------------------------
+def parse_importtime(stderr):
+    # Lines look like: "import time:       441 |     358656 | pandas" (self µs | cumulative µs | name)
+    total, top_level = 0, {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total += int(self_us)
+        if not name.startswith("  "):  # Not indented → imported directly by the script
+            top_level[name.strip()] = int(cumulative_us)
+    heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:3]
+    return total / 1e6, heaviest
+
+
+def run_case(name, command, expected, repeat, workdir):
+    # 'command' gets the repeat number, so runs that keep state (the backup journal) never collide
+    walls, imports = [], []
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", *command(i)], capture_output=True, text=True, cwd=workdir)
+        walls.append(time.perf_counter() - start)
+        if result.returncode != expected:
+            # A run that stopped early would only measure how fast it failed
+            errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+            sys.exit(f"❌ {name}: exit code {result.returncode}, expected {expected}\n" + "\n".join(errors[-10:]))
+        import_seconds, heaviest = parse_importtime(result.stderr)
+        imports.append(import_seconds)
+    return statistics.median(walls), statistics.median(imports), heaviest
+
+
+# ------------------------------------------------------
+# 2. Start fake devices and run every case
+# ------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure start-up time of network_cli.py with -X importtime")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case, the median is shown (default: 5)", metavar="")
+    parser.add_argument("--devices", type=int, default=10, help="Fake devices for the backup case (default: 10)", metavar="")
+    args = parser.parse_args()
+
+    from fake_telnet_server import FakeDeviceFarm
+
+    farm = FakeDeviceFarm(args.devices, juniper_every=0).start()
+    rows = list(farm.inventory())
+
+    with tempfile.TemporaryDirectory() as workdir:
+        inventory = os.path.join(workdir, "devices.csv")
+        with open(inventory, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+        # (name, command for repeat i, expected exit code: argparse exits with 2 on a usage error)
+        cases = [
+            ("eager imports", lambda i: ["-c", "import argparse, pandas, netmiko"], 0),
+            ("--help", lambda i: [CLI, "--help"], 0),
+            ("argument error", lambda i: [CLI, "run-command", "--ip", "127.0.0.1"], 2),
+            ("backup (real run)", lambda i: [CLI, "backup", "--inventory", inventory, "--run-id", f"benchmark-{i}"], 0),
+            ("run-command (real)", lambda i: [CLI, "run-command", "--ip", rows[0]["host"], "--port", str(rows[0]["port"]),
+                                              "--username", "rviews", "--password", "rviews", "--command", "show version"], 0),
+        ]
+
+        print(f"{'Case':<20} {'Wall time':>10} {'Imports':>9}   Heaviest top-level imports")
+        for name, command, expected in cases:
+            wall, import_seconds, heaviest = run_case(name, command, expected, args.repeat, workdir)
+            top = ", ".join(f"{module} {cumulative / 1e3:.0f} ms" for module, cumulative in heaviest)
+            print(f"{name:<20} {wall:>9.3f}s {import_seconds:>8.3f}s   {top}")
+
+    farm.stop()
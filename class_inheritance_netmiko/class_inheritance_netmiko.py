@@ -8,8 +8,16 @@
 # In this example, we will create a parent class for network devices and a child class for Cisco devices.
 #
 # Step 1: Import Required Modules
-from netmiko import ConnectHandler
-from datetime import datetime
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "oop_backup_config"))
+from backup_layout import BackupLayout  # Output files sharded by host and date, with a latest-output index
+from phase_timing import PhaseHistograms, PhaseTimer, open_netmiko  # Time spent in connect / auth / prompt / command / write
+from version_parser import DEFAULT_INVENTORY, parse_file, write_inventory  # 'show version' text → vendor, version, image, uptime, serial, memory
+
+metrics = PhaseHistograms()  # Phase timings of every device in this run
+layout = BackupLayout()  # Outputs go to backups/<xx>/<hostname>/<YYYY>/<MM>/<DD>/, indexed in backups/index.db
+inventory = []  # One parsed row per device
 
 # Step 2: Define the Parent Class
 class NetworkDevice:
@@ -19,19 +27,21 @@ class NetworkDevice:
         self.username = username
 
     def collect_version_info(self):
-        connection = ConnectHandler(
+        timer = PhaseTimer()
+        connection = open_netmiko(
+            timer,
             device_type=self.device_type,
             host=self.hostname,
             username=self.username
         )
-        output = connection.send_command("show version")
+        with timer.phase("command"):
+            output = connection.send_command("show version")
         connection.disconnect()
 
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"{self.hostname}_show_version_{timestamp}.txt"
-
-        with open(filename, "w") as file:
-            file.write(output)
+        with timer.phase("write"):
+            filename = layout.save_output(self.hostname, "show version", output)
+        metrics.observe("collect_version_info", self.device_type, timer.phases)
+        inventory.append(parse_file(filename))  # Host and collection time come from the file name
         print(f"'show version' info saved for {self.hostname} in {filename}")
 
 # Step 3: Create Child Class for Cisco Devices
@@ -46,3 +56,11 @@ device2 = CiscoTelnetDevice(hostname="route-views2.routeviews.org")
 # Step 5: Run the Method to Collect Info
 device1.collect_version_info()
 device2.collect_version_info()
+
+# Step 6: Print Where the Time Went and Save the Phase Timings
+print(metrics.summary())
+metrics.export("phase_timings")  # phase_timings.json and phase_timings.prom
+
+# Step 7: Write the Parsed Versions as a Fleet Inventory (Parquet with pyarrow installed, CSV otherwise)
+write_inventory(inventory, DEFAULT_INVENTORY)
+print(f"📋 Fleet inventory of {len(inventory)} devices written to {DEFAULT_INVENTORY}")
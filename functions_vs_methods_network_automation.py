@@ -10,6 +10,12 @@
 # - Functions are useful for reusable tasks.
 
 from netmiko import ConnectHandler
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "oop_backup_config"))
+from phase_timing import PhaseHistograms, PhaseTimer, open_netmiko  # Time spent in connect / auth / prompt / command
+
+metrics = PhaseHistograms()  # Phase timings of every connect_and_run() call
 
 # # This is a USER-DEFINED FUNCTION
 # def connect_and_run_function(hostname, username, password, command, device_type="cisco_ios_telnet"):
@@ -53,8 +59,11 @@ class NetworkDevice:
             "username": self.username,
             "password": self.password,
         }
-        with ConnectHandler(**device) as conn:
-            output = conn.send_command(command)
+        timer = PhaseTimer()
+        with open_netmiko(timer, **device) as conn:
+            with timer.phase("command"):
+                output = conn.send_command(command)
+        metrics.observe("connect_and_run", self.device_type, timer.phases)
         return output
 
 
@@ -78,6 +87,8 @@ class NetworkDevice:
 # Creating an object and calling a user-defined method
 device1 = NetworkDevice("route-views.routeviews.org", "rviews", "rviews")
 print(device1.connect_and_run("show version"))
+print(metrics.summary())  # Where the time went: connect, auth, prompt or command
+metrics.export("phase_timings")  # phase_timings.json and phase_timings.prom
 
 # ---------------------------------------------------------------
 # Summary:          
@@ -17,7 +17,6 @@ Why Advanced Logging?
 
 import logging
 from logging.handlers import RotatingFileHandler
-from netmiko import ConnectHandler
 import argparse
 
 # ------------------------------------------------------
@@ -69,6 +68,9 @@ device = {
     "password": "rviews",
 }
 
+# Import Netmiko only now, so --help and argument errors don't wait for it
+from netmiko import ConnectHandler
+
 # ------------------------------------------------------
 # 4. Use try/except for connection and command execution
 # ------------------------------------------------------
@@ -9,7 +9,6 @@ argparse is a Python module for parsing command-line arguments with built-in val
 """
 
 import argparse 
-from netmiko import ConnectHandler
 
 # Create an ArgumentParser object to handle command-line input
 parser = argparse.ArgumentParser(description="Connect to a device and run a command")
@@ -33,6 +32,9 @@ device = {
     "password": args.password,
 }
 
+# Import Netmiko only now, so --help and argument errors don't wait for it (network_cli.py does the same)
+from netmiko import ConnectHandler
+
 # Connect to device and run the given command
 with ConnectHandler(**device) as net_connect:
     output = net_connect.send_command(args.command)
@@ -0,0 +1,220 @@
+"""
+One fast-starting command-line tool for the everyday network automation jobs.
+
+Subcommands:
+    run-command → connect to one device and run one command (like netmiko_with_argparse.py)
+    backup      → back up every device in a CSV inventory with asyncio (oop_backup_config/backup_asyncio.py)
+    ping        → ping every IP in devices.xlsx (or a .csv) and save a report (like ping_excel_report.py)
+    traceroute  → traceroute every IP and save a report (like traceroute_excel_report.py)
+
+Why one tool?
+-------------
+- pandas and netmiko take well over a second to import, even when the script only prints --help.
+- Here only argparse is imported at start-up. Each subcommand imports what it needs when it runs:
+  netmiko only for run-command, pandas only to read or write .xlsx files (.csv uses the csv module).
+- benchmark_cli_import_time.py measures the start-up time with python -X importtime.
+
+📌 Examples:
+    python network_cli.py run-command --ip 192.168.1.1 --username admin --password cisco123 --command "show version"
+    python network_cli.py backup --inventory oop_backup_config/devices.csv --concurrency 100
+    python network_cli.py backup --inventory oop_backup_config/devices.csv --resume
+    python network_cli.py backup --inventory oop_backup_config/devices.csv --layout /srv/backups
+    python network_cli.py ping --inventory devices.xlsx
+    python network_cli.py traceroute --inventory devices.csv --output traceroute_results.csv
+"""
+
+import argparse
+import sys
+
+
+# ------------------------------------------------------
+# 1. Shared helpers (read IP lists, save reports)
+# ------------------------------------------------------
+def read_ips(path):
+    if path.endswith((".xlsx", ".xls")):
+        import pandas as pd  # Only Excel files need pandas
+
+        return pd.read_excel(path)["IP"].tolist()
+    import csv
+
+    with open(path, newline="") as file:
+        return [row["IP"] for row in csv.DictReader(file)]
+
+
+def save_report(results, path):
+    if path.endswith(".xlsx"):
+        import pandas as pd
+
+        pd.DataFrame(results).to_excel(path, index=False)
+        return
+    import csv
+
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=["IP", "Status", "Output"])
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def rate_rule(text):
+    # Same rules as rate_limits.parse_rule, checked here so a typo fails before any connection starts
+    scope, _, numbers = text.partition(":")
+    values = numbers.split(":")
+    column, _, value = scope.partition("=")
+    try:
+        if not numbers or len(values) > 2 or (scope != "global" and (not column or not value)):
+            raise ValueError
+        rate, burst = float(values[0]), float(values[1]) if len(values) == 2 else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected global:RATE[:BURST] or COLUMN=VALUE:RATE[:BURST], got {text!r}")
+    return (None, None, rate, burst) if scope == "global" else (column, value, rate, burst)
+
+
+def report_path(args, name):
+    if args.output:
+        return args.output
+    from datetime import datetime
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return f"{name}_results_{timestamp}.{args.format}"
+
+
+# ------------------------------------------------------
+# 2. Subcommands (heavy imports happen inside these functions)
+# ------------------------------------------------------
+def run_command(args):
+    from netmiko import ConnectHandler
+
+    device = {
+        "device_type": args.device_type,
+        "host": args.ip,
+        "port": args.port,
+        "username": args.username,
+        "password": args.password,
+    }
+    with ConnectHandler(**device) as net_connect:
+        print(net_connect.send_command(args.command))
+    return 0
+
+
+def backup(args):
+    import asyncio
+    import os
+    import time
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "oop_backup_config"))
+    from backup_asyncio import run_backups
+    from checkpoint_journal import RunJournal
+    from inventory_loader import iter_devices
+    from rate_limits import RateLimiter
+
+    if args.store:
+        from backup_store import BackupStore
+
+        store = BackupStore(args.store)
+    else:
+        from backup_layout import BackupLayout
+
+        store = BackupLayout(args.layout)
+
+    limiter = RateLimiter(args.rate_limit) if args.rate_limit else None
+    devices = iter_devices(args.inventory, tag_columns=limiter.columns if limiter else ())
+    journal = RunJournal(args.journal_dir, run_id=args.run_id, resume=args.resume)
+    print(f"📓 Run id: {journal.run_id} (continue it with --resume --run-id {journal.run_id})")
+    start_time = time.time()
+    try:
+        results = asyncio.run(run_backups(journal.pending(devices), concurrency=args.concurrency,
+                                          timeout=args.timeout, store=store, stream=args.stream, deadline=args.deadline,
+                                          journal=journal, limiter=limiter))
+    finally:
+        journal.close()
+        store.close()
+    success_count = sum(result.ok for result in results)
+    print(f"\n✅ Successful backups: {success_count}")
+    print(f"❌ Failed backups: {len(results) - success_count}")
+    print(f"⏱️ Total execution time: {time.time() - start_time:.2f} seconds")
+    print(journal.summary())
+    if limiter:
+        print(limiter.summary())
+    return 0 if success_count == len(results) else 1
+
+
+def probe_all(args, name, command, timeout):
+    import platform
+    import subprocess
+
+    windows = platform.system().lower() == "windows"
+    results = []
+    for ip in read_ips(args.inventory):
+        try:
+            result = subprocess.run(command(windows, ip), capture_output=True, text=True, timeout=timeout)
+            output = result.stdout.strip() or result.stderr.strip()
+            status = "Success" if result.returncode == 0 else "Failed"
+        except subprocess.TimeoutExpired as e:
+            status, output = "Timed out", (e.stdout or b"").decode(errors="replace").strip()
+        except Exception as e:
+            status, output = f"Error: {e}", ""
+        print(f"{ip}: {status}")
+        results.append({"IP": ip, "Status": status, "Output": output})
+
+    output_file = report_path(args, name)
+    save_report(results, output_file)
+    print(f"\n✅ Results saved to {output_file}")
+    return 0
+
+
+def ping(args):
+    return probe_all(args, "ping", lambda windows, ip: ["ping", "-n" if windows else "-c", str(args.count), ip], args.timeout)
+
+
+def traceroute(args):
+    return probe_all(args, "traceroute", lambda windows, ip: ["tracert" if windows else "traceroute", ip], args.timeout)
+
+
+# ------------------------------------------------------
+# 3. Argument parser (argparse only, nothing heavy)
+# ------------------------------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Network automation jobs: run a command, back up, ping, traceroute")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    # Required options get a metavar: an empty one breaks argparse usage wrapping on Python 3.11
+    command_parser = subparsers.add_parser("run-command", help="Connect to a device and run a command")
+    command_parser.add_argument("--ip", required=True, help="IP address of the device", metavar="IP")
+    command_parser.add_argument("--username", required=True, help="Login username", metavar="USER")
+    command_parser.add_argument("--password", required=True, help="Login password", metavar="PASSWORD")
+    command_parser.add_argument("--device_type", "--device-type", dest="device_type", default="cisco_ios_telnet",
+                                help="Netmiko device type (default: cisco_ios_telnet)", metavar="TYPE")
+    command_parser.add_argument("--port", type=int, help="TCP port (default: the device type's port)", metavar="PORT")
+    command_parser.add_argument("--command", required=True, help="Command to send to the device", metavar="COMMAND")
+    command_parser.set_defaults(func=run_command)
+
+    backup_parser = subparsers.add_parser("backup", help="Back up every device in a CSV inventory (asyncio)")
+    backup_parser.add_argument("--inventory", default="devices.csv", help="Inventory CSV file (default: devices.csv)", metavar="")
+    backup_parser.add_argument("--concurrency", type=int, default=100, help="Max sessions in flight (default: 100)", metavar="")
+    backup_parser.add_argument("--timeout", type=float, default=30, help="Per-read timeout in seconds (default: 30)", metavar="")
+    backup_parser.add_argument("--layout", default="backups", help="Backup directory, sharded by host and date, with an index (default: backups)", metavar="")
+    backup_parser.add_argument("--store", help="Save into a deduplicated backup store directory instead of the layout", metavar="")
+    backup_parser.add_argument("--stream", action="store_true", help="Write output to disk in chunks as it arrives")
+    backup_parser.add_argument("--deadline", type=float, help="Time budget for the whole run in seconds", metavar="")
+    backup_parser.add_argument("--journal-dir", default="journals", help="Checkpoint journals directory (default: journals)", metavar="")
+    backup_parser.add_argument("--run-id", help="Run id of the journal (default: start time, or the latest with --resume)", metavar="")
+    backup_parser.add_argument("--resume", action="store_true", help="Continue a run: skip devices its journal lists as backed up")
+    backup_parser.add_argument("--rate-limit", action="append", default=[], type=rate_rule,
+                               help="Login rate: global:RATE, COLUMN=VALUE:RATE or COLUMN=*:RATE, optional :BURST (repeatable)", metavar="")
+    backup_parser.set_defaults(func=backup)
+
+    for name, func, timeout in (("ping", ping, 5), ("traceroute", traceroute, 60)):
+        probe_parser = subparsers.add_parser(name, help=f"{name.capitalize()} every IP in an inventory and save a report")
+        probe_parser.add_argument("--inventory", default="devices.xlsx", help="Excel or CSV file with an IP column (default: devices.xlsx)", metavar="")
+        probe_parser.add_argument("--timeout", type=float, default=timeout, help=f"Seconds per IP (default: {timeout})", metavar="")
+        probe_parser.add_argument("--output", help="Report file, .xlsx or .csv (default: timestamped name)", metavar="")
+        probe_parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx", help="Format of the default report name (default: xlsx)", metavar="")
+        if name == "ping":
+            probe_parser.add_argument("--count", type=int, default=4, help="Echo requests per IP (default: 4)", metavar="")
+        probe_parser.set_defaults(func=func)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    sys.exit(args.func(args))
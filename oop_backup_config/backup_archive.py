@@ -0,0 +1,183 @@
+# Compressed Per-Run Backup Archive with a Random-Access Index
+
+# Introduction
+# - Instead of one plain .txt file per device, a whole run is written into ONE archive file.
+# - Every device output is compressed on its own (gzip, lzma, or zstd if 'zstandard' is installed),
+#   so a single device can be extracted without decompressing the rest of the run.
+# - The end of the file holds an index: host, command, offset and length of every output.
+#   Extracting maps the file into memory (mmap) and decompresses only that one slice.
+#
+# File layout:
+#   b"BKAR1\n" | member 1 | member 2 | ... | index (JSON) | index offset (8 bytes) | b"BKIDX"
+#
+# Usage:
+#   python backup_archive.py list backup_run_2025-06-27_01-53-00.bkar
+#   python backup_archive.py extract backup_run_2025-06-27_01-53-00.bkar route-views.routeviews.org
+
+# Step 1: Import Required Modules
+import argparse
+import gzip
+import json
+import lzma
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+
+try:
+    import zstandard  # Optional: pip install zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"BKAR1\n"
+FOOTER_MAGIC = b"BKIDX"
+FOOTER = struct.Struct("<Q")
+
+
+# Step 2: Codecs (one-shot and streaming compression for each format)
+def compressor(codec):
+    if codec == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 → gzip container
+    if codec == "lzma":
+        return lzma.LZMACompressor()
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("codec 'zstd' needs the zstandard package: pip install zstandard")
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def decompress(codec, data):
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "lzma":
+        return lzma.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("codec 'zstd' needs the zstandard package: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+# Step 3: Write an Archive (thread-safe, outputs are appended as backups finish)
+class ArchiveWriter:
+    def __init__(self, path, codec="gzip"):
+        compressor(codec)  # Fail early if the codec is not available
+        self.path = path
+        self.codec = codec
+        self.index = []
+        self.lock = threading.Lock()
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+
+    def _append(self, host, command, data, size):
+        # 'data' is already compressed: bytes, or a file to copy in; only the append is done under the lock
+        with self.lock:
+            offset = self.file.tell()
+            if isinstance(data, bytes):
+                self.file.write(data)
+            else:
+                shutil.copyfileobj(data, self.file, 1024 * 1024)
+            self.index.append({
+                "host": host, "command": command, "codec": self.codec,
+                "offset": offset, "length": self.file.tell() - offset, "size": size,
+            })
+        return f"{os.path.basename(self.path)}#{host}"
+
+    def save_output(self, host, command, output):
+        data = output.encode("utf-8")
+        packer = compressor(self.codec)
+        return self._append(host, command, packer.compress(data) + packer.flush(), len(data))
+
+    def save_output_file(self, host, command, path):
+        # For streamed backups: compress the file in 1 MB chunks into a temporary file next to the
+        # archive (other threads keep appending meanwhile), copy that in, then delete both
+        packer = compressor(self.codec)
+        with open(path, "rb") as file, tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(self.path))) as packed:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                packed.write(packer.compress(chunk))
+            packed.write(packer.flush())
+            packed.seek(0)
+            size = os.path.getsize(path)
+            name = self._append(host, command, packed, size)
+        os.remove(path)
+        return name
+
+    def close(self):
+        with self.lock:
+            index_offset = self.file.tell()
+            self.file.write(json.dumps(self.index).encode())
+            self.file.write(FOOTER.pack(index_offset) + FOOTER_MAGIC)
+            self.file.close()
+
+
+# Step 4: Read an Archive Through mmap
+class ArchiveReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC or self.map[-len(FOOTER_MAGIC):] != FOOTER_MAGIC:
+            raise ValueError(f"{path} is not a backup archive (or was not closed properly)")
+        footer_start = len(self.map) - len(FOOTER_MAGIC) - FOOTER.size
+        (index_offset,) = FOOTER.unpack(self.map[footer_start:footer_start + FOOTER.size])
+        self.index = json.loads(self.map[index_offset:footer_start])
+
+    def find(self, host, command=None):
+        for entry in self.index:
+            if entry["host"] == host and (command is None or entry["command"] == command):
+                return entry
+        return None
+
+    def extract(self, host, command=None):
+        entry = self.find(host, command)
+        if entry is None:
+            raise KeyError(f"No output for {host} in this archive")
+        # Only this slice of the file is paged in and decompressed
+        data = self.map[entry["offset"]:entry["offset"] + entry["length"]]
+        return decompress(entry["codec"], data).decode("utf-8")
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# Step 5: Command-Line Interface
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List or extract device outputs from a backup archive")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    list_parser = subparsers.add_parser("list", help="List the outputs in an archive")
+    list_parser.add_argument("archive")
+    extract_parser = subparsers.add_parser("extract", help="Print (or save) one device's output")
+    extract_parser.add_argument("archive")
+    extract_parser.add_argument("host")
+    extract_parser.add_argument("--command", help="Only this command", metavar="")
+    extract_parser.add_argument("--output", help="Write to this file instead of the screen", metavar="")
+    args = parser.parse_args()
+
+    reader = ArchiveReader(args.archive)
+
+    if args.action == "list":
+        total_size = sum(entry["size"] for entry in reader.index)
+        total_length = sum(entry["length"] for entry in reader.index)
+        for entry in reader.index:
+            print(f"{entry['host']:<40} {entry['command']:<20} {entry['size']:>10} → {entry['length']:>9} bytes ({entry['codec']})")
+        print(f"\n{len(reader.index)} outputs, {total_size} bytes compressed to {total_length} bytes")
+
+    elif args.action == "extract":
+        try:
+            output = reader.extract(args.host, args.command)
+        except KeyError as e:
+            print(e.args[0])
+            sys.exit(1)
+        if args.output:
+            with open(args.output, "w") as file:
+                file.write(output)
+            print(f"Saved {args.host} output to {args.output}")
+        else:
+            print(output)
+
+    reader.close()
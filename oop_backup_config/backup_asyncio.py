@@ -0,0 +1,208 @@
+# Back Up Network Devices with asyncio (Hundreds to Thousands of Sessions at Once)
+
+# Introduction
+# - The backup_multithreaded*.py scripts run at most 5 Netmiko sessions at a time.
+# - Here every device is an asyncio task with its own Telnet session, so one thread can keep
+#   hundreds or thousands of sessions in flight while they wait on the network.
+# - --concurrency limits how many sessions are open at the same time.
+# - Same CiscoDevice / JuniperDevice classes and the same output files as the threaded scripts.
+#
+# Note: every open session is a socket, raise 'ulimit -n' for very high --concurrency values.
+#
+# Usage:
+#   python backup_asyncio.py --concurrency 500
+#   python backup_asyncio.py --inventory devices_100k.csv --concurrency 2000
+#   python backup_asyncio.py --concurrency 500 --layout /srv/backups          # Default: ./backups
+#   python backup_asyncio.py --retention 48h,30d,12m       # Keep all 48 h, daily 30 days, monthly 12 months
+#   python backup_asyncio.py --concurrency 500 --store backup_store
+#   python backup_asyncio.py --concurrency 500 --archive --codec lzma
+#   python backup_asyncio.py --concurrency 500 --breaker breaker_state.json --retries 3
+#   python backup_asyncio.py --deadline 3600 --connect-timeout 5 --auth-timeout 15 --command-timeout 60
+#   python backup_asyncio.py --metrics /var/lib/node_exporter/textfile/network_backup
+#   python backup_asyncio.py --resume                      # Continue the last run after a crash
+#   python backup_asyncio.py --resume --run-id 2025-06-27_01-53-00
+#   python backup_asyncio.py --rate-limit global:20 --rate-limit device_type=cisco_xr:2 --rate-limit site=*:5
+#   python backup_asyncio.py --probe probe_state.json      # Full backup only of devices that changed
+
+# Step 1: Import Required Modules
+import argparse
+import asyncio
+import time  # For measuring execution time
+from datetime import datetime
+from backup_archive import ArchiveWriter
+from backup_layout import BackupLayout
+from backup_store import BackupStore
+from checkpoint_journal import RunJournal
+from change_probe import ChangeProbe
+from circuit_breaker import CircuitBreaker
+from inventory_loader import iter_devices
+from network_devices import PhaseTimeouts
+from phase_timing import PhaseHistograms
+from rate_limits import RateLimiter, parse_rule
+from result_records import ResultSummary, ResultWriter
+from retention import RetentionWorker, parse_policy
+
+
+# Step 2: Back Up All Devices with a Fixed Number of asyncio Workers
+# 'deadline' is the time budget of the whole run in seconds: when it expires, in-flight sessions are
+# cancelled and every device that was not finished is reported as "Not reached" (not as a failure).
+async def run_backups(devices, concurrency=100, timeout=30, on_result=print, store=None, stream=False,
+                      breaker=None, timeouts=None, deadline=None, metrics=None, journal=None, limiter=None,
+                      probe=None, writer=None):
+    # 'devices' can be a list or a lazy iterator (inventory_loader.iter_devices): each device object
+    # is only created when a worker is ready for it. With 'limiter' (rate_limits.py) a worker gets the
+    # next device whose login rate buckets have a token, so one slow bucket never idles the workers.
+    # 'devices' can also be a stream with next_async() (shard_queue.ShardStream) that fetches the next
+    # devices without blocking the event loop.
+    remaining = limiter.schedule(devices) if limiter else devices if hasattr(devices, "next_async") else iter(devices)
+    pulls_async = hasattr(remaining, "next_async")
+    results = []
+    current = {}  # Worker task → the device it is backing up right now
+    stopped = asyncio.Event()  # Set at the run deadline, so no worker starts another device
+
+    def report(result):
+        results.append(result)
+        if writer:
+            writer.write(result)
+        if on_result:
+            on_result(result)
+
+    async def worker():
+        # Each worker pulls the next device as soon as its previous session is finished
+        task = asyncio.current_task()
+        while not stopped.is_set():
+            device = await remaining.next_async() if pulls_async else next(remaining, None)
+            if device is None:
+                return
+
+            def backup(device=device):
+                return device.backup_config_async(timeout=timeout, store=store, stream=stream, timeouts=timeouts,
+                                                  probe=probe)
+
+            current[task] = device
+            result = await (breaker.call_async(device, backup, limiter) if breaker else backup())
+            del current[task]
+            if metrics:
+                metrics.observe("backup_config", device.vendor, device.timings)
+            if journal:
+                journal.record(device.hostname, result)
+            report(result)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    _, pending = await asyncio.wait(workers, timeout=deadline)
+
+    if pending:
+        # Run deadline reached: cancel the sessions still in flight, then list what was never started.
+        # A cancel can be lost when a read finishes at the same moment (asyncio.wait_for in Python < 3.12),
+        # so the workers also check 'stopped' before taking the next device.
+        stopped.set()
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in pending:
+            if task in current:
+                report(current[task]._not_reached("cancelled at run deadline"))
+        for device in remaining:
+            report(device._not_reached("run deadline reached before start"))
+    return results
+
+
+# Step 3: Run the Backups and Print a Summary
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Back up devices from devices.csv using asyncio")
+    parser.add_argument("--inventory", default="devices.csv", help="Inventory CSV file (default: devices.csv)", metavar="")
+    parser.add_argument("--concurrency", type=int, default=100, help="Max sessions in flight (default: 100)", metavar="")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-read timeout in seconds (default: 30)", metavar="")
+    parser.add_argument("--layout", default="backups", help="Backup directory, sharded by host and date, with an index (default: backups)", metavar="")
+    parser.add_argument("--retention", type=parse_policy, help="Prune and compress old backups of the layout in the background, e.g. 48h,30d,12m", metavar="")
+    parser.add_argument("--store", help="Save into a deduplicated backup store directory instead of the layout", metavar="")
+    parser.add_argument("--stream", action="store_true", help="Write output to disk in chunks as it arrives")
+    parser.add_argument("--archive", action="store_true", help="Write one compressed archive for the whole run")
+    parser.add_argument("--codec", default="gzip", choices=["gzip", "lzma", "zstd"], help="Archive compression (default: gzip)", metavar="")
+    parser.add_argument("--breaker", help="Circuit breaker state file, enables retries and skipping dead hosts", metavar="")
+    parser.add_argument("--breaker-threshold", type=int, default=3, help="Failed runs before a host is skipped (default: 3)", metavar="")
+    parser.add_argument("--breaker-cooldown", type=float, default=3600, help="Seconds to skip an open host (default: 3600)", metavar="")
+    parser.add_argument("--retries", type=int, default=3, help="Attempts per device with --breaker (default: 3)", metavar="")
+    parser.add_argument("--deadline", type=float, help="Time budget for the whole run in seconds", metavar="")
+    parser.add_argument("--connect-timeout", type=float, default=10, help="TCP connect timeout (default: 10)", metavar="")
+    parser.add_argument("--auth-timeout", type=float, default=20, help="Login timeout (default: 20)", metavar="")
+    parser.add_argument("--command-timeout", type=float, help="Command output timeout (default: --timeout)", metavar="")
+    parser.add_argument("--rate-limit", type=parse_rule, action="append", default=[],
+                        help="Login rate: global:RATE, COLUMN=VALUE:RATE or COLUMN=*:RATE, optional :BURST (repeatable)", metavar="")
+    parser.add_argument("--probe", help="Change probe state file: skip the full configuration backup of devices that did not change (\"_config\" device types)", metavar="")
+    parser.add_argument("--journal-dir", default="journals", help="Checkpoint journals directory (default: journals)", metavar="")
+    parser.add_argument("--run-id", help="Run id of the journal (default: start time, or the latest with --resume)", metavar="")
+    parser.add_argument("--resume", action="store_true", help="Continue a run: skip devices its journal lists as backed up")
+    parser.add_argument("--results", default="results.jsonl", help="JSONL file, one record per device appended as it finishes (default: results.jsonl)", metavar="")
+    parser.add_argument("--metrics", default="phase_timings", help="Phase timing files <name>.json and <name>.prom (default: phase_timings)", metavar="")
+    args = parser.parse_args()
+    timeouts = PhaseTimeouts(args.connect_timeout, args.auth_timeout, args.command_timeout or args.timeout)
+    breaker = None
+    if args.breaker:
+        breaker = CircuitBreaker(args.breaker, failure_threshold=args.breaker_threshold,
+                                 cooldown=args.breaker_cooldown, attempts=args.retries)
+    if args.archive:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        store = ArchiveWriter(f"backup_run_{timestamp}.bkar", codec=args.codec)
+    else:
+        store = BackupStore(args.store) if args.store else BackupLayout(args.layout)
+    retention = None
+    if args.retention and isinstance(store, BackupLayout):
+        # Low-priority thread next to the backups; it only touches outputs older than the keep-all tier
+        retention = RetentionWorker(store.root, args.retention).start()
+
+    journal = RunJournal(args.journal_dir, run_id=args.run_id, resume=args.resume)
+    print(f"📓 Run id: {journal.run_id} (continue it with --resume --run-id {journal.run_id})")
+    writer = ResultWriter(args.results, run_id=journal.run_id)
+    limiter = RateLimiter(args.rate_limit) if args.rate_limit else None
+    # Device objects are created as the workers need them
+    devices = journal.pending(iter_devices(args.inventory, tag_columns=limiter.columns if limiter else ()))
+    metrics = PhaseHistograms()
+    probe = ChangeProbe(args.probe) if args.probe else None
+
+    start_time = time.time()  # Start timer
+    try:
+        results = asyncio.run(run_backups(devices, concurrency=args.concurrency, timeout=args.timeout, store=store, stream=args.stream,
+                                          breaker=breaker, timeouts=timeouts, deadline=args.deadline, metrics=metrics,
+                                          journal=journal, limiter=limiter, probe=probe, writer=writer))
+    finally:
+        journal.close()  # Writes what is still queued, also on Ctrl+C
+        writer.close()
+        if probe:
+            probe.save()
+        if retention:
+            retention.stop()  # Whatever is left is done by the next run
+        store.close()  # An archive gets its index footer, so the outputs saved so far stay readable
+        if breaker:
+            breaker.save()  # Keep what this run learned about failing hosts, also on Ctrl+C
+    end_time = time.time()  # End timer
+
+    summary = ResultSummary()
+    for result in results:
+        summary.add(result)
+    success_count = summary.statuses["ok"] + summary.statuses["unchanged"]
+    not_reached_count = summary.statuses["not_reached"]
+    failure_count = summary.statuses["failed"]
+
+    if args.archive:
+        print(f"\n📦 Archive written to {store.path}")
+
+    # Print summary
+    print(f"\n✅ Successful backups: {success_count}")
+    print(f"❌ Failed backups: {failure_count}")
+    if args.deadline:
+        print(f"⏳ Not reached before the {args.deadline:g}s deadline: {not_reached_count}")
+    print(f"⏱️ Total execution time: {end_time - start_time:.2f} seconds")
+    print(summary.summary())
+    print(f"📝 Results saved to {writer.path}")
+    print(journal.summary())
+    if retention:
+        print(retention.summary())
+    if probe:
+        print(probe.summary())
+    if limiter:
+        print(limiter.summary())
+    print(metrics.summary())
+    print(f"📝 Phase timings saved to {', '.join(metrics.export(args.metrics))}")
+    if breaker:
+        print(breaker.summary())
@@ -3,7 +3,9 @@
 # Step 1: Import Required Modules
 import csv
 from netmiko import ConnectHandler
-from datetime import datetime
+from backup_layout import BackupLayout  # Output files sharded by host and date, with a latest-output index
+
+layout = BackupLayout()  # Outputs go to backups/<xx>/<hostname>/<YYYY>/<MM>/<DD>/, indexed in backups/index.db
 
 # Step 2: Define the Base Class
 class NetworkDevice:
@@ -33,11 +35,7 @@ class CiscoDevice(NetworkDevice):
             output = connection.send_command("show version")
             connection.disconnect()
 
-            timestamp = datetime.now().strftime("%Y%m%d-%H%M")
-            filename = f"{self.hostname}_cisco_config_{timestamp}.txt"
-
-            with open(filename, "w") as file:
-                file.write(output)
+            filename = layout.save_output(self.hostname, "show version", output)
 
             print(f"✅ Cisco: {self.hostname} backup saved to {filename}")
         except Exception as e:
@@ -60,11 +58,7 @@ class JuniperDevice(NetworkDevice):
             output = connection.send_command("show bgp summary")
             connection.disconnect()
 
-            timestamp = datetime.now().strftime("%Y%m%d-%H%M")
-            filename = f"{self.hostname}_juniper_config_{timestamp}.txt"
-
-            with open(filename, "w") as file:
-                file.write(output)
+            filename = layout.save_output(self.hostname, "show bgp summary", output)
 
             print(f"✅ Juniper: {self.hostname} backup saved to {filename}")
         except Exception as e:
@@ -0,0 +1,226 @@
+# Backup Directory Layout Sharded by Host and Date, with a Latest-Backup Index
+
+# Introduction
+# - The scripts used to write every {hostname}_..._{timestamp}.txt file into the current directory.
+#   After months of hourly runs that directory holds hundreds of thousands of files, and ls, glob
+#   and "find the newest file for host X" get slow.
+# - Here every output goes into a small directory of its own host and day:
+#       backups/3f/route-views.routeviews.org/2025/06/27/route-views.routeviews.org_show_version_2025-06-27_01-53-00-123456.txt
+#   The first level (two hex characters of the hostname's hash) spreads the hosts over 256 directories.
+# - An SQLite index next to the files (backups/index.db) has two tables:
+#       latest  → one row per (host, command): the path of the newest output
+#       history → one row per output ever written
+#   "Latest backup of host X" is a primary-key lookup in 'latest', which only grows with the number
+#   of hosts and commands, never with the number of backups. No directory listing is needed.
+# - save_output / save_output_file are the same methods as BackupStore and ArchiveWriter, so
+#   the device classes write through the layout with backup_config(store=layout).
+# - Files are written to a temporary name first and renamed, so a crash never leaves half a backup.
+#   The name has microseconds and an existing file is never replaced: two outputs of the same host and
+#   command can never overwrite each other, a clash raises an error instead.
+#
+# Usage:
+#   python backup_layout.py latest route-views.routeviews.org
+#   python backup_layout.py history route-views.routeviews.org --command "show version"
+#   python backup_layout.py import *_config_*.txt *_show_version_*.txt     # Move old flat files in
+#   python backup_layout.py stats
+
+# Step 1: Import Required Modules
+import argparse
+import glob
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from backup_store import TIMESTAMP_FORMAT, normalize_timestamp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS latest (
+    host TEXT NOT NULL, command TEXT NOT NULL, timestamp TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL,
+    PRIMARY KEY (host, command)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history (
+    host TEXT NOT NULL, command TEXT NOT NULL, timestamp TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL,
+    PRIMARY KEY (host, command, timestamp)
+) WITHOUT ROWID;
+"""
+
+# The old config backups are named after the vendor, not the command (used by the import commands)
+LEGACY_COMMANDS = {"cisco config": "show version", "juniper config": "show bgp summary", "show version": "show version"}
+
+
+def command_slug(command):
+    # "show ip int brief" → "show_ip_int_brief", "show system commit | match x" → "show_system_commit_match_x"
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", command).strip("_") or "output"
+
+
+def parse_filename(path, commands=None):
+    # e.g. route-views.routeviews.org_cisco_config_2025-06-27_01-53.txt → (host, "cisco config", timestamp);
+    # 'commands' maps a filename part (e.g. "cisco config") to the command it holds, if known
+    name = os.path.basename(path)[:-len(".txt")]
+    host, _, rest = name.partition("_")
+    parts = rest.split("_")
+    # The timestamp is everything from the first part that starts with a digit
+    split_at = next((i for i, part in enumerate(parts) if part[:1].isdigit()), len(parts))
+    command = " ".join(parts[:split_at])
+    return host, (commands or {}).get(command, command), normalize_timestamp("_".join(parts[split_at:]))
+
+
+# Step 2: Define the BackupLayout Class
+class BackupLayout:
+    keeps_files = True  # Outputs are plain files (the change probe checks that the last one still exists)
+
+    def __init__(self, root="backups"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+        # One connection shared by all worker threads, protected by a lock; other processes
+        # (backup_sharded.py workers) open their own and wait for SQLite's write lock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(root, "index.db"), timeout=60, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def path_for(self, host, command, timestamp):
+        # backups/<2 hex of the host hash>/<host>/<YYYY>/<MM>/<DD>/<host>_<command>_<timestamp>.txt
+        fanout = hashlib.blake2b(host.encode(), digest_size=1).hexdigest()
+        year, month, day = timestamp[:10].split("-")
+        return os.path.join(self.root, fanout, host, year, month, day, f"{host}_{command_slug(command)}_{timestamp}.txt")
+
+    def save(self, host, command, output, timestamp=None):
+        timestamp = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+        path = self.path_for(host, command, timestamp)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first, so a crash never leaves half a backup behind
+        temp_path = self.temp_path(path)
+        with open(temp_path, "w") as file:
+            file.write(output)
+        size = os.path.getsize(temp_path)
+        self.place(temp_path, path)
+        self.add(host, command, path, timestamp, size)
+        return path
+
+    def save_file(self, host, command, source, timestamp=None):
+        # Same as save(), for an output already written to 'source' (e.g. a streamed backup): it is moved
+        timestamp = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+        path = self.path_for(host, command, timestamp)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(source)
+        temp_path = self.temp_path(path)
+        shutil.move(source, temp_path)
+        self.place(temp_path, path)
+        self.add(host, command, path, timestamp, size)
+        return path
+
+    @staticmethod
+    def temp_path(path):
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    @staticmethod
+    def place(temp_path, path):
+        # Like os.replace, but a file that already has this name raises FileExistsError instead of being overwritten
+        try:
+            os.link(temp_path, path)
+        finally:
+            os.remove(temp_path)
+
+    def add(self, host, command, path, timestamp, size):
+        # Index a file that is already in place; 'latest' only moves forward in time.
+        # A second output with the same host, command and timestamp raises sqlite3.IntegrityError.
+        with self.lock:
+            self.db.execute("INSERT INTO history (host, command, timestamp, path, size) VALUES (?, ?, ?, ?, ?)",
+                            (host, command, timestamp, path, size))
+            self.db.execute("INSERT INTO latest (host, command, timestamp, path, size) VALUES (?, ?, ?, ?, ?) "
+                            "ON CONFLICT (host, command) DO UPDATE SET timestamp = excluded.timestamp, "
+                            "path = excluded.path, size = excluded.size WHERE excluded.timestamp >= latest.timestamp",
+                            (host, command, timestamp, path, size))
+            self.db.commit()
+
+    # save_output / save_output_file are what the device classes call (same as BackupStore)
+    def save_output(self, host, command, output):
+        return self.save(host, command, output)
+
+    def save_output_file(self, host, command, path):
+        return self.save_file(host, command, path)
+
+    def latest(self, host, command=None):
+        # Returns (command, timestamp, path, size) of the newest output, or None
+        with self.lock:
+            if command is None:
+                query = "SELECT command, timestamp, path, size FROM latest WHERE host = ? ORDER BY timestamp DESC LIMIT 1"
+                return self.db.execute(query, (host,)).fetchone()
+            query = "SELECT command, timestamp, path, size FROM latest WHERE host = ? AND command = ?"
+            return self.db.execute(query, (host, command)).fetchone()
+
+    def history(self, host, command=None):
+        with self.lock:
+            if command is None:
+                query = "SELECT command, timestamp, path, size FROM history WHERE host = ? ORDER BY timestamp"
+                return self.db.execute(query, (host,)).fetchall()
+            query = "SELECT command, timestamp, path, size FROM history WHERE host = ? AND command = ? ORDER BY timestamp"
+            return self.db.execute(query, (host, command)).fetchall()
+
+    def stats(self):
+        with self.lock:
+            outputs, size, hosts = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COUNT(DISTINCT host) FROM history").fetchone()
+            latest = self.db.execute("SELECT COUNT(*) FROM latest").fetchone()[0]
+        return {"outputs": outputs, "bytes": size, "hosts": hosts, "latest_entries": latest}
+
+    def close(self):
+        self.db.close()
+
+
+# Step 3: Command-Line Interface for Lookups and Moving Old Flat .txt Files into the Layout
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query or fill the sharded backup layout")
+    parser.add_argument("--root", default="backups", help="Layout directory (default: backups)", metavar="")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    latest_parser = subparsers.add_parser("latest", help="Print the newest output of a host")
+    latest_parser.add_argument("host")
+    latest_parser.add_argument("--command", help="Only this command", metavar="")
+    history_parser = subparsers.add_parser("history", help="List all outputs of a host")
+    history_parser.add_argument("host")
+    history_parser.add_argument("--command", help="Only this command", metavar="")
+    import_parser = subparsers.add_parser("import", help="Move {host}_{command}_{timestamp}.txt files into the layout")
+    import_parser.add_argument("patterns", nargs="+")
+    subparsers.add_parser("stats", help="Show the size of the layout")
+    args = parser.parse_args()
+
+    layout = BackupLayout(args.root)
+
+    if args.action == "latest":
+        row = layout.latest(args.host, args.command)
+        if row is None:
+            print(f"No backup found for {args.host}")
+        else:
+            print(f"# {args.host} '{row[0]}' at {row[1]} ({row[2]})")
+            with open(row[2]) as file:
+                print(file.read())
+
+    elif args.action == "history":
+        for command, timestamp, path, size in layout.history(args.host, args.command):
+            print(f"{timestamp}  {command:<24} {size:>10}  {path}")
+
+    elif args.action == "import":
+        moved = 0
+        for path in sorted({path for pattern in args.patterns for path in glob.glob(pattern)}):
+            try:
+                host, command, timestamp = parse_filename(path, LEGACY_COMMANDS)
+            except ValueError as e:
+                print(f"Skipping {path}: {e}")
+                continue
+            layout.save_file(host, command, path, timestamp)
+            moved += 1
+        print(f"📦 Moved {moved} files into {args.root}")
+
+    elif args.action == "stats":
+        stats = layout.stats()
+        print(f"📦 {stats['outputs']} outputs of {stats['hosts']} hosts, {stats['bytes'] / 1024 / 1024:.1f} MB, "
+              f"{stats['latest_entries']} latest entries")
+
+    layout.close()
@@ -1,118 +1,94 @@
 # Step 1: Import Required Modules
-import pandas as pd
-from netmiko import ConnectHandler
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed  # For concurrent execution using threads
+import argparse  # For the optional run deadline and phase timeouts
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED  # For concurrent execution using threads
+from itertools import islice  # For taking the first devices of the inventory
 import time  # For measuring execution time
-
-# Step 2: Define the Base Class for Network Devices
-class NetworkDevice:
-    def __init__(self, hostname, username, password):
-        self.hostname = hostname
-        self.username = username
-        self.password = password
-
-    def backup_config(self):
-        pass  # To be implemented by subclasses
-    def __str__(self):
-        # Defines string representation of the object
-        return f"{self.__class__.__name__}(hostname={self.hostname})"
-
-# Step 3: Define the CiscoDevice Class (inherits from NetworkDevice)
-class CiscoDevice(NetworkDevice):
-    def __init__(self, hostname, username="rviews", password=""):
-        super().__init__(hostname, username, password)
-        self.device_type = "cisco_ios_telnet"
-
-    def backup_config(self):
-        try:
-            connection = ConnectHandler(
-                device_type=self.device_type,
-                host=self.hostname,
-                username=self.username,
-                password=self.password
-            )
-            output = connection.send_command("show version")  # Fetch device version info
-            connection.disconnect()
-
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-            filename = f"{self.hostname}_cisco_config_{timestamp}.txt"
-
-            with open(filename, "w") as file:
-                file.write(output)
-            return f"Cisco: {self.hostname} backup saved to {filename}"
-        except Exception as e:
-            return f"Cisco: Failed to back up {self.hostname}: {e}"
-
-# Step 4: Define the JuniperDevice Class (inherits from NetworkDevice)
-class JuniperDevice(NetworkDevice):
-    def __init__(self, hostname, username="rviews", password=""):
-        super().__init__(hostname, username, password)
-        self.device_type = "juniper_junos_telnet"
-
-    def backup_config(self):
-        try:
-            connection = ConnectHandler(
-                device_type=self.device_type,
-                host=self.hostname,
-                username=self.username,
-                password=self.password
-            )
-            output = connection.send_command("show bgp summary")  # Fetch BGP summary
-            connection.disconnect()
-
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-            filename = f"{self.hostname}_juniper_config_{timestamp}.txt"
-
-            with open(filename, "w") as file:
-                file.write(output)
-            return f"Juniper: {self.hostname} backup saved to {filename}"
-        except Exception as e:
-            return f"Juniper: Failed to back up {self.hostname}: {e}"
-
-# Step 5: Read Device Information from CSV using Pandas
-devices = []
-df = pd.read_csv("devices.csv")  # Load device data from CSV file
-
-for _, row in df.iterrows():  # Iterate over each row in the DataFrame
-    if row["device_type"] == "cisco_ios_telnet":
-        device = CiscoDevice(hostname=row["hostname"], username=row["username"], password=row["password"])
-    elif row["device_type"] == "juniper_junos_telnet":
-        device = JuniperDevice(hostname=row["hostname"], username=row["username"], password=row["password"])
-    else:
-        print(f"Skipping unknown device type: {row['device_type']}")
-        continue
-    devices.append(device)
-
-# Step 6: Back Up All Devices in Parallel Using Multithreading
+from backup_layout import BackupLayout  # Output files sharded by host and date, with a latest-output index
+from inventory_loader import iter_devices  # CSV rows → device objects, class looked up by device_type
+from network_devices import PhaseTimeouts  # Separate connect / login / command time limits
+from result_records import BackupResult, ResultWriter  # One structured record per device
+from phase_timing import PhaseHistograms  # Time spent in connect / auth / prompt / command / write
+
+# Usage: python backup_multithreaded.py --deadline 3600 --connect-timeout 5 --auth-timeout 15 --command-timeout 60
+parser = argparse.ArgumentParser(description="Back up devices from devices.csv with 5 threads")
+parser.add_argument("--deadline", type=float, help="Time budget for the whole run in seconds", metavar="")
+parser.add_argument("--connect-timeout", type=float, default=10, help="TCP connect timeout (default: 10)", metavar="")
+parser.add_argument("--auth-timeout", type=float, default=20, help="Login timeout (default: 20)", metavar="")
+parser.add_argument("--command-timeout", type=float, default=60, help="Command output timeout (default: 60)", metavar="")
+args = parser.parse_args()
+timeouts = PhaseTimeouts(args.connect_timeout, args.auth_timeout, args.command_timeout)
+
+metrics = PhaseHistograms()  # Phase timings of every device in this run
+layout = BackupLayout()  # Outputs go to backups/<xx>/<hostname>/<YYYY>/<MM>/<DD>/, indexed in backups/index.db
+results_file = ResultWriter("results.jsonl")  # One JSON line per device, written as backups finish
+
+# Step 2: Read Device Information from CSV
+# iter_devices() reads devices.csv row by row and creates each object (CiscoDevice, JuniperDevice,
+# IOS-XR, NX-OS, picked by device_type) only when the loop asks for it: no DataFrame, no iterrows()
+devices = iter_devices("devices.csv")
+max_in_flight = 10  # Devices submitted but not finished: the next one is read only when one finishes
+
+# Step 3: Back Up All Devices in Parallel Using Multithreading
 
 start_time = time.time()  # Start timer
+# At the deadline, sessions in flight are aborted and the devices not backed up are "Not reached"
+deadline_at = time.monotonic() + args.deadline if args.deadline else None
 
 success_count = 0
 failure_count = 0
+not_reached_count = 0
 
 # Create a ThreadPoolExecutor with 5 threads
 with ThreadPoolExecutor(max_workers=5) as executor:
-    # Submit backup tasks for each device
-    futures = {executor.submit(device.backup_config): device for device in devices}
-    
-    for future, device in futures.items():
+    # Submit backup tasks for the first devices only, so the futures never hold the whole inventory
+    futures = {}
+
+    def submit(device):
+        future = executor.submit(device.backup_config, layout, False, timeouts)
+        futures[future] = device
         print(f"Key: {future}, Value: {device}")  # Debug print to show mapping
 
-    # Process results as they complete
-    for future in as_completed(futures):
-        device = futures[future]  # Retrieve the corresponding device
-        print(f"Print {device} for testing")  # Debug print
-        try:
-            result = future.result()  # Get the result of the backup
-            if "backup saved to" in result:
-                success_count += 1
-            else:
+    for device in islice(devices, max_in_flight):
+        submit(device)
+
+    # Process results as they complete, and submit the next device for every finished one
+    while futures:
+        wait_time = max(0, deadline_at - time.monotonic()) if deadline_at else None
+        done, _ = wait(futures, timeout=wait_time, return_when=FIRST_COMPLETED)
+        if not done:
+            # Run deadline reached: abort the sessions in flight, they end with a "Not reached" result
+            for device in futures.values():
+                device.abort()
+            done = list(futures)
+        deadline_reached = deadline_at is not None and time.monotonic() >= deadline_at
+        for future in done:
+            device = futures.pop(future)  # Retrieve the corresponding device
+            next_device = None if deadline_reached else next(devices, None)
+            if next_device is not None:
+                submit(next_device)
+            print(f"Print {device} for testing")  # Debug print
+            try:
+                result = future.result()  # Get the result of the backup
+                metrics.observe("backup_config", device.vendor, device.timings)
+                if result.ok:
+                    success_count += 1
+                elif result.status == "not_reached":
+                    not_reached_count += 1
+                else:
+                    failure_count += 1
+            except Exception as e:
+                result = BackupResult(device.hostname, None, "failed", f"{device.hostname} backup failed: {e}",
+                                      error_class=type(e).__name__)
                 failure_count += 1
-        except Exception as e:
-            result = f"{device.hostname} backup failed: {e}"
-            failure_count += 1
-        print(result)
+            results_file.write(result)
+            print(result)
+
+# Devices the run never started before the deadline
+for device in devices:
+    result = device._not_reached("run deadline reached before start")
+    not_reached_count += 1
+    results_file.write(result)
+    print(result)
 
 # End timer
 end_time = time.time()
@@ -120,4 +96,10 @@ end_time = time.time()
 # Print summary
 print(f"\n✅ Successful backups: {success_count}")
 print(f"❌ Failed backups: {failure_count}")
+if args.deadline:
+    print(f"⏳ Not reached before the {args.deadline:g}s deadline: {not_reached_count}")
 print(f"⏱️ Total execution time: {end_time - start_time:.2f} seconds")
+results_file.close()
+print(f"📝 Results saved to {results_file.path}")
+print(metrics.summary())
+metrics.export("phase_timings")  # phase_timings.json and phase_timings.prom
@@ -0,0 +1,304 @@
+# Back Up Network Devices with an Adaptive Number of Threads (AIMD)
+
+# Introduction
+# - backup_multithreaded.py always runs 5 backups at a time, for 5 or 5,000 devices.
+# - Here the number of in-flight backups changes at runtime, like TCP congestion control:
+#     * Slow start: double the limit every "round" (limit completions) until the first sign of trouble.
+#     * Additive increase: +1 per round while devices answer quickly and without errors.
+#     * Multiplicative decrease: halve the limit when latency rises well above its baseline, or when
+#       too many recent backups fail or time out.
+# - Latency is the median (p50) of the last 20 successful backups, so a few devices that are always
+#   slow (far away, big configs) don't count as overload. The baseline follows that median slowly
+#   (EWMA), so a sudden rise is caught, while a fleet that is just slower than its first devices
+#   becomes the new normal instead of keeping the limit at the minimum.
+# - The end-of-run summary prints how the concurrency limit moved during the run.
+#
+# Usage:
+#   python backup_multithreaded_adaptive.py --start 5 --max-workers 100
+#   python backup_multithreaded_adaptive.py --layout /srv/backups          # Default: ./backups
+#   python backup_multithreaded_adaptive.py --retention 48h,30d,12m       # Keep all 48 h, daily 30 days, monthly 12 months
+#   python backup_multithreaded_adaptive.py --store backup_store
+#   python backup_multithreaded_adaptive.py --archive --codec gzip
+#   python backup_multithreaded_adaptive.py --breaker breaker_state.json --retries 3
+#   python backup_multithreaded_adaptive.py --deadline 3600 --connect-timeout 5 --auth-timeout 15 --command-timeout 60
+#   python backup_multithreaded_adaptive.py --metrics /var/lib/node_exporter/textfile/network_backup
+#   python backup_multithreaded_adaptive.py --resume      # Continue the last run after a crash
+#   python backup_multithreaded_adaptive.py --rate-limit global:10 --rate-limit aaa_server=*:5
+#   python backup_multithreaded_adaptive.py --probe probe_state.json   # Full backup only of devices that changed
+
+# Step 1: Import Required Modules
+import argparse
+import statistics
+import threading
+import time  # For measuring execution time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from backup_archive import ArchiveWriter
+from backup_layout import BackupLayout
+from backup_store import BackupStore
+from checkpoint_journal import RunJournal
+from change_probe import ChangeProbe
+from circuit_breaker import CircuitBreaker
+from inventory_loader import iter_devices
+from network_devices import PhaseTimeouts
+from phase_timing import PhaseHistograms
+from rate_limits import RateLimiter, parse_rule
+from result_records import ResultSummary, ResultWriter
+from retention import RetentionWorker, parse_policy
+
+
+# Step 2: Define the AIMD Concurrency Controller
+class AimdController:
+    def __init__(self, start=5, minimum=1, maximum=100, latency_factor=2.0,
+                 failure_threshold=0.2, window=20, baseline_weight=0.05):
+        self.limit = start
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_factor = latency_factor        # "Overloaded" when latency > baseline x factor
+        self.failure_threshold = failure_threshold  # "Overloaded" when more than 20% of recent backups failed
+        self.recent = deque(maxlen=window)          # True = failed, for the last 'window' backups
+        self.latencies = deque(maxlen=window)       # Latencies of the last 'window' successful backups
+        self.latency = None                         # Their median (p50)
+        self.baseline = None                        # Slow EWMA of the median: the latency of a healthy run
+        self.baseline_weight = baseline_weight
+        self.slow_start = True
+        self.completed_in_round = 0
+        self.start_time = time.perf_counter()
+        self.trajectory = [(0.0, start, "start")]
+        self.lock = threading.Lock()
+
+    def _set_limit(self, limit, reason):
+        limit = max(self.minimum, min(self.maximum, limit))
+        if limit != self.limit:
+            self.limit = limit
+            self.trajectory.append((time.perf_counter() - self.start_time, limit, reason))
+        self.completed_in_round = 0
+
+    def record(self, latency, failed):
+        with self.lock:
+            self.recent.append(failed)
+            if not failed:
+                self.latencies.append(latency)
+                self.latency = statistics.median(self.latencies)
+                if self.baseline is None:
+                    self.baseline = self.latency
+                else:
+                    self.baseline += self.baseline_weight * (self.latency - self.baseline)
+
+            failure_rate = sum(self.recent) / len(self.recent)
+            slow = self.latency is not None and self.latency > self.baseline * self.latency_factor
+            # At least 5 samples, fewer when the limit is smaller: a round of 1 or 2 backups can still back off
+            enough_samples = len(self.recent) >= min(5, self.limit)
+            overloaded = slow or (enough_samples and failure_rate > self.failure_threshold)
+
+            self.completed_in_round += 1
+            if self.completed_in_round < self.limit:
+                return  # Only react once per round, so one burst of errors doesn't collapse the limit
+
+            if overloaded:
+                self.slow_start = False
+                self.recent.clear()
+                self._set_limit(int(self.limit * 0.5), "slow" if slow else "failures")
+            elif self.slow_start:
+                self._set_limit(self.limit * 2, "slow start")
+            else:
+                self._set_limit(self.limit + 1, "increase")
+
+    def summary(self):
+        limits = [point[1] for point in self.trajectory]
+        lines = [f"📈 Concurrency trajectory (min {min(limits)}, max {max(limits)}, final {self.limit}):"]
+        for seconds, limit, reason in self.trajectory:
+            lines.append(f"   {seconds:8.2f}s → {limit:>4} workers ({reason})")
+        return "\n".join(lines)
+
+
+# Step 3: Back Up All Devices, Keeping 'controller.limit' Backups in Flight
+def timed_backup(device, store=None, stream=False, breaker=None, timeouts=None, probe=None, limiter=None):
+    start = time.perf_counter()
+    if breaker:
+        result = breaker.call(device, lambda: device.backup_config(store, stream, timeouts, probe), limiter)
+    else:
+        result = device.backup_config(store, stream, timeouts, probe)
+    return result, time.perf_counter() - start
+
+
+# 'deadline' is the time budget of the whole run in seconds: when it expires, in-flight sessions are
+# aborted and every device that was not finished is reported as "Not reached" (not as a failure).
+def run_adaptive_backups(devices, controller, on_result=print, store=None, stream=False, breaker=None,
+                         timeouts=None, deadline=None, metrics=None, journal=None, limiter=None, probe=None,
+                         writer=None):
+    results = []
+    pending = {}  # Future → device
+    # With 'limiter' (rate_limits.py) the next device is the first one whose login buckets have a token
+    remaining = limiter.schedule(devices) if limiter else iter(devices)
+    end_time = time.monotonic() + deadline if deadline else None
+
+    def report(result):
+        results.append(result)
+        if writer:
+            writer.write(result)
+        if on_result:
+            on_result(result)
+
+    # The pool is sized for the maximum, the controller decides how many threads are actually busy
+    executor = ThreadPoolExecutor(max_workers=controller.maximum)
+    try:
+        while end_time is None or time.monotonic() < end_time:
+            token_wait = None  # Seconds until a rate-limited device may log in
+            while len(pending) < controller.limit:
+                device, wait_for_token = remaining.take() if limiter else (next(remaining, None), None)
+                if device is None:
+                    token_wait = wait_for_token
+                    break
+                pending[executor.submit(timed_backup, device, store, stream, breaker, timeouts, probe, limiter)] = device
+            if not pending:
+                if token_wait is None:
+                    break
+                # Every device left is waiting for a token and no backup is running
+                time.sleep(min(token_wait, max(0, end_time - time.monotonic())) if end_time else token_wait)
+                continue
+
+            wait_time = max(0, end_time - time.monotonic()) if end_time else None
+            if token_wait is not None:
+                wait_time = token_wait if wait_time is None else min(wait_time, token_wait)
+            done, _ = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+            for future in done:
+                device = pending.pop(future)
+                result, latency = future.result()
+                if metrics:
+                    metrics.observe("backup_config", device.vendor, device.timings)
+                if journal:
+                    journal.record(device.hostname, result)
+                # Skipped hosts (open circuit) say nothing about the load on the network
+                if result.status != "skipped":
+                    controller.record(latency, not result.ok)
+                report(result)
+
+        if pending:
+            # Run deadline reached: abort the sessions still in flight, then list what was never started.
+            # Only finished backups are read: the others may be sleeping in a retry backoff or waiting
+            # for a login token, so they are reported as not reached without waiting for them.
+            for device in pending.values():
+                device.abort()
+            for future, device in pending.items():
+                report(future.result()[0] if future.done() else device._not_reached("cancelled at run deadline"))
+        for device in remaining:
+            report(device._not_reached("run deadline reached before start"))
+    finally:
+        # At the deadline the aborted threads end on their own; the run doesn't wait for them
+        executor.shutdown(wait=not pending, cancel_futures=True)
+    return results
+
+
+# Step 4: Run the Backups and Print a Summary
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Back up devices from devices.csv with adaptive concurrency")
+    parser.add_argument("--inventory", default="devices.csv", help="Inventory CSV file (default: devices.csv)", metavar="")
+    parser.add_argument("--start", type=int, default=5, help="Initial number of workers (default: 5)", metavar="")
+    parser.add_argument("--min-workers", type=int, default=1, help="Lowest allowed number of workers (default: 1)", metavar="")
+    parser.add_argument("--max-workers", type=int, default=100, help="Highest allowed number of workers (default: 100)", metavar="")
+    parser.add_argument("--latency-factor", type=float, default=2.0, help="Back off when the median latency exceeds its baseline x factor (default: 2.0)", metavar="")
+    parser.add_argument("--failure-threshold", type=float, default=0.2, help="Back off above this recent failure rate (default: 0.2)", metavar="")
+    parser.add_argument("--layout", default="backups", help="Backup directory, sharded by host and date, with an index (default: backups)", metavar="")
+    parser.add_argument("--retention", type=parse_policy, help="Prune and compress old backups of the layout in the background, e.g. 48h,30d,12m", metavar="")
+    parser.add_argument("--store", help="Save into a deduplicated backup store directory instead of the layout", metavar="")
+    parser.add_argument("--stream", action="store_true", help="Write output to disk in chunks as it arrives")
+    parser.add_argument("--archive", action="store_true", help="Write one compressed archive for the whole run")
+    parser.add_argument("--codec", default="gzip", choices=["gzip", "lzma", "zstd"], help="Archive compression (default: gzip)", metavar="")
+    parser.add_argument("--breaker", help="Circuit breaker state file, enables retries and skipping dead hosts", metavar="")
+    parser.add_argument("--breaker-threshold", type=int, default=3, help="Failed runs before a host is skipped (default: 3)", metavar="")
+    parser.add_argument("--breaker-cooldown", type=float, default=3600, help="Seconds to skip an open host (default: 3600)", metavar="")
+    parser.add_argument("--retries", type=int, default=3, help="Attempts per device with --breaker (default: 3)", metavar="")
+    parser.add_argument("--deadline", type=float, help="Time budget for the whole run in seconds", metavar="")
+    parser.add_argument("--connect-timeout", type=float, default=10, help="TCP connect timeout (default: 10)", metavar="")
+    parser.add_argument("--auth-timeout", type=float, default=20, help="Login timeout (default: 20)", metavar="")
+    parser.add_argument("--command-timeout", type=float, default=60, help="Command output timeout (default: 60)", metavar="")
+    parser.add_argument("--rate-limit", type=parse_rule, action="append", default=[],
+                        help="Login rate: global:RATE, COLUMN=VALUE:RATE or COLUMN=*:RATE, optional :BURST (repeatable)", metavar="")
+    parser.add_argument("--probe", help="Change probe state file: skip the full configuration backup of devices that did not change (\"_config\" device types)", metavar="")
+    parser.add_argument("--journal-dir", default="journals", help="Checkpoint journals directory (default: journals)", metavar="")
+    parser.add_argument("--run-id", help="Run id of the journal (default: start time, or the latest with --resume)", metavar="")
+    parser.add_argument("--resume", action="store_true", help="Continue a run: skip devices its journal lists as backed up")
+    parser.add_argument("--results", default="results.jsonl", help="JSONL file, one record per device appended as it finishes (default: results.jsonl)", metavar="")
+    parser.add_argument("--metrics", default="phase_timings", help="Phase timing files <name>.json and <name>.prom (default: phase_timings)", metavar="")
+    args = parser.parse_args()
+    timeouts = PhaseTimeouts(args.connect_timeout, args.auth_timeout, args.command_timeout)
+    breaker = None
+    if args.breaker:
+        breaker = CircuitBreaker(args.breaker, failure_threshold=args.breaker_threshold,
+                                 cooldown=args.breaker_cooldown, attempts=args.retries)
+    if args.archive:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        store = ArchiveWriter(f"backup_run_{timestamp}.bkar", codec=args.codec)
+    else:
+        store = BackupStore(args.store) if args.store else BackupLayout(args.layout)
+    retention = None
+    if args.retention and isinstance(store, BackupLayout):
+        # Low-priority thread next to the backups; it only touches outputs older than the keep-all tier
+        retention = RetentionWorker(store.root, args.retention).start()
+
+    journal = RunJournal(args.journal_dir, run_id=args.run_id, resume=args.resume)
+    print(f"📓 Run id: {journal.run_id} (continue it with --resume --run-id {journal.run_id})")
+    writer = ResultWriter(args.results, run_id=journal.run_id)
+    limiter = RateLimiter(args.rate_limit) if args.rate_limit else None
+    # Device objects are created as threads become free
+    devices = journal.pending(iter_devices(args.inventory, tag_columns=limiter.columns if limiter else ()))
+    metrics = PhaseHistograms()
+    probe = ChangeProbe(args.probe) if args.probe else None
+
+    controller = AimdController(
+        start=args.start,
+        minimum=args.min_workers,
+        maximum=args.max_workers,
+        latency_factor=args.latency_factor,
+        failure_threshold=args.failure_threshold,
+    )
+
+    start_time = time.time()  # Start timer
+    try:
+        results = run_adaptive_backups(devices, controller, store=store, stream=args.stream, breaker=breaker,
+                                       timeouts=timeouts, deadline=args.deadline, metrics=metrics, journal=journal,
+                                       limiter=limiter, probe=probe, writer=writer)
+    finally:
+        journal.close()  # Writes what is still queued, also on Ctrl+C
+        writer.close()
+        if probe:
+            probe.save()
+        if retention:
+            retention.stop()  # Whatever is left is done by the next run
+        store.close()  # An archive gets its index footer, so the outputs saved so far stay readable
+        if breaker:
+            breaker.save()  # Keep what this run learned about failing hosts, also on Ctrl+C
+    end_time = time.time()  # End timer
+
+    summary = ResultSummary()
+    for result in results:
+        summary.add(result)
+    success_count = summary.statuses["ok"] + summary.statuses["unchanged"]
+    not_reached_count = summary.statuses["not_reached"]
+    failure_count = summary.statuses["failed"]
+
+    if args.archive:
+        print(f"\n📦 Archive written to {store.path}")
+
+    # Print summary
+    print(f"\n✅ Successful backups: {success_count}")
+    print(f"❌ Failed backups: {failure_count}")
+    if args.deadline:
+        print(f"⏳ Not reached before the {args.deadline:g}s deadline: {not_reached_count}")
+    print(f"⏱️ Total execution time: {end_time - start_time:.2f} seconds")
+    print(summary.summary())
+    print(f"📝 Results saved to {writer.path}")
+    print(controller.summary())
+    print(journal.summary())
+    if retention:
+        print(retention.summary())
+    if probe:
+        print(probe.summary())
+    if limiter:
+        print(limiter.summary())
+    print(metrics.summary())
+    print(f"📝 Phase timings saved to {', '.join(metrics.export(args.metrics))}")
+    if breaker:
+        print(breaker.summary())
@@ -1,90 +1,23 @@
 # Step 1: Import Required Modules
-import pandas as pd
-from netmiko import ConnectHandler
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed  # For concurrent execution using threads
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED  # For concurrent execution using threads
+from itertools import islice  # For taking the first devices of the inventory
 import time  # For measuring execution time
+from backup_layout import BackupLayout  # Output files sharded by host and date, with a latest-output index
+from inventory_loader import iter_devices  # CSV rows → device objects, class looked up by device_type
+from result_records import BackupResult, ResultWriter  # One structured record per device
+from phase_timing import PhaseHistograms  # Time spent in connect / auth / prompt / command / write
 
-# Step 2: Define the Base Class for Network Devices
-class NetworkDevice:
-    def __init__(self, hostname, username, password):
-        self.hostname = hostname
-        self.username = username
-        self.password = password
+metrics = PhaseHistograms()  # Phase timings of every device in this run
+layout = BackupLayout()  # Outputs go to backups/<xx>/<hostname>/<YYYY>/<MM>/<DD>/, indexed in backups/index.db
+results_file = ResultWriter("results.jsonl")  # One JSON line per device, written as backups finish
 
-    def backup_config(self):
-        pass  # To be implemented by subclasses
-    def __str__(self):
-        # Defines string representation of the object
-        return f"{self.__class__.__name__}(hostname={self.hostname})"
+# Step 2: Read Device Information from CSV
+# iter_devices() reads devices.csv row by row and creates each object (CiscoDevice, JuniperDevice,
+# IOS-XR, NX-OS, picked by device_type) only when the loop asks for it: no DataFrame, no iterrows()
+devices = iter_devices("devices.csv")
+max_in_flight = 10  # Devices submitted but not finished: the next one is read only when one finishes
 
-# Step 3: Define the CiscoDevice Class (inherits from NetworkDevice)
-class CiscoDevice(NetworkDevice):
-    def __init__(self, hostname, username="rviews", password=""):
-        super().__init__(hostname, username, password)
-        self.device_type = "cisco_ios_telnet"
-
-    def backup_config(self):
-        try:
-            connection = ConnectHandler(
-                device_type=self.device_type,
-                host=self.hostname,
-                username=self.username,
-                password=self.password
-            )
-            output = connection.send_command("show version")  # Fetch device version info
-            connection.disconnect()
-
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-            filename = f"{self.hostname}_cisco_config_{timestamp}.txt"
-
-            with open(filename, "w") as file:
-                file.write(output)
-            return f"Cisco: {self.hostname} backup saved to {filename}"
-        except Exception as e:
-            return f"Cisco: Failed to back up {self.hostname}: {e}"
-
-# Step 4: Define the JuniperDevice Class (inherits from NetworkDevice)
-class JuniperDevice(NetworkDevice):
-    def __init__(self, hostname, username="rviews", password=""):
-        super().__init__(hostname, username, password)
-        self.device_type = "juniper_junos_telnet"
-
-    def backup_config(self):
-        try:
-            connection = ConnectHandler(
-                device_type=self.device_type,
-                host=self.hostname,
-                username=self.username,
-                password=self.password
-            )
-            output = connection.send_command("show bgp summary")  # Fetch BGP summary
-            connection.disconnect()
-
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-            filename = f"{self.hostname}_juniper_config_{timestamp}.txt"
-
-            with open(filename, "w") as file:
-                file.write(output)
-            return f"Juniper: {self.hostname} backup saved to {filename}"
-        except Exception as e:
-            return f"Juniper: Failed to back up {self.hostname}: {e}"
-
-# Step 5: Read Device Information from CSV using Pandas
-devices = []
-df = pd.read_csv("devices.csv")  # Load device data from CSV file
-
-for _, row in df.iterrows():  # Iterate over each row in the DataFrame
-    if row["device_type"] == "cisco_ios_telnet":
-        device = CiscoDevice(hostname=row["hostname"], username=row["username"], password=row["password"])
-    elif row["device_type"] == "juniper_junos_telnet":
-        device = JuniperDevice(hostname=row["hostname"], username=row["username"], password=row["password"])
-    else:
-        print(f"Skipping unknown device type: {row['device_type']}")
-        continue
-    devices.append(device)
-
-# Step 6: Back Up All Devices in Parallel Using Multithreading
+# Step 3: Back Up All Devices in Parallel Using Multithreading
 
 start_time = time.time()  # Start timer
 
@@ -93,21 +26,26 @@ failure_count = 0
 
 # Create a ThreadPoolExecutor with 5 threads
 with ThreadPoolExecutor(max_workers=5) as executor:
-    # Submit backup tasks for each device and collect futures
-    futures = [executor.submit(device.backup_config) for device in devices]
-
-    # Process results as they complete
-    for future in as_completed(futures):
-        try:
-            result = future.result()  # Get the result of the backup
-            if "backup saved to" in result:
-                success_count += 1
-            else:
+    # Submit backup tasks for the first devices and collect futures (not the whole inventory at once)
+    futures = {executor.submit(device.backup_config, layout) for device in islice(devices, max_in_flight)}
+
+    # Process results as they complete, and submit the next device for every finished one
+    while futures:
+        done, futures = wait(futures, return_when=FIRST_COMPLETED)
+        futures |= {executor.submit(device.backup_config, layout) for device in islice(devices, len(done))}
+        for future in done:
+            try:
+                result = future.result()  # Get the result of the backup
+                metrics.observe("backup_config", result.vendor, result.timings)
+                if result.ok:
+                    success_count += 1
+                else:
+                    failure_count += 1
+            except Exception as e:
+                result = BackupResult(None, None, "failed", f"Backup failed: {e}", error_class=type(e).__name__)
                 failure_count += 1
-        except Exception as e:
-            result = f"Backup failed: {e}"
-            failure_count += 1
-        print(result)
+            results_file.write(result)
+            print(result)
 
 # End timer
 end_time = time.time()
@@ -116,3 +54,7 @@ end_time = time.time()
 print(f"\n✅ Successful backups: {success_count}")
 print(f"❌ Failed backups: {failure_count}")
 print(f"⏱️ Total execution time: {end_time - start_time:.2f} seconds")
+results_file.close()
+print(f"📝 Results saved to {results_file.path}")
+print(metrics.summary())
+metrics.export("phase_timings")  # phase_timings.json and phase_timings.prom
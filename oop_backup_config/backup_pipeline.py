@@ -0,0 +1,160 @@
+# Two-Stage Backup Pipeline: I/O Threads Fetch, CPU Processes Post-Process
+
+# Introduction
+# - Parsing, diffing or hashing outputs inside the backup threads holds the GIL,
+#   so the threads that should be waiting on the network end up waiting on each other.
+# - This pipeline splits the work in two stages:
+#     1. Fetch stage: a ThreadPoolExecutor logs in, runs the command and saves the file (I/O only).
+#     2. Process stage: a ProcessPoolExecutor runs the CPU-heavy post-processing in other processes.
+# - A bounded queue sits between the stages. When the processes fall behind, the queue fills up and
+#   the fetch threads wait before adding more, so memory stays bounded (backpressure).
+#
+# Usage:
+#   python backup_pipeline.py --fetch-workers 20 --process-workers 4 --queue-size 50
+
+# Step 1: Import Required Modules
+import argparse
+import functools
+import hashlib
+import os
+import queue
+import threading
+import time  # For measuring execution time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import pandas as pd
+from network_devices import build_devices
+
+STOP = None  # Put on the queue when the fetch stage is finished
+
+
+# Step 2: Default CPU Stage - Hash and Summarise an Output (runs in a worker process)
+def summarize_output(hostname, command, output):
+    lines = output.splitlines()
+    return {
+        "hostname": hostname,
+        "command": command,
+        "sha256": hashlib.sha256(output.encode()).hexdigest(),
+        "lines": len(lines),
+        "first_line": lines[0] if lines else "",
+    }
+
+
+# Step 3: Define the Pipeline
+class FetchProcessPipeline:
+    def __init__(self, process_func=summarize_output, fetch_workers=5, process_workers=None,
+                 queue_size=50, store=None):
+        self.process_func = process_func  # Must be a top-level function so it can be sent to a process
+        self.fetch_workers = fetch_workers
+        self.process_workers = process_workers or os.cpu_count() or 1
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.store = store
+        self.fetch_seconds = 0.0  # Time until the last device was fetched
+
+    def _fetch(self, device):
+        result, output = device.fetch_and_save(self.store)
+        if output is not None:
+            # Blocks while the queue is full: this is the backpressure on the fetch stage
+            self.queue.put((device.hostname, device.command, output))
+        return result
+
+    def _dispatch(self, executor, processed, on_processed):
+        # Moves outputs from the queue into the process pool, never more than 2 per process in flight
+        in_flight = threading.Semaphore(self.process_workers * 2)
+        futures = []
+
+        def failed(item, error):
+            result = {"hostname": item[0], "command": item[1], "error": repr(error)}
+            processed.append(result)
+            if on_processed:
+                on_processed(result)
+
+        def done(item, future):
+            in_flight.release()
+            if future.exception() is not None:
+                return failed(item, future.exception())
+            result = future.result()
+            processed.append(result)
+            if on_processed:
+                on_processed(result)
+
+        while True:
+            item = self.queue.get()
+            if item is STOP:
+                break
+            in_flight.acquire()
+            try:
+                future = executor.submit(self.process_func, *item)
+            except Exception as e:
+                # E.g. BrokenProcessPool after a worker process died: record it and keep draining the
+                # queue, otherwise the fetch threads block forever on a full queue
+                in_flight.release()
+                failed(item, e)
+                continue
+            future.add_done_callback(functools.partial(done, item))
+            futures.append(future)
+        return futures
+
+    def run(self, devices, on_result=print, on_processed=None):
+        fetch_results = []
+        processed = []
+        start = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.process_workers) as process_pool:
+            dispatcher = threading.Thread(target=self._dispatch, args=(process_pool, processed, on_processed))
+            dispatcher.start()
+            try:
+                with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool:
+                    futures = [fetch_pool.submit(self._fetch, device) for device in devices]
+                    try:
+                        for future in as_completed(futures):
+                            result = future.result()
+                            fetch_results.append(result)
+                            if on_result:
+                                on_result(result)
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()  # Devices not started yet; the running ones finish
+                        raise
+                self.fetch_seconds = time.perf_counter() - start
+            finally:
+                # Also when on_result raises: without STOP the dispatcher, and the process pool with it, never ends
+                self.queue.put(STOP)
+                dispatcher.join()
+        # Leaving the ProcessPoolExecutor block waits for the last post-processing tasks
+        return fetch_results, processed
+
+
+# Step 4: Run the Pipeline and Print a Summary
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Back up devices, then post-process outputs in worker processes")
+    parser.add_argument("--inventory", default="devices.csv", help="Inventory CSV file (default: devices.csv)", metavar="")
+    parser.add_argument("--fetch-workers", type=int, default=5, help="I/O threads (default: 5)", metavar="")
+    parser.add_argument("--process-workers", type=int, default=None, help="CPU processes (default: CPU count)", metavar="")
+    parser.add_argument("--queue-size", type=int, default=50, help="Outputs waiting between the stages (default: 50)", metavar="")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.inventory)  # Load device data from CSV file
+    devices = build_devices(df.to_dict("records"))
+
+    pipeline = FetchProcessPipeline(
+        fetch_workers=args.fetch_workers,
+        process_workers=args.process_workers,
+        queue_size=args.queue_size,
+    )
+
+    start_time = time.time()  # Start timer
+    results, processed = pipeline.run(
+        devices,
+        on_processed=lambda summary: print(f"   {summary.get('hostname')}: {summary.get('lines')} lines, sha256 {summary.get('sha256', '')[:12]}"),
+    )
+    end_time = time.time()  # End timer
+
+    success_count = sum(result.ok for result in results)
+    failure_count = len(results) - success_count
+
+    # Print summary
+    print(f"\n✅ Successful backups: {success_count}")
+    print(f"❌ Failed backups: {failure_count}")
+    print(f"🧮 Outputs post-processed: {len(processed)}")
+    print(f"⏱️ Fetch stage time: {pipeline.fetch_seconds:.2f} seconds")
+    print(f"⏱️ Total execution time: {end_time - start_time:.2f} seconds")
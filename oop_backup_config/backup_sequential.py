@@ -1,110 +1,28 @@
-# Backup Network Devices from a CSV File (Using Pandas + Classes)
+# Backup Network Devices from a CSV File (Using the Shared Device Classes)
 
 # Step 1: Import Required Modules
-import pandas as pd
-from netmiko import ConnectHandler
-from datetime import datetime
 import time  # For measuring execution time
+from backup_layout import BackupLayout  # Output files sharded by host and date, with a latest-output index
+from inventory_loader import iter_devices  # CSV rows → device objects, class looked up by device_type
 
-# Step 2: Define the Base Class
-class NetworkDevice:
-    def __init__(self, hostname, username, password):
-        self.hostname = hostname
-        self.username = username
-        self.password = password
+layout = BackupLayout()  # Outputs go to backups/<xx>/<hostname>/<YYYY>/<MM>/<DD>/, indexed in backups/index.db
 
-    def backup_config(self):
-        pass  # Placeholder to be overridden
+# Step 2: Read Device Information from CSV
+# iter_devices() reads devices.csv row by row and creates each object (CiscoDevice, JuniperDevice,
+# IOS-XR, NX-OS, picked by device_type) only when the loop asks for it: no DataFrame, no iterrows()
+devices = iter_devices("devices.csv")
 
-    def __str__(self):
-        # Defines how the object is shown when printed (class name + hostname + username)
-        return f"{self.__class__.__name__}(hostname={self.hostname})"
 
-
-# Step 3: Define the CiscoDevice Class (Telnet)
-class CiscoDevice(NetworkDevice):
-    def __init__(self, hostname, username="rviews", password=""):
-        super().__init__(hostname, username, password)
-        self.device_type = "cisco_ios_telnet"
-
-    def backup_config(self):
-        try:
-            connection = ConnectHandler(
-                device_type=self.device_type,
-                host=self.hostname,
-                username=self.username,
-                password=self.password
-            )
-            output = connection.send_command("show version")
-            connection.disconnect()
-
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-            filename = f"{self.hostname}_cisco_config_{timestamp}.txt"
-
-            with open(filename, "w") as file:
-                file.write(output)
-
-            print(f"Cisco: {self.hostname} backup saved to {filename}")
-            return True
-        except Exception as e:
-            print(f"Cisco: Failed to back up {self.hostname}: {e}")
-            return False
-
-
-# Step 4: Define the JuniperDevice Class (Telnet)
-class JuniperDevice(NetworkDevice):
-    def __init__(self, hostname, username="rviews", password=""):
-        super().__init__(hostname, username, password)
-        self.device_type = "juniper_junos_telnet"
-
-    def backup_config(self):
-        try:
-            connection = ConnectHandler(
-                device_type=self.device_type,
-                host=self.hostname,
-                username=self.username,
-                password=self.password
-            )
-            output = connection.send_command("show bgp summary")
-            connection.disconnect()
-
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-            filename = f"{self.hostname}_juniper_config_{timestamp}.txt"
-
-            with open(filename, "w") as file:
-                file.write(output)
-
-            print(f"Juniper: {self.hostname} backup saved to {filename}")
-            return True
-        except Exception as e:
-            print(f"Juniper: Failed to back up {self.hostname}: {e}")
-            return False
-
-
-# Step 5: Read Devices from CSV using Pandas
-devices = []
-
-df = pd.read_csv("devices.csv")  # Load CSV into DataFrame
-
-for _, row in df.iterrows():  # Loop through each row in DataFrame
-    if row["device_type"] == "cisco_ios_telnet":
-        device = CiscoDevice(hostname=row["hostname"], username=row["username"], password=row["password"])
-    elif row["device_type"] == "juniper_junos_telnet":
-        device = JuniperDevice(hostname=row["hostname"], username=row["username"], password=row["password"])
-    else:
-        print(f"Skipping unknown device type: {row['device_type']}")
-        continue
-    devices.append(device)
-    
-
-# Step 6: Back Up All Devices Sequentially with Timer
+# Step 3: Back Up All Devices Sequentially with Timer
 start_time = time.time()
 
 success_count = 0
 failure_count = 0
 
 for device in devices:
-    if device.backup_config():
+    result = device.backup_config(layout)
+    print(result)
+    if result.ok:
         success_count += 1
     else:
         failure_count += 1
@@ -0,0 +1,139 @@
+# Back Up Network Devices with Several Worker Processes or Machines (Sharded by Consistent Hash)
+
+# Introduction
+# - backup_asyncio.py runs in one process, so one CPU core and one machine are its ceiling.
+# - Here the inventory is loaded into a SQLite work queue (shard_queue.py) and any number of worker
+#   processes back it up. Each worker runs the same asyncio sessions as backup_asyncio.py, but only
+#   for its own shard: the devices whose hostname hashes into its ranges of the consistent-hash ring.
+# - More machines: put the queue file on a shared filesystem and start 'worker' on every machine.
+# - A worker that is killed stops sending heartbeats; after its --lease seconds (kept in the queue
+#   file, so 'summary' uses it too) its shard and its unfinished devices go to the other workers.
+# - 'summary' merges the results of all workers into one report, 'ring' shows how many devices
+#   would move to a new worker.
+#
+# Usage:
+#   python backup_sharded.py run --inventory devices.csv --workers 4            # Enqueue, start 4 local workers, summary
+#   python backup_sharded.py enqueue --inventory devices.csv --queue /shared/work_queue.sqlite
+#   python backup_sharded.py worker --queue /shared/work_queue.sqlite --name node2-w1 --concurrency 200
+#   python backup_sharded.py summary --queue /shared/work_queue.sqlite
+#   python backup_sharded.py ring --queue /shared/work_queue.sqlite --workers 4
+
+# Step 1: Import Required Modules
+import argparse
+import asyncio
+import csv
+import os
+import socket
+import subprocess
+import sys
+import time  # For measuring execution time
+from backup_asyncio import run_backups
+from backup_layout import BackupLayout
+from network_devices import PhaseTimeouts
+from shard_queue import WorkQueue
+
+
+# Step 2: One Worker Process - Back Up its Shard until the Whole Queue is Done
+def run_worker(queue_path, name, concurrency=100, batch_size=50, lease=30.0, poll=2.0, timeouts=None, layout="backups"):
+    queue = WorkQueue(queue_path, lease=lease)
+    worker = queue.worker(name, batch_size)
+    store = BackupLayout(layout)  # Shared by all workers: each process has its own index connection
+    try:
+        while True:
+            # The worker's device stream claims batches from its ranges of the ring (in a thread, off the
+            # event loop) and writes the results of the previous batch in the same transaction
+            asyncio.run(run_backups(worker.stream(), concurrency=concurrency, on_result=None, store=store,
+                                    timeouts=timeouts, journal=worker))
+            unfinished = worker.unfinished()
+            if not unfinished:
+                return
+            # Other workers are still busy: stay alive, in case one of them dies and leaves its shard to us
+            time.sleep(poll)
+    finally:
+        worker.close()
+        store.close()
+
+
+def worker_names(count):
+    return [f"{socket.gethostname()}-w{index}" for index in range(1, count + 1)]
+
+
+def read_rows(path):
+    with open(path, newline="") as file:
+        yield from csv.DictReader(file)
+
+
+# Step 3: Command-Line Interface
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Back up devices with several processes or machines sharing a work queue")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    def add_queue(subparser):
+        subparser.add_argument("--queue", default="work_queue.sqlite", help="Work queue file (default: work_queue.sqlite)", metavar="")
+        subparser.add_argument("--lease", type=float, default=30, help="Seconds without heartbeat before a worker is dead; stored per worker (default: 30)", metavar="")
+
+    def add_worker_options(subparser):
+        subparser.add_argument("--layout", default="backups", help="Backup directory, sharded by host and date (default: backups)", metavar="")
+        subparser.add_argument("--concurrency", type=int, default=100, help="asyncio sessions per worker (default: 100)", metavar="")
+        subparser.add_argument("--batch-size", type=int, default=50, help="Devices claimed per transaction (default: 50)", metavar="")
+        subparser.add_argument("--connect-timeout", type=float, default=10, help="TCP connect timeout (default: 10)", metavar="")
+        subparser.add_argument("--auth-timeout", type=float, default=20, help="Login timeout (default: 20)", metavar="")
+        subparser.add_argument("--command-timeout", type=float, default=60, help="Command output timeout (default: 60)", metavar="")
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Load an inventory into the work queue (starts a new run)")
+    enqueue_parser.add_argument("--inventory", default="devices.csv", help="Inventory CSV file (default: devices.csv)", metavar="")
+    add_queue(enqueue_parser)
+
+    worker_parser = subparsers.add_parser("worker", help="Back up this worker's shard until the queue is done")
+    worker_parser.add_argument("--name", default=f"{socket.gethostname()}-{os.getpid()}", help="Worker name, its place on the ring (default: host-pid)", metavar="")
+    add_queue(worker_parser)
+    add_worker_options(worker_parser)
+
+    run_parser = subparsers.add_parser("run", help="Enqueue, start local worker processes and print the summary")
+    run_parser.add_argument("--inventory", default="devices.csv", help="Inventory CSV file (default: devices.csv)", metavar="")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)", metavar="")
+    add_queue(run_parser)
+    add_worker_options(run_parser)
+
+    summary_parser = subparsers.add_parser("summary", help="Merged results of all workers")
+    add_queue(summary_parser)
+
+    ring_parser = subparsers.add_parser("ring", help="Shard sizes, and how many devices move when a worker is added")
+    ring_parser.add_argument("--workers", type=int, default=4, help="Number of workers (default: 4)", metavar="")
+    add_queue(ring_parser)
+
+    args = parser.parse_args()
+    queue = WorkQueue(args.queue, lease=args.lease)
+
+    if args.action in ("enqueue", "run"):
+        print(f"📥 Devices in the queue: {queue.enqueue(read_rows(args.inventory))}")
+
+    if args.action == "worker":
+        timeouts = PhaseTimeouts(args.connect_timeout, args.auth_timeout, args.command_timeout)
+        run_worker(args.queue, args.name, args.concurrency, args.batch_size, args.lease, timeouts=timeouts,
+                   layout=args.layout)
+        print(f"👷 Worker {args.name} done")
+
+    elif args.action == "run":
+        # Every worker is a separate process with its own event loop (and its own CPU core)
+        options = ["--queue", args.queue, "--lease", str(args.lease), "--layout", args.layout, "--concurrency", str(args.concurrency),
+                   "--batch-size", str(args.batch_size), "--connect-timeout", str(args.connect_timeout),
+                   "--auth-timeout", str(args.auth_timeout), "--command-timeout", str(args.command_timeout)]
+        processes = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker", "--name", name, *options])
+                     for name in worker_names(args.workers)]
+        for process in processes:
+            process.wait()
+        print()
+        print(queue.summary())
+
+    elif args.action == "summary":
+        print(queue.summary())
+
+    elif args.action == "ring":
+        names = worker_names(args.workers)
+        total, moved, per_worker = queue.moved_devices(names, worker_names(args.workers + 1)[-1])
+        print(f"🔗 {total} devices on {args.workers} workers:")
+        for name in names:
+            print(f"   {name:<28} {per_worker.get(name, 0):>8} ({per_worker.get(name, 0) / max(total, 1):.1%})")
+        print(f"➕ Adding worker {args.workers + 1} moves {moved} devices ({moved / max(total, 1):.1%}, "
+              f"ideal {1 / (args.workers + 1):.1%}); all other devices keep their worker")
@@ -0,0 +1,222 @@
+# Content-Addressed, Deduplicated Backup Store
+
+# Introduction
+# - Every run of the backup scripts writes a new .txt file, even when the output did not change.
+# - This store hashes each output (SHA-256) and keeps every unique output only once:
+#       backup_store/objects/ab/cdef0123...   ← the output text, named after its hash
+#       backup_store/manifest.db              ← SQLite table: (host, command, timestamp) → hash
+# - An unchanged output costs only one manifest row.
+# - "Latest backup for host X" is a single indexed lookup, no directory listing needed.
+#
+# Usage:
+#   python backup_store.py latest route-views.routeviews.org
+#   python backup_store.py history route-views.routeviews.org
+#   python backup_store.py import *_config_*.txt
+#   python backup_store.py stats
+
+# Step 1: Import Required Modules
+import argparse
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+
+
+# Microseconds, so two saves of the same device and command within one second get different names
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S-%f"
+# Timestamp formats used in the filenames written by the existing scripts (and by this store before microseconds)
+FILENAME_TIMESTAMP_FORMATS = [TIMESTAMP_FORMAT, "%Y-%m-%d_%H-%M-%S", "%Y-%m-%d_%H-%M", "%Y%m%d-%H%M"]
+
+
+def parse_timestamp(text):
+    for timestamp_format in FILENAME_TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(text, timestamp_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Unknown timestamp format: {text}")
+
+
+def normalize_timestamp(text):
+    # Store every timestamp in one sortable format
+    return parse_timestamp(text).strftime(TIMESTAMP_FORMAT)
+
+
+# Step 2: Define the BackupStore Class
+class BackupStore:
+    def __init__(self, root="backup_store"):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        # One connection shared by all worker threads, protected by a lock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(root, "manifest.db"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS backups ("
+            " host TEXT NOT NULL, command TEXT NOT NULL, timestamp TEXT NOT NULL,"
+            " digest TEXT NOT NULL, size INTEGER NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS backups_latest ON backups (host, command, timestamp)"
+        )
+        self.db.commit()
+
+    def blob_path(self, digest):
+        # Two-level fan-out keeps every directory small
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def save(self, host, command, output, timestamp=None):
+        # Returns (digest, is_new): is_new is False when the same output was already stored
+        data = output.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+
+        is_new = not os.path.exists(path)
+        if is_new:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first, so a crash never leaves half a blob behind
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+
+        self._record(host, command, timestamp, digest, len(data))
+        return digest, is_new
+
+    def save_file(self, host, command, path, timestamp=None):
+        # Same as save(), for an output already written to 'path' (e.g. a streamed backup).
+        # The file is hashed in 1 MB chunks and moved into the store, or deleted if it is a duplicate.
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        size = os.path.getsize(path)
+        blob_path = self.blob_path(digest)
+
+        is_new = not os.path.exists(blob_path)
+        if is_new:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            shutil.move(path, blob_path)
+        else:
+            os.remove(path)
+
+        self._record(host, command, timestamp, digest, size)
+        return digest, is_new
+
+    def _record(self, host, command, timestamp, digest, size):
+        timestamp = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO backups (host, command, timestamp, digest, size) VALUES (?, ?, ?, ?, ?)",
+                (host, command, timestamp, digest, size),
+            )
+            self.db.commit()
+
+    # save_output / save_output_file are what the device classes call (same as backup_archive.ArchiveWriter)
+    def save_output(self, host, command, output):
+        digest, is_new = self.save(host, command, output)
+        return f"store ({digest[:12]}, {'new' if is_new else 'unchanged'})"
+
+    def save_output_file(self, host, command, path):
+        digest, is_new = self.save_file(host, command, path)
+        return f"store ({digest[:12]}, {'new' if is_new else 'unchanged'})"
+
+    def read(self, digest):
+        with open(self.blob_path(digest), encoding="utf-8") as file:
+            return file.read()
+
+    def latest(self, host, command=None):
+        # Returns (command, timestamp, digest) of the newest backup, or None
+        with self.lock:
+            if command is None:
+                query = "SELECT command, timestamp, digest FROM backups WHERE host = ? ORDER BY timestamp DESC LIMIT 1"
+                return self.db.execute(query, (host,)).fetchone()
+            query = ("SELECT command, timestamp, digest FROM backups WHERE host = ? AND command = ?"
+                     " ORDER BY timestamp DESC LIMIT 1")
+            return self.db.execute(query, (host, command)).fetchone()
+
+    def history(self, host, command=None):
+        with self.lock:
+            if command is None:
+                query = "SELECT command, timestamp, digest FROM backups WHERE host = ? ORDER BY timestamp"
+                return self.db.execute(query, (host,)).fetchall()
+            query = "SELECT command, timestamp, digest FROM backups WHERE host = ? AND command = ? ORDER BY timestamp"
+            return self.db.execute(query, (host, command)).fetchall()
+
+    def stats(self):
+        with self.lock:
+            rows, logical_bytes, blobs = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COUNT(DISTINCT digest) FROM backups"
+            ).fetchone()
+            stored_bytes = self.db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM backups)"
+            ).fetchone()[0]
+        return {"backups": rows, "unique_blobs": blobs, "logical_bytes": logical_bytes, "stored_bytes": stored_bytes}
+
+    def close(self):
+        self.db.close()
+
+
+# Step 3: Command-Line Interface for Lookups and Importing Old .txt Backups
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query or fill the deduplicated backup store")
+    parser.add_argument("--root", default="backup_store", help="Store directory (default: backup_store)", metavar="")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    latest_parser = subparsers.add_parser("latest", help="Print the newest backup of a host")
+    latest_parser.add_argument("host")
+    latest_parser.add_argument("--command", help="Only this command", metavar="")
+    history_parser = subparsers.add_parser("history", help="List all backups of a host")
+    history_parser.add_argument("host")
+    import_parser = subparsers.add_parser("import", help="Import {host}_{command}_{timestamp}.txt files")
+    import_parser.add_argument("patterns", nargs="+")
+    subparsers.add_parser("stats", help="Show deduplication statistics")
+    args = parser.parse_args()
+
+    store = BackupStore(args.root)
+
+    if args.action == "latest":
+        row = store.latest(args.host, args.command)
+        if row is None:
+            print(f"No backup found for {args.host}")
+        else:
+            print(f"# {args.host} '{row[0]}' at {row[1]} (sha256 {row[2]})")
+            print(store.read(row[2]))
+
+    elif args.action == "history":
+        for command, timestamp, digest in store.history(args.host):
+            print(f"{timestamp}  {command:<20} {digest[:12]}")
+
+    elif args.action == "import":
+        # Imported here: backup_layout imports this module
+        from backup_layout import LEGACY_COMMANDS, parse_filename
+
+        new_count = imported = 0
+        for path in sorted({path for pattern in args.patterns for path in glob.glob(pattern)}):
+            # e.g. route-views.routeviews.org_cisco_config_2025-06-27_01-53.txt is stored as 'show version',
+            # like the live backups, so 'latest --command "show version"' finds it
+            try:
+                host, command, timestamp = parse_filename(path, LEGACY_COMMANDS)
+            except ValueError as e:
+                print(f"Skipping {path}: {e}")
+                continue
+            with open(path, encoding="utf-8") as file:
+                _, is_new = store.save(host, command, file.read(), timestamp)
+            new_count += is_new
+            imported += 1
+        print(f"Imported {imported} files, {new_count} new unique outputs")
+
+    elif args.action == "stats":
+        stats = store.stats()
+        saved = stats["logical_bytes"] - stats["stored_bytes"]
+        print(f"Backups recorded:  {stats['backups']}")
+        print(f"Unique outputs:    {stats['unique_blobs']}")
+        print(f"Bytes if plain:    {stats['logical_bytes']}")
+        print(f"Bytes stored:      {stats['stored_bytes']} ({saved} saved by deduplication)")
+
+    store.close()
@@ -0,0 +1,100 @@
+# Throughput Benchmark: asyncio Engine vs. the 5-Thread Backup Scripts
+
+# Introduction
+# - Starts a farm of fake Telnet devices on localhost (fake_telnet_server.py).
+# - Backs them all up several ways and prints devices per second for each.
+# - The first three rows hold the client and the concurrency constant: every session uses the same
+#   Telnet client (AsyncTelnetSession in network_devices.py) and at most --workers sessions run at a
+#   time, so only the execution model differs:
+#     1. ThreadPoolExecutor + submit/as_completed (backup_multithreaded.py), one event loop per session
+#     2. ThreadPoolExecutor + map                 (backup_multithreaded_map.py), one event loop per session
+#     3. asyncio engine, limit --workers          (backup_asyncio.py)
+# - The last two rows change one thing each, to show where the rest of the difference between the
+#   scripts comes from:
+#     4. asyncio engine, limit --concurrency      → same client, more sessions in flight
+#     5. ThreadPoolExecutor + Netmiko             → same concurrency, the Netmiko client of the scripts
+#                                                   (about 3 s of fixed cost per Telnet login)
+# - Output files are written to a temporary directory and removed afterwards.
+#
+# Usage:
+#   python benchmark_asyncio_vs_threads.py --devices 200 --latency 0.1 --concurrency 200
+#   python benchmark_asyncio_vs_threads.py --devices 50 --no-netmiko     # Skip the slow Netmiko row
+
+# Step 1: Import Required Modules
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from backup_asyncio import run_backups
+from network_devices import build_devices
+from fake_telnet_server import FakeDeviceFarm
+
+
+# Step 2: The Strategies
+def raw_backup(device):
+    # The asyncio Telnet client, driven by the calling thread in its own event loop
+    return asyncio.run(device.backup_config_async())
+
+
+def threads_submit_completed(devices, workers):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(raw_backup, device) for device in devices]
+        return [future.result() for future in as_completed(futures)]
+
+
+def threads_map(devices, workers):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(raw_backup, devices))
+
+
+def asyncio_engine(devices, concurrency):
+    return asyncio.run(run_backups(devices, concurrency=concurrency, on_result=None))
+
+
+def threads_netmiko(devices, workers):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(device.backup_config) for device in devices]
+        return [future.result() for future in as_completed(futures)]
+
+
+# Step 3: Time One Strategy
+def measure(name, client, strategy, devices, limit):
+    start_time = time.perf_counter()
+    results = strategy(devices, limit)
+    elapsed = time.perf_counter() - start_time
+
+    success_count = sum(result.ok for result in results)
+    print(f"{name:<28} {client:<9} {limit:>6} {success_count:>5}/{len(devices):<5} {elapsed:>9.2f}s "
+          f"{len(devices) / elapsed:>9.1f}/s")
+
+
+# Step 4: Run the Benchmark
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare asyncio and thread-based backups on fake devices")
+    parser.add_argument("--devices", type=int, default=100, help="Number of fake devices (default: 100)", metavar="")
+    parser.add_argument("--latency", type=float, default=0.1, help="Device reply latency in seconds (default: 0.1)", metavar="")
+    parser.add_argument("--output-lines", type=int, default=200, help="Lines of show output per device (default: 200)", metavar="")
+    parser.add_argument("--workers", type=int, default=5, help="Sessions in flight for the same-concurrency rows, as in the scripts (default: 5)", metavar="")
+    parser.add_argument("--concurrency", type=int, default=100, help="asyncio sessions in flight for the 'more sessions' row (default: 100)", metavar="")
+    parser.add_argument("--no-netmiko", action="store_true", help="Skip the Netmiko row")
+    args = parser.parse_args()
+
+    farm = FakeDeviceFarm(args.devices, latency=args.latency, output_lines=args.output_lines).start()
+    devices = build_devices(farm.inventory())
+
+    print(f"Rows 1-3: same client (raw Telnet), same limit ({args.workers} sessions); only the execution model differs")
+    print(f"{'Strategy':<28} {'Client':<9} {'Limit':>6} {'OK':>11} {'Time':>10} {'Rate':>11}")
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        measure("threads submit/as_completed", "raw", threads_submit_completed, devices, args.workers)
+        measure("threads map", "raw", threads_map, devices, args.workers)
+        measure("asyncio engine", "raw", asyncio_engine, devices, args.workers)
+        print("Rows 4-5: one thing changed each (row 4: the limit, row 5: the client)")
+        measure("asyncio engine", "raw", asyncio_engine, devices, args.concurrency)
+        if not args.no_netmiko:
+            measure("threads submit/as_completed", "Netmiko", threads_netmiko, devices, args.workers)
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    farm.stop()
@@ -0,0 +1,108 @@
+# Benchmark: Loading a 100k-Device Inventory
+
+# Introduction
+# - Writes a synthetic devices.csv with --rows devices (Cisco and Juniper mixed).
+# - Loads it in five ways, each in a fresh child process, and prints load time and peak memory:
+#     pandas iterrows       → pd.read_csv() + df.iterrows(), objects with a normal __dict__ (what the
+#                             threaded runners did before iter_devices())
+#     pandas + dict objects → pd.read_csv().to_dict("records"), objects with a normal __dict__
+#     pandas + slots        → pd.read_csv().to_dict("records") + build_devices()
+#     csv + slots (list)    → inventory_loader.load_devices(), all objects in one list
+#     csv + slots (lazy)    → inventory_loader.iter_devices(), objects created one at a time
+# - "Memory" is the growth of peak RSS while loading, so the memory of the imports is not counted.
+#
+# Note: peak RSS comes from resource.getrusage, which is available on Linux and macOS only.
+#
+# Usage:
+#   python benchmark_inventory_loader.py --rows 100000
+
+# Step 1: Import Required Modules
+import argparse
+import csv
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ["pandas iterrows", "pandas + dict objects", "pandas + slots", "csv + slots (list)", "csv + slots (lazy)"]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+# Step 2: Write a Synthetic Inventory
+def write_inventory(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["hostname", "username", "password", "device_type", "host", "port"])
+        for number in range(rows):
+            vendor, device_type = ("juniper", "juniper_junos_telnet") if number % 5 == 0 else ("cisco", "cisco_ios_telnet")
+            writer.writerow([f"sim-{vendor}-{number:06d}", "rviews", "rviews", device_type,
+                             f"10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}", 23])
+
+
+# A device class as it was before __slots__, for comparison
+class DictDevice:
+    def __init__(self, hostname, username, password, host=None, port=23, device_type=None):
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.host = host or hostname
+        self.port = port
+        self.device_type = device_type
+        self.aborted = False
+        self._connection = None
+
+
+# Step 3: Child Process - Load the Inventory One Way and Report Time and Memory
+def run_child(mode, path):
+    import pandas as pd
+    from inventory_loader import iter_devices, load_devices
+    from network_devices import build_devices
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "pandas iterrows":
+        df = pd.read_csv(path)
+        devices = [DictDevice(row["hostname"], row["username"], row["password"], row["host"], int(row["port"]),
+                              row["device_type"]) for _, row in df.iterrows()]
+        count = len(devices)
+    elif mode == "pandas + dict objects":
+        rows = pd.read_csv(path).to_dict("records")
+        devices = [DictDevice(row["hostname"], row["username"], row["password"], row["host"], int(row["port"]),
+                              row["device_type"]) for row in rows]
+        count = len(devices)
+    elif mode == "pandas + slots":
+        devices = build_devices(pd.read_csv(path).to_dict("records"))
+        count = len(devices)
+    elif mode == "csv + slots (list)":
+        devices = load_devices(path)
+        count = len(devices)
+    else:
+        count = sum(1 for _ in iter_devices(path))
+    elapsed = time.perf_counter() - start
+    print(f"{mode:<22} {count:>9} {elapsed:>9.2f}s {peak_rss_mb() - baseline:>10.1f} MB")
+
+
+# Step 4: Parent Process - Write the Inventory and Run Every Mode
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare inventory loading time and memory")
+    parser.add_argument("--rows", type=int, default=100000, help="Devices in the synthetic inventory (default: 100000)", metavar="")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        sys.exit(0)
+
+    print(f"{'Mode':<22} {'Devices':>9} {'Load time':>10} {'Memory':>13}")
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "devices.csv")
+        write_inventory(path, args.rows)
+        for mode in MODES:
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path], check=True)
@@ -0,0 +1,93 @@
+# Benchmark: Post-Processing Inside the Backup Threads vs. the Two-Stage Pipeline
+
+# Introduction
+# - Starts a farm of fake Telnet devices on localhost (fake_telnet_server.py).
+# - Runs a synthetic, pure-Python "parse" (it holds the GIL, like real parsing) on every output:
+#     fetch only      → no parsing, the baseline fetch throughput
+#     parse in thread → parse inside the backup thread, right after the fetch
+#     pipeline        → backup_pipeline.py: threads fetch, a process pool parses
+# - Prints fetch throughput (devices fetched per second) and total time for each.
+#
+# Usage:
+#   python benchmark_pipeline.py --devices 60 --fetch-workers 20 --parse-rounds 40
+
+# Step 1: Import Required Modules
+import argparse
+import os
+import re
+import tempfile
+import time
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from backup_pipeline import FetchProcessPipeline
+from fake_telnet_server import FakeDeviceFarm
+from network_devices import build_devices
+
+PREFIX_PATTERN = re.compile(r"(\d+\.\d+\.\d+\.\d+)/(\d+)")
+
+
+# Step 2: Synthetic CPU Workload (pure Python, holds the GIL)
+def synthetic_parse(hostname, command, output, rounds=40):
+    prefixes = {}
+    for _ in range(rounds):
+        for line in output.splitlines():
+            fields = line.split()
+            match = PREFIX_PATTERN.search(line)
+            if match:
+                prefixes[match.group(1)] = (int(match.group(2)), len(fields))
+    return {"hostname": hostname, "prefixes": len(prefixes)}
+
+
+# Step 3: The Three Modes
+def fetch_only(devices, workers, rounds):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda device: device.backup_config(), devices))
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def parse_in_thread(devices, workers, rounds):
+    def backup_and_parse(device):
+        _, output = device.fetch_and_save()
+        fetched_at = time.perf_counter()
+        synthetic_parse(device.hostname, device.command, output, rounds)
+        return fetched_at
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fetched = list(executor.map(backup_and_parse, devices))
+    return max(fetched) - start, time.perf_counter() - start
+
+
+def pipeline(devices, workers, rounds):
+    start = time.perf_counter()
+    # partial() of a top-level function can still be sent to the worker processes
+    runner = FetchProcessPipeline(process_func=partial(synthetic_parse, rounds=rounds), fetch_workers=workers, queue_size=20)
+    runner.run(devices, on_result=None)
+    return runner.fetch_seconds, time.perf_counter() - start
+
+
+# Step 4: Run the Benchmark
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare in-thread parsing with the fetch/process pipeline")
+    parser.add_argument("--devices", type=int, default=60, help="Number of fake devices (default: 60)", metavar="")
+    parser.add_argument("--output-lines", type=int, default=2000, help="Lines of show output per device (default: 2000)", metavar="")
+    parser.add_argument("--fetch-workers", type=int, default=20, help="I/O threads (default: 20)", metavar="")
+    parser.add_argument("--parse-rounds", type=int, default=40, help="How many times each output is parsed (default: 40)", metavar="")
+    args = parser.parse_args()
+
+    farm = FakeDeviceFarm(args.devices, output_lines=args.output_lines).start()
+    devices = build_devices(farm.inventory())
+    home = os.getcwd()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"{'Mode':<18} {'Fetch time':>11} {'Fetch rate':>12} {'Total time':>11}")
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        for name, mode in (("fetch only", fetch_only), ("parse in thread", parse_in_thread), ("pipeline", pipeline)):
+            fetch_seconds, total_seconds = mode(devices, args.fetch_workers, args.parse_rounds)
+            print(f"{name:<18} {fetch_seconds:>10.2f}s {len(devices) / fetch_seconds:>10.1f}/s {total_seconds:>10.2f}s")
+        os.chdir(home)
+
+    farm.stop()
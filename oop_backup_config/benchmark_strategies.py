@@ -0,0 +1,217 @@
+# Benchmark Suite: Backup Strategies over a Simulated Device Farm
+
+# Introduction
+# - The backup_*.py scripts only print their own wall-clock time, on whatever devices.csv holds.
+# - This suite starts a farm of fake devices (fake_telnet_server.py) with a fixed size, latency,
+#   output size and failure rate, then runs each strategy against it, each in a fresh child process:
+#     sequential        → for loop, one device after the other        (backup_sequential.py)
+#     submit_dict       → 5 threads, {submit(): device} + as_completed (backup_multithreaded.py)
+#     map               → 5 threads, executor.map                     (backup_multithreaded_map.py)
+#     submit_completed  → 5 threads, [submit()] + as_completed        (backup_multithreaded_submit_completed.py)
+#     asyncio           → asyncio Telnet sessions, --concurrency workers (backup_asyncio.py)
+# - Every strategy uses the same device classes (network_devices.py) and the same client (--client):
+#     raw     → AsyncTelnetSession; the thread strategies run each session in the thread's own event loop
+#     netmiko → Netmiko, as in the scripts (thread strategies only: about 3 s of fixed cost per Telnet login)
+#   --concurrency defaults to --workers, so by default only the execution model differs. The header line
+#   of the table says what each run held constant.
+# - For each one it prints throughput, p50/p95/p99 per-device latency and peak memory (RSS) of the child.
+# - The failing devices are chosen with --seed, so runs with the same options are comparable.
+#   --json saves the options and all numbers for later comparison.
+#
+# Note: peak RSS comes from resource.getrusage, which is available on Linux and macOS only.
+#
+# Usage:
+#   python benchmark_strategies.py --devices 50 --latency 0.1 --output-lines 2000 --failure-rate 0.1
+#   python benchmark_strategies.py --strategies map,asyncio --devices 500 --json results.json
+#   python benchmark_strategies.py --strategies asyncio --concurrency 100     # Same client, more sessions
+#   python benchmark_strategies.py --client netmiko                           # The scripts' client
+
+# Step 1: Import Required Modules
+import argparse
+import asyncio
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+STRATEGIES = ["sequential", "submit_dict", "map", "submit_completed", "asyncio"]
+CLIENTS = ["raw", "netmiko"]
+client = "raw"  # Set in the child process from --client
+
+
+def timed_backup(device):
+    start = time.perf_counter()
+    result = asyncio.run(device.backup_config_async()) if client == "raw" else device.backup_config()
+    return result, time.perf_counter() - start
+
+
+async def timed_backup_async(device):
+    start = time.perf_counter()
+    result = await device.backup_config_async()
+    return result, time.perf_counter() - start
+
+
+# Step 2: The Strategies (same execution model as the scripts, returning (result, seconds) pairs)
+def sequential(devices, workers):
+    return [timed_backup(device) for device in devices]
+
+
+def submit_dict(devices, workers):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(timed_backup, device): device for device in devices}
+        return [future.result() for future in as_completed(futures)]
+
+
+def map_strategy(devices, workers):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(timed_backup, devices))
+
+
+def submit_completed(devices, workers):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(timed_backup, device) for device in devices]
+        return [future.result() for future in as_completed(futures)]
+
+
+def asyncio_strategy(devices, concurrency):
+    async def run():
+        remaining = iter(devices)
+        results = []
+
+        async def worker():
+            for device in remaining:
+                results.append(await timed_backup_async(device))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results
+
+    return asyncio.run(run())
+
+
+RUNNERS = {
+    "sequential": sequential,
+    "submit_dict": submit_dict,
+    "map": map_strategy,
+    "submit_completed": submit_completed,
+    "asyncio": asyncio_strategy,
+}
+
+
+# Step 3: Statistics
+def percentile(values, fraction):
+    # Nearest-rank percentile of a list of numbers
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+# Step 4: Child Process - Run One Strategy and Print its Numbers as JSON
+def run_child(strategy, inventory, workdir, limit, client_name):
+    global client
+    from inventory_loader import load_devices
+
+    client = client_name
+
+    devices = load_devices(inventory)
+    os.chdir(workdir)
+    start = time.perf_counter()
+    results = RUNNERS[strategy](devices, limit)
+    elapsed = time.perf_counter() - start
+
+    latencies = [seconds for _, seconds in results]
+    print(json.dumps({
+        "strategy": strategy,
+        "client": client,
+        "limit": limit,
+        "devices": len(devices),
+        "ok": sum(result.ok for result, _ in results),
+        "seconds": elapsed,
+        "throughput": len(devices) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+# Step 5: Parent Process - Start the Farm, Run Every Strategy, Print the Table
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the backup strategies against fake devices")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help=f"Comma-separated list (default: {','.join(STRATEGIES)})", metavar="")
+    parser.add_argument("--devices", type=int, default=50, help="Number of fake devices (default: 50)", metavar="")
+    parser.add_argument("--latency", type=float, default=0.05, help="Device reply latency in seconds (default: 0.05)", metavar="")
+    parser.add_argument("--output-lines", type=int, default=200, help="Lines of show output per device (default: 200)", metavar="")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of devices that refuse sessions (default: 0)", metavar="")
+    parser.add_argument("--seed", type=int, default=0, help="Chooses the failing devices (default: 0)", metavar="")
+    parser.add_argument("--workers", type=int, default=5, help="Thread pool size, as in the scripts (default: 5)", metavar="")
+    parser.add_argument("--concurrency", type=int, help="asyncio sessions in flight (default: same as --workers)", metavar="")
+    parser.add_argument("--client", default="raw", choices=CLIENTS, help="Session client of every strategy: raw or netmiko (default: raw)", metavar="")
+    parser.add_argument("--json", help="Also save the options and results to this JSON file", metavar="")
+    parser.add_argument("--child", nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        strategy, inventory, workdir, limit, client_name = args.child
+        run_child(strategy, inventory, workdir, int(limit), client_name)
+        sys.exit(0)
+
+    strategies = [name.strip() for name in args.strategies.split(",") if name.strip()]
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(sorted(unknown))}")
+    if args.client == "netmiko" and "asyncio" in strategies:
+        if args.strategies != parser.get_default("strategies"):
+            parser.error("the asyncio strategy has no Netmiko client: use --client raw")
+        strategies.remove("asyncio")
+    concurrency = args.concurrency or args.workers
+
+    from fake_telnet_server import FakeDeviceFarm
+
+    farm = FakeDeviceFarm(args.devices, latency=args.latency, output_lines=args.output_lines,
+                          failure_rate=args.failure_rate, seed=args.seed).start()
+    rows = list(farm.inventory())
+    reports = []
+
+    held = [f"client {args.client}"]
+    if concurrency == args.workers:
+        held.append(f"limit {args.workers} (sequential: 1)")
+    print(f"Held constant: {', '.join(held)}; devices, latency, output and failures from the same farm")
+    print(f"{'Strategy':<18} {'Limit':>5} {'OK':>11} {'Time':>9} {'Rate':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'Peak RSS':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        inventory = os.path.join(workdir, "devices.csv")
+        with open(inventory, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+        for strategy in strategies:
+            limit = concurrency if strategy == "asyncio" else 1 if strategy == "sequential" else args.workers
+            output_dir = tempfile.mkdtemp(dir=workdir)
+            child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", strategy, inventory, output_dir, str(limit),
+                                    args.client],
+                                   capture_output=True, text=True, check=True)
+            report = json.loads(child.stdout.strip().splitlines()[-1])
+            reports.append(report)
+            print(f"{strategy:<18} {limit:>5} {report['ok']:>5}/{report['devices']:<5} {report['seconds']:>8.2f}s "
+                  f"{report['throughput']:>8.1f}/s {report['p50']:>7.2f}s {report['p95']:>7.2f}s {report['p99']:>7.2f}s "
+                  f"{report['peak_rss_mb']:>7.1f} MB")
+
+    farm.stop()
+
+    if args.json:
+        options = {name: value for name, value in vars(args).items() if name not in ("child", "json")}
+        with open(args.json, "w") as file:
+            json.dump({"options": options, "cpu_count": os.cpu_count(), "results": reports}, file, indent=2)
+        print(f"\n📝 Results saved to {args.json}")
@@ -0,0 +1,78 @@
+# Memory Benchmark: Streaming vs. Buffered Capture of Large Outputs
+
+# Introduction
+# - Starts one fake device whose show output is very large (like 'show ip bgp' on route-views).
+# - Backs it up twice, each time in a fresh child process, and prints the peak memory (RSS)
+#   of that process:
+#     buffered → the whole output is held in one string, then written with file.write(output)
+#     stream   → chunks are written to the file as they arrive
+# - The fake device runs in this (parent) process, so it does not count towards the numbers.
+#
+# Note: peak RSS comes from resource.getrusage, which is available on Linux and macOS only.
+#
+# Usage:
+#   python benchmark_streaming_memory.py --output-lines 1000000 --engine asyncio
+
+# Step 1: Import Required Modules
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from fake_telnet_server import FakeDeviceFarm
+from network_devices import build_devices
+
+
+# Step 2: Child Process - Back Up One Device and Report Peak RSS
+def run_child(mode, engine, host, port, workdir):
+    os.chdir(workdir)
+    device = build_devices([{
+        "hostname": "sim-cisco-00000", "username": "rviews", "password": "rviews",
+        "device_type": "cisco_ios_telnet", "host": host, "port": port,
+    }])[0]
+    stream = mode == "stream"
+
+    start = time.perf_counter()
+    if engine == "asyncio":
+        result = asyncio.run(device.backup_config_async(timeout=120, stream=stream))
+    else:
+        result = device.backup_config(stream=stream)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    if not result.ok:
+        sys.exit(f"❌ {mode} backup failed: {result}")  # Non-zero exit: the parent's check=True stops the benchmark
+    size_mb = os.path.getsize(result.path) / 1024 / 1024
+    print(f"{mode:<10} {engine:<9} {size_mb:>10.1f} MB {peak_mb:>10.1f} MB {elapsed:>8.2f}s")
+
+
+# Step 3: Parent Process - Start the Fake Device and Run Both Modes
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare peak memory of streaming and buffered capture")
+    parser.add_argument("--output-lines", type=int, default=500000, help="Lines of show output (default: 500000)", metavar="")
+    parser.add_argument("--engine", choices=["asyncio", "netmiko"], default="asyncio", help="Session type (default: asyncio)", metavar="")
+    parser.add_argument("--child", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, host, port, workdir = args.child
+        run_child(mode, args.engine, host, int(port), workdir)
+        sys.exit(0)
+
+    farm = FakeDeviceFarm(1, output_lines=args.output_lines, juniper_every=0).start()
+    row = next(farm.inventory())
+
+    print(f"{'Mode':<10} {'Engine':<9} {'Output':>13} {'Peak RSS':>13} {'Time':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in ("buffered", "stream"):
+            subprocess.run([
+                sys.executable, os.path.abspath(__file__), "--engine", args.engine,
+                "--child", mode, row["host"], str(row["port"]), workdir,
+            ], check=True)
+
+    farm.stop()
@@ -0,0 +1,77 @@
+# Benchmark: Parsing 'show version' Outputs in One Process vs. All CPU Cores
+
+# Introduction
+# - Writes --outputs synthetic 'show version' files (default 100,000) into a temporary directory:
+#   the IOS, Junos, IOS-XR and NX-OS outputs of fake_telnet_server.py with a different hostname and
+#   serial number each, plus the real IOS-XE and FRRouting outputs saved by oop_version_collector.py.
+# - Parses all of them with version_parser.parse_files() in one process, then in --workers processes,
+#   and checks that both give the same rows.
+# - Prints outputs parsed per second, and the time to write the columnar inventory (--out).
+#
+# Usage:
+#   python benchmark_version_parser.py --outputs 100000
+#   python benchmark_version_parser.py --outputs 100000 --workers 8 --out inventory.parquet
+
+# Step 1: Import Required Modules
+import argparse
+import glob
+import os
+import tempfile
+import time
+from fake_telnet_server import VERSION
+from version_parser import parse_files, write_inventory
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "oop_version_collector", "*_show_version_*.txt")
+
+
+# Step 2: Write the Synthetic Outputs
+def write_outputs(directory, count):
+    templates = [(platform, template) for platform, template in VERSION.items()]
+    for path in sorted(glob.glob(SAMPLES)):
+        with open(path) as file:
+            templates.append(("sample", file.read()))
+    paths = []
+    for i in range(count):
+        platform, template = templates[i % len(templates)]
+        hostname = f"sim-{platform}-{i:06d}"
+        output = template.format(hostname=hostname, serial=f"FOC{i:08d}") if platform != "sample" else template
+        path = os.path.join(directory, f"{hostname}_show_version_2025-06-27_01-53-00.txt")
+        with open(path, "w") as file:
+            file.write(output)
+        paths.append(path)
+    return paths
+
+
+# Step 3: Time One Run
+def measure(name, paths, workers):
+    start = time.perf_counter()
+    rows = parse_files(paths, workers)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {workers:>7} {elapsed:>9.2f}s {len(paths) / elapsed:>12,.0f}/s")
+    return rows
+
+
+# Step 4: Run the Benchmark
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse 'show version' outputs in one process and in all CPU cores")
+    parser.add_argument("--outputs", type=int, default=100_000, help="Number of outputs to parse (default: 100000)", metavar="")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parser processes (default: CPU count)", metavar="")
+    parser.add_argument("--out", default="inventory_benchmark.csv", help="Inventory file: .parquet, .feather or .csv (default: inventory_benchmark.csv)", metavar="")
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        paths = write_outputs(workdir, args.outputs)
+        print(f"📝 {len(paths)} outputs written in {time.perf_counter() - start:.2f}s\n")
+
+        print(f"{'Mode':<24} {'Workers':>7} {'Time':>10} {'Rate':>13}")
+        sequential = measure("one process", paths, 1)
+        parallel = measure("process pool", paths, args.workers)
+        if sequential != parallel:
+            print("⚠️ The process pool returned different rows than one process")
+
+    start = time.perf_counter()
+    frame = write_inventory(parallel, args.out)
+    print(f"\n📋 Inventory of {len(frame)} rows written to {args.out} in {time.perf_counter() - start:.2f}s")
+    print(f"⚠️ Not recognised: {frame['os'].isna().sum()}")
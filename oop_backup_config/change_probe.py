@@ -0,0 +1,104 @@
+# Cheap Change Probe: Skip the Full Backup of Devices that Did Not Change
+
+# Introduction
+# - Most devices did not change since the last run, yet every run pulls the full output again.
+# - With a probe, every backup first runs one small vendor-specific command that changes whenever
+#   the configuration changes (probe_command in the vendor classes):
+#     Cisco IOS    → show running-config | include Last configuration change   (timestamp)
+#     Junos        → show system commit | match "^0 "                          (last commit)
+#     Cisco IOS-XR → show configuration commit list 1                          (last commit id)
+#     Cisco NX-OS  → show accounting log last-index                            (change counter)
+# - A hash of the probe output is compared with the one saved after the last full backup. Only when
+#   it differs (or there is no usable last backup) the full command runs.
+# - The state is a JSON file, like the circuit breaker: per host the probe hash, the last backup,
+#   its size and how long the full pull took. That is also how the saved time is estimated.
+# - The probe only says whether the configuration changed, so it is only used when the backup command
+#   prints the configuration (config_command = True in the vendor class). The vendor classes of this
+#   directory back up 'show version' / 'show bgp summary', which change without a commit (uptime,
+#   counters), so they are always backed up in full. For configuration backups, use the "_config"
+#   device types in the inventory (cisco_ios_telnet_config, juniper_junos_telnet_config, cisco_xr_config,
+#   cisco_nxos_config): they pull 'show running-config' / 'show configuration' and are probed.
+# - A device without a probe_command, or with an empty / rejected probe output, is always backed up.
+#
+# Usage (in a runner):
+#   probe = ChangeProbe("probe_state.json")
+#   result = device.backup_config(probe=probe)
+#   probe.save()
+#   print(probe.summary())
+
+# Step 1: Import Required Modules
+import hashlib
+import json
+import os
+import threading
+import time
+
+REJECTED = ("% Invalid", "syntax error", "% Incomplete", "% Ambiguous")
+
+
+# Step 2: Define the ChangeProbe Class
+class ChangeProbe:
+    def __init__(self, path="probe_state.json"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.hosts = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                self.hosts = json.load(file)
+        self.probed = 0
+        self.avoided = 0
+        self.probe_seconds = 0.0    # Time spent running probes
+        self.saved_seconds = 0.0    # Full pulls avoided, at the duration of their last full pull
+        self.saved_bytes = 0
+
+    def fingerprint(self, output):
+        # None when the probe says nothing (empty or rejected): the backup must run
+        text = "\n".join(line.strip() for line in output.splitlines() if line.strip())
+        if not text or any(marker in text for marker in REJECTED):
+            return None
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def unchanged(self, hostname, fingerprint, seconds, check_file=True):
+        # True when the last full backup of 'hostname' is still current; 'seconds' is what the probe cost
+        with self.lock:
+            self.probed += 1
+            self.probe_seconds += seconds
+            entry = self.hosts.get(hostname)
+            if fingerprint is None or entry is None or entry["probe"] != fingerprint:
+                return False
+            if check_file and not os.path.exists(entry["path"]):
+                return False  # Last backup file was moved or deleted
+            self.avoided += 1
+            self.saved_seconds += entry["pull_seconds"]
+            self.saved_bytes += entry["bytes"]
+            return True
+
+    def last_backup(self, hostname):
+        return self.hosts[hostname]["path"]
+
+    def update(self, hostname, fingerprint, path, size, pull_seconds):
+        # Called after a successful full backup
+        if fingerprint is None:
+            return
+        with self.lock:
+            self.hosts[hostname] = {"probe": fingerprint, "path": path, "bytes": size,
+                                    "pull_seconds": round(pull_seconds, 3), "time": time.time()}
+
+    def save(self):
+        # Write to a temporary file first, so a crash never leaves a broken state file
+        with self.lock:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as file:
+                json.dump(self.hosts, file, indent=2)
+            os.replace(temp_path, self.path)
+
+    def summary(self):
+        saved = self.saved_seconds - self.probe_seconds
+        return "\n".join([
+            f"🔍 Change probe: {self.probed} devices probed, {self.avoided} full pulls avoided "
+            f"({self.saved_bytes / 1024 / 1024:.1f} MB not transferred)",
+            f"⏱️ Device time saved: ~{saved:.1f} seconds ({self.saved_seconds:.1f}s of full pulls avoided, "
+            f"{self.probe_seconds:.1f}s spent on probes)",
+        ] + ([] if self.probed else [
+            "   No device was probed: only configuration backups (\"_config\" device types) use the probe",
+        ]))
@@ -0,0 +1,153 @@
+# Checkpoint Journal: Resume an Interrupted Backup Run Where it Stopped
+
+# Introduction
+# - A 10k-device run that crashes, is killed or loses the jump host halfway starts again from the first
+#   row of devices.csv, and backs up every device that was already done a second time.
+# - RunJournal writes one line per finished device to journals/<run id>.jsonl (append-only JSON lines):
+#     {"host": "route-views.routeviews.org", "status": "ok", "time": 1751000000.0, "result": "..."}
+# - Workers never wait for the disk: record() only puts the line on a queue. One writer thread takes
+#   everything that is queued, writes it in one go and calls fsync once per batch (group commit),
+#   at most every 'flush_interval' seconds, so 10k devices cost a few hundred fsyncs, not 10k.
+# - --resume with the same run id skips every device whose backup is already in the journal.
+#   Failed devices are tried again. A line cut off by a crash is ignored when the journal is read.
+# - Without a run id, the start time is used; two runs started in the same second (or on a shared
+#   journal directory) get a -2, -3, ... suffix instead of failing.
+#
+# Usage (in a runner):
+#   journal = RunJournal("journals", run_id="nightly-2025-06-27", resume=True)
+#   devices = journal.pending(iter_devices("devices.csv"))   # Skips devices done before the crash
+#   journal.record(device.hostname, device.backup_config())
+#   journal.close()
+#   print(journal.summary())
+
+# Step 1: Import Required Modules
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+STOP = object()  # Tells the writer thread to flush and exit
+
+
+# Step 2: Journal Status of a BackupResult (result_records.py)
+def result_status(result):
+    # 'unchanged' (change probe) counts as backed up, so --resume skips the device
+    return "ok" if result.ok else result.status
+
+
+# Step 3: Define the RunJournal Class
+class RunJournal:
+    def __init__(self, directory="journals", run_id=None, resume=False, flush_interval=0.5, batch_size=1000):
+        os.makedirs(directory, exist_ok=True)
+        if run_id is None and resume:
+            run_id = latest_run_id(directory)
+            if run_id is None:
+                raise FileNotFoundError(f"No journal to resume in {directory}")
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.completed = set()   # Hosts backed up in an earlier attempt of this run
+        self.resumed = 0         # Devices skipped because they are in 'completed'
+        self.recorded = 0
+        self.fsyncs = 0
+        if resume:
+            self.run_id = run_id
+            self.path = os.path.join(directory, f"{run_id}.jsonl")
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(f"No journal for run {self.run_id}: {self.path}")
+            self.completed = {host for host, status in read_journal(self.path).items() if status == "ok"}
+            self.file = open(self.path, "a", encoding="utf-8")
+        else:
+            self.file = self._create(directory, run_id)
+        self.queue = queue.SimpleQueue()
+        self.record_event("resumed" if resume else "started")
+        self.thread = threading.Thread(target=self._writer, name="journal-writer", daemon=True)
+        self.thread.start()
+
+    def _create(self, directory, run_id):
+        # Exclusive create, so two runs can never append to the same journal
+        base = run_id or datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        for attempt in range(1, 1000):
+            self.run_id = base if attempt == 1 else f"{base}-{attempt}"
+            self.path = os.path.join(directory, f"{self.run_id}.jsonl")
+            try:
+                return open(self.path, "x", encoding="utf-8")
+            except FileExistsError:
+                if run_id is not None:
+                    raise FileExistsError(f"Run {run_id} already has a journal, use --resume to continue it") from None
+        raise FileExistsError(f"No free run id for {base} in {directory}")
+
+    def pending(self, devices):
+        # Lazily drop the devices that were already backed up (works with iter_devices)
+        for device in devices:
+            if device.hostname in self.completed:
+                self.resumed += 1
+                continue
+            yield device
+
+    def record(self, hostname, result):
+        # Called from worker threads or the event loop: no lock, no disk access
+        self.queue.put({"host": hostname, "status": result_status(result), "time": round(time.time(), 3),
+                        "result": str(result)[-300:]})
+
+    def record_event(self, event):
+        self.queue.put({"event": event, "run_id": self.run_id, "time": round(time.time(), 3)})
+
+    def _writer(self):
+        while True:
+            batch = [self.queue.get()]  # Wait for the first line
+            deadline = time.monotonic() + self.flush_interval
+            # Collect everything else that arrives within flush_interval, then write it in one go
+            while batch[-1] is not STOP and len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is STOP
+            lines = [entry for entry in batch if entry is not STOP]
+            if lines:
+                self.file.write("".join(json.dumps(entry) + "\n" for entry in lines))
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.fsyncs += 1
+                self.recorded += sum("host" in entry for entry in lines)
+            if stop:
+                return
+
+    def close(self):
+        self.record_event("finished")
+        self.queue.put(STOP)
+        self.thread.join()
+        self.file.close()
+
+    def summary(self):
+        lines = [f"📓 Journal {self.path} (run id {self.run_id}): {self.recorded} devices recorded, {self.fsyncs} fsyncs"]
+        if self.completed:
+            lines.append(f"⏭️ Already backed up before resume: {self.resumed}")
+        return "\n".join(lines)
+
+
+# Step 4: Read a Journal (last status per host)
+def read_journal(path):
+    statuses = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Last line cut off by a crash or kill -9
+            if "host" in entry and entry["status"] != "not_reached":
+                statuses[entry["host"]] = entry["status"]
+    return statuses
+
+
+def latest_run_id(directory):
+    journals = [name for name in os.listdir(directory) if name.endswith(".jsonl")]
+    if not journals:
+        return None
+    latest = max(journals, key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+    return latest[: -len(".jsonl")]
@@ -0,0 +1,187 @@
+# Retry with Backoff and a Persistent Per-Host Circuit Breaker
+
+# Introduction
+# - A dead device holds a worker for the full Netmiko timeout, and the next run tries it again the same way.
+# - Retry: a failed backup is retried a few times, waiting base x 2^attempt seconds with random jitter
+#   (so many workers don't retry the same device or AAA server at the same moment).
+#   A rejected login is not retried: the same credentials fail again, and every attempt counts
+#   against the AAA server's lockout threshold.
+# - Circuit breaker, per host, saved to a JSON file between runs:
+#     closed    → back up normally
+#     open      → the host failed the last N runs: skip it until its cool-down expires
+#     half-open → cool-down expired: try a cheap TCP probe first, only then the full backup
+#   Every time a half-open host fails again, its cool-down doubles (up to a maximum).
+# - A retry is a new login: with a RateLimiter (rate_limits.py) it waits for a token like the first try.
+#
+# Usage (in a runner):
+#   breaker = CircuitBreaker("breaker_state.json", failure_threshold=3, cooldown=3600)
+#   result = breaker.call(device, device.backup_config)            # or breaker.call(device, backup, limiter)
+#   breaker.save()
+#   print(breaker.summary())
+
+# Step 1: Import Required Modules
+import asyncio
+import json
+import os
+import random
+import socket
+import threading
+import time
+from result_records import BackupResult
+
+
+# Error classes of a rejected login (Netmiko, and AsyncTelnetSession.login in network_devices.py)
+AUTH_ERRORS = {"NetmikoAuthenticationException", "NetMikoAuthenticationException", "PermissionError"}
+
+
+# Step 2: Retry with Exponential Backoff and Full Jitter
+def backoff_delay(attempt, base_delay=1.0, max_delay=30.0):
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def is_final(result):
+    # Don't retry a success, a device that was stopped by the run deadline, or wrong credentials
+    return result.ok or result.status == "not_reached" or result.error_class in AUTH_ERRORS
+
+
+# 'before_retry' is called before every attempt after the first, e.g. to take a login token
+def retry(backup, attempts=3, base_delay=1.0, max_delay=30.0, before_retry=None):
+    for attempt in range(attempts):
+        result = backup()
+        if is_final(result) or attempt == attempts - 1:
+            return result
+        time.sleep(backoff_delay(attempt, base_delay, max_delay))
+        if before_retry:
+            before_retry()
+
+
+async def retry_async(backup, attempts=3, base_delay=1.0, max_delay=30.0, before_retry=None):
+    for attempt in range(attempts):
+        result = await backup()
+        if is_final(result) or attempt == attempts - 1:
+            return result
+        await asyncio.sleep(backoff_delay(attempt, base_delay, max_delay))
+        if before_retry:
+            await before_retry()
+
+
+# Step 3: Cheap Reachability Probe (TCP connect only, no login)
+def probe(host, port, timeout=3.0):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+async def probe_async(host, port, timeout=3.0):
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.close()
+        return True
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+
+# Step 4: Define the CircuitBreaker Class
+class CircuitBreaker:
+    def __init__(self, path="breaker_state.json", failure_threshold=3, cooldown=3600, max_cooldown=86400,
+                 attempts=3, base_delay=1.0, probe_timeout=3.0):
+        self.path = path
+        self.failure_threshold = failure_threshold  # Consecutive failed runs before a host is skipped
+        self.cooldown = cooldown                    # Seconds to skip an open host (doubles per failed retry)
+        self.max_cooldown = max_cooldown
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.probe_timeout = probe_timeout
+        self.lock = threading.Lock()
+        self.skipped = []
+        self.probed = 0
+        self.hosts = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                self.hosts = json.load(file)
+
+    def state(self, hostname):
+        entry = self.hosts.get(hostname)
+        if entry is None or entry["failures"] < self.failure_threshold:
+            return "closed"
+        if time.time() < entry["open_until"]:
+            return "open"
+        return "half-open"
+
+    def record(self, hostname, ok, error=""):
+        with self.lock:
+            if ok:
+                self.hosts.pop(hostname, None)
+                return
+            entry = self.hosts.setdefault(hostname, {"failures": 0, "open_until": 0, "cooldown": self.cooldown})
+            was_open = entry["failures"] >= self.failure_threshold
+            entry["failures"] += 1
+            entry["last_error"] = error[-200:]
+            if entry["failures"] >= self.failure_threshold:
+                if was_open:
+                    entry["cooldown"] = min(self.max_cooldown, entry["cooldown"] * 2)
+                entry["open_until"] = time.time() + entry["cooldown"]
+
+    def _skip(self, device, reason):
+        with self.lock:
+            self.skipped.append(device.hostname)
+        return BackupResult(device.hostname, device.vendor, "skipped", f"{device.vendor}: Skipped {device.hostname}: {reason}",
+                            error_class="CircuitOpen")
+
+    def _open_reason(self, device):
+        until = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.hosts[device.hostname]["open_until"]))
+        return f"circuit open until {until}"
+
+    def call(self, device, backup, limiter=None):
+        # 'backup' is a function returning a BackupResult, e.g. device.backup_config;
+        # 'limiter' (rate_limits.RateLimiter) gives every retry a login token
+        state = self.state(device.hostname)
+        if state == "open":
+            return self._skip(device, self._open_reason(device))
+        if state == "half-open":
+            with self.lock:
+                self.probed += 1
+            if not probe(device.host, device.port, self.probe_timeout):
+                self.record(device.hostname, False, "probe failed")
+                return self._skip(device, "probe failed, circuit re-opened")
+
+        before_retry = (lambda: limiter.acquire(device)) if limiter else None
+        result = retry(backup, self.attempts, self.base_delay, before_retry=before_retry)
+        if result.status != "not_reached":
+            self.record(device.hostname, result.ok, str(result))
+        return result
+
+    async def call_async(self, device, backup, limiter=None):
+        # Same as call(), 'backup' is a coroutine function, e.g. device.backup_config_async
+        state = self.state(device.hostname)
+        if state == "open":
+            return self._skip(device, self._open_reason(device))
+        if state == "half-open":
+            self.probed += 1
+            if not await probe_async(device.host, device.port, self.probe_timeout):
+                self.record(device.hostname, False, "probe failed")
+                return self._skip(device, "probe failed, circuit re-opened")
+
+        before_retry = (lambda: limiter.acquire_async(device)) if limiter else None
+        result = await retry_async(backup, self.attempts, self.base_delay, before_retry=before_retry)
+        if result.status != "not_reached":
+            self.record(device.hostname, result.ok, str(result))
+        return result
+
+    def save(self):
+        # Write to a temporary file first, so a crash never leaves a broken state file
+        with self.lock:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as file:
+                json.dump(self.hosts, file, indent=2)
+            os.replace(temp_path, self.path)
+
+    def summary(self):
+        states = [self.state(hostname) for hostname in self.hosts]
+        return "\n".join([
+            f"🔌 Circuit breaker: {states.count('open')} open, {states.count('half-open')} half-open, "
+            f"{len(self.hosts) - states.count('open') - states.count('half-open')} failing but still closed",
+            f"⏭️ Skipped hosts this run: {len(self.skipped)} (half-open probes: {self.probed})",
+        ])
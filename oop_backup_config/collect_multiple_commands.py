@@ -0,0 +1,125 @@
+# Run Several Show Commands per Device in a Single Session
+
+# Introduction
+# - Telnet login and prompt discovery take most of the time of a backup.
+# - Instead of one login per command, each device is logged into once and all commands run
+#   in that session (run_commands in network_devices.py).
+# - Every command output is saved to its own file (in the --layout directory, indexed by host and
+#   command, see backup_layout.py) and the wall time per device is printed.
+# - With --compare, the same commands are also run one login per command to show the saving
+#   (with --rate-limit, each of those logins waits for a token too).
+#
+# Usage:
+#   python collect_multiple_commands.py --commands "show version" "show ip bgp summary" --compare
+#   python collect_multiple_commands.py --rate-limit global:10 --rate-limit site=*:2
+#   (phase timings of the run are saved to phase_timings_run_commands.json / .prom)
+
+# Step 1: Import Required Modules
+import argparse
+import time  # For measuring execution time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from backup_layout import BackupLayout, command_slug
+from backup_store import TIMESTAMP_FORMAT
+from network_devices import build_devices
+from phase_timing import PhaseHistograms
+from rate_limits import RateLimiter, parse_rule
+
+metrics = PhaseHistograms()
+
+
+# Step 2: Collect All Commands from One Device
+def collect(device, commands, compare=False, layout=None, limiter=None):
+    try:
+        results, elapsed = device.run_commands(commands)
+    except Exception as e:
+        metrics.observe("run_commands", device.vendor, device.timings)
+        return f"{device.vendor}: Failed to collect from {device.hostname}: {e}", None
+
+    write_start = time.perf_counter()
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)  # One timestamp for all outputs of the session
+    if layout is not None:
+        for command, output in results.items():
+            layout.save(device.hostname, command, output, timestamp)
+    else:
+        # Same file names as the layout ('show system commit | match x' → show_system_commit_match_x),
+        # so 'python backup_layout.py import' can move them in later
+        for command, output in results.items():
+            filename = f"{device.hostname}_{command_slug(command)}_{timestamp}.txt"
+            with open(filename, "w") as file:
+                file.write(output)
+    device.timings["write"] = time.perf_counter() - write_start
+    metrics.observe("run_commands", device.vendor, device.timings)
+
+    message = f"{device.vendor}: {device.hostname} {len(results)} commands in one session: {elapsed:.2f}s"
+    if compare:
+        # Same commands, but a new login for every command (the old behaviour)
+        separate = 0.0
+        try:
+            for command in results:
+                if limiter:
+                    limiter.acquire(device)  # Every extra login counts against the rate limits
+                separate += device.run_commands([command])[1]
+        except Exception as e:
+            # The outputs are saved already: only the comparison is missing
+            message += f" (one session per command failed: {e})"
+        else:
+            message += f" (one session per command: {separate:.2f}s)"
+    return message, elapsed
+
+
+# Step 3: Run the Collection and Print a Summary
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run several commands per device in one session")
+    parser.add_argument("--inventory", default="devices.csv", help="Inventory CSV file (default: devices.csv)", metavar="")
+    parser.add_argument("--commands", nargs="+", help="Commands to run (default: per-vendor list)", metavar="")
+    parser.add_argument("--layout", default="backups", help="Output directory, sharded by host and date (default: backups)", metavar="")
+    parser.add_argument("--workers", type=int, default=5, help="Number of threads (default: 5)", metavar="")
+    parser.add_argument("--compare", action="store_true", help="Also time one session per command")
+    parser.add_argument("--rate-limit", type=parse_rule, action="append", default=[],
+                        help="Login rate: global:RATE, COLUMN=VALUE:RATE or COLUMN=*:RATE, optional :BURST (repeatable)", metavar="")
+    args = parser.parse_args()
+    limiter = RateLimiter(args.rate_limit) if args.rate_limit else None
+    layout = BackupLayout(args.layout)
+
+    df = pd.read_csv(args.inventory, dtype=str, keep_default_na=False)  # Load device data from CSV file
+    devices = build_devices(df.to_dict("records"), tag_columns=limiter.columns if limiter else ())
+
+    start_time = time.time()  # Start timer
+    device_times = []
+
+    def handle(message, elapsed):
+        if elapsed is not None:
+            device_times.append(elapsed)
+        print(message)
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        if limiter:
+            # Every thread takes the next device that may log in now, so a bucket that is out of
+            # tokens never leaves a thread idle while devices behind other buckets could go
+            source = limiter.schedule(devices)
+
+            def work():
+                while (device := source.next()) is not None:
+                    handle(*collect(device, args.commands, args.compare, layout, limiter))
+
+            for future in [executor.submit(work) for _ in range(args.workers)]:
+                future.result()
+        else:
+            futures = [executor.submit(collect, device, args.commands, args.compare, layout) for device in devices]
+            for future in as_completed(futures):
+                handle(*future.result())
+
+    end_time = time.time()  # End timer
+
+    # Print summary
+    print(f"\n✅ Devices collected: {len(device_times)}")
+    print(f"❌ Failed devices: {len(devices) - len(device_times)}")
+    if device_times:
+        print(f"⏱️ Average wall time per device: {sum(device_times) / len(device_times):.2f} seconds")
+    print(f"⏱️ Total execution time: {end_time - start_time:.2f} seconds")
+    if limiter:
+        print(limiter.summary())
+    print(metrics.summary())
+    print(f"📝 Phase timings saved to {', '.join(metrics.export('phase_timings_run_commands'))}")
@@ -0,0 +1,308 @@
+# Long-Running Collection Daemon with Per-Device Schedules and Jitter
+
+# Introduction
+# - oop_version_collector.py and the backup scripts are one-shot: cron starts them again every hour,
+#   they import pandas and Netmiko again, and every device is hit in the same second.
+# - This daemon loads the inventory once and keeps running. A priority queue (heapq) holds the next
+#   due time of every device; one asyncio loop sleeps until the next device is due and starts it.
+# - Intervals, most specific first:
+#     1. an 'interval' column in the inventory (seconds, per device)
+#     2. --group-interval COLUMN=VALUE:SECONDS (e.g. device_type=cisco_xr:900 or site=lon:1800)
+#     3. --interval (default for everyone else)
+# - Jitter spreads the load: the first run of each device is placed at a random point of its interval,
+#   and every next run is moved by up to ±--jitter of the interval. Runs are scheduled from the planned
+#   time, not from when the previous run ended, so devices don't drift together.
+# - The inventory file is checked every --reload-interval seconds (or on SIGHUP). Only the differences
+#   are applied: new devices are scheduled, removed devices are dropped, changed rows are updated.
+# - Outputs go into the --layout directory, sharded by host and date with a latest-output index
+#   (backup_layout.py), so months of runs never pile up in one directory. With --retention, old
+#   outputs are pruned and compressed every --retention-interval seconds in a low-priority thread.
+# - Every --status-interval seconds a status line shows runs and failures in that period next to the
+#   expected rate, so a flat load is easy to check, and the phase timings are exported.
+# - Every result is appended to the --results JSONL file as a structured record (result_records.py).
+#
+# Usage:
+#   python collection_daemon.py --inventory devices.csv --interval 3600 --jitter 0.1
+#   python collection_daemon.py --job version --interval 86400 --group-interval device_type=cisco_xr:21600
+#   python collection_daemon.py --interval 3600 --retention 48h,30d,12m
+#   kill -HUP <pid>     # Re-read the inventory now
+
+# Step 1: Import Required Modules
+import argparse
+import asyncio
+import csv
+import heapq
+import os
+import random
+import signal
+import time
+from datetime import datetime
+from backup_layout import BackupLayout
+from network_devices import get_device_class
+from phase_timing import PhaseHistograms
+from result_records import ResultWriter
+from retention import RetentionWorker, parse_policy
+
+
+# Step 2: The Jobs the Daemon Can Run (coroutines returning a BackupResult)
+async def backup_config(device, layout):
+    return await device.backup_config_async(store=layout)
+
+
+async def collect_version_info(device, layout):
+    # Same output as oop_version_collector.py, written through the layout
+    try:
+        results, _ = await device.run_commands_async(["show version"])
+    except Exception as e:
+        return device._result("failed", f"{device.vendor}: Failed to collect from {device.hostname}: {e!r}",
+                              error_class=type(e).__name__)
+    output = results["show version"]
+    filename = await asyncio.to_thread(layout.save_output, device.hostname, "show version", output)
+    return device._result("ok", f"{device.vendor}: {device.hostname} 'show version' saved to {filename}",
+                          path=filename, bytes=len(output))
+
+
+JOBS = {"backup": backup_config, "version": collect_version_info}
+
+
+# Step 3: Read the Inventory (one dict per hostname, all columns kept for the interval rules)
+def read_inventory(path):
+    with open(path, newline="") as file:
+        return {row["hostname"]: row for row in csv.DictReader(file) if row.get("hostname")}
+
+
+def parse_group_interval(text):
+    # "device_type=cisco_xr:900" → ("device_type", "cisco_xr", 900.0)
+    rule, _, seconds = text.rpartition(":")
+    column, _, value = rule.partition("=")
+    if not column or not value:
+        raise argparse.ArgumentTypeError(f"expected COLUMN=VALUE:SECONDS, got {text!r}")
+    return column, value, float(seconds)
+
+
+# Step 4: Define the Scheduler
+class Scheduler:
+    def __init__(self, path, job, interval=3600, jitter=0.1, group_intervals=(), concurrency=50, on_result=print,
+                 layout=None):
+        self.path = path
+        self.job = job
+        self.layout = layout or BackupLayout()
+        self.interval = interval
+        self.jitter = jitter
+        self.group_intervals = list(group_intervals)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.on_result = on_result
+        self.rows = {}       # hostname → inventory row
+        self.entries = {}    # hostname → [device, interval, generation (None while running), due time]
+        self.heap = []       # (due time, generation, hostname); entries with an old generation are stale
+        self.generation = 0
+        self.running = set()
+        self.tasks = set()   # Keeps a reference to every run in flight
+        self.wakeup = asyncio.Event()
+        self.mtime = None
+        self.runs = self.failures = 0
+        self.metrics = PhaseHistograms()
+
+    def interval_for(self, row):
+        if row.get("interval"):
+            return float(row["interval"])
+        for column, value, seconds in self.group_intervals:
+            if row.get(column) == value:
+                return seconds
+        return self.interval
+
+    def _schedule(self, hostname, due):
+        entry = self.entries[hostname]
+        self.generation += 1
+        entry[2], entry[3] = self.generation, due
+        heapq.heappush(self.heap, (due, self.generation, hostname))
+
+    def _build(self, row):
+        device_class = get_device_class(row["device_type"])
+        if device_class is None:
+            print(f"Skipping unknown device type: {row['device_type']}")
+            return None
+        port = int(row["port"]) if row.get("port") else None
+        return device_class(hostname=row["hostname"], username=row["username"], password=row["password"],
+                            host=row.get("host") or None, port=port)
+
+    def reload(self):
+        # Apply only the differences between the inventory file and what is scheduled
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.mtime:
+            return None
+        self.mtime = mtime
+        rows = read_inventory(self.path)
+        now = time.time()
+        added = removed = changed = 0
+        for hostname in self.rows.keys() - rows.keys():
+            self.entries.pop(hostname, None)  # Its heap entry becomes stale and is skipped
+            removed += 1
+        for hostname, row in rows.items():
+            if self.rows.get(hostname) == row:
+                continue
+            device = self._build(row)
+            if device is None:
+                continue
+            interval = self.interval_for(row)
+            old = self.entries.get(hostname)
+            self.entries[hostname] = [device, interval, None, None]
+            if old is None:
+                self._schedule(hostname, now + random.uniform(0, interval))  # First run: anywhere in the interval
+                added += 1
+                continue
+            changed += 1
+            if old[2] is None:
+                self.entries[hostname][3] = old[3]  # Running now: _run() schedules it with the new interval
+            elif interval < old[1]:
+                self._schedule(hostname, min(old[3], now + random.uniform(0, interval)))
+            else:
+                self._schedule(hostname, old[3])  # Keep the planned time
+        self.rows = {hostname: row for hostname, row in rows.items() if hostname in self.entries}
+        self.wakeup.set()
+        return added, removed, changed
+
+    def expected_per_minute(self):
+        return sum(60 / entry[1] for entry in self.entries.values())
+
+    async def _run(self, hostname, device, due):
+        try:
+            result = await self.job(device, self.layout)
+        except Exception as e:
+            result = device._result("failed", f"{device.vendor}: Failed {device.hostname}: {e!r}", error_class=type(e).__name__)
+        finally:
+            self.running.discard(hostname)
+            self.semaphore.release()
+        self.runs += 1
+        self.failures += not result.ok
+        self.metrics.observe(self.job.__name__, device.vendor, device.timings)
+        if self.on_result:
+            self.on_result(result)
+        entry = self.entries.get(hostname)
+        if entry is not None and entry[2] is None:
+            # Next run one interval after the planned time (not after the end of this run), ± jitter;
+            # a device that is far behind is moved to now instead of running several times in a row.
+            # entry[1] is the current interval, it may have changed in the inventory during this run.
+            delay = entry[1] * (1 + random.uniform(-self.jitter, self.jitter))
+            self._schedule(hostname, max(due + delay, time.time()))
+            self.wakeup.set()
+
+    async def dispatch(self):
+        while True:
+            while self.heap and self.heap[0][1] != self.entries.get(self.heap[0][2], (None, None, None, None))[2]:
+                heapq.heappop(self.heap)  # Removed or rescheduled device
+            delay = self.heap[0][0] - time.time() if self.heap else 60
+            if delay > 0:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            due, _, hostname = heapq.heappop(self.heap)
+            entry = self.entries[hostname]
+            entry[2] = None  # Not in the heap while it runs
+            await self.semaphore.acquire()
+            if self.entries.get(hostname) is not entry:
+                # Removed or changed in the inventory while waiting for a free session
+                self.semaphore.release()
+                if hostname in self.entries:
+                    self._schedule(hostname, due)
+                continue
+            self.running.add(hostname)
+            task = asyncio.create_task(self._run(hostname, entry[0], due))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+
+# Step 5: Main Loop - Dispatcher, Inventory Reload and Status Line
+async def main(args):
+    writer = ResultWriter(args.results)
+
+    def on_result(result):
+        writer.write(result)
+        if args.verbose:
+            print(result)
+
+    scheduler = Scheduler(args.inventory, JOBS[args.job], interval=args.interval, jitter=args.jitter,
+                          group_intervals=args.group_interval, concurrency=args.concurrency,
+                          on_result=on_result, layout=BackupLayout(args.layout))
+    added, _, _ = scheduler.reload()
+    print(f"📋 {added} devices scheduled, {scheduler.expected_per_minute():.1f} runs/minute expected")
+
+    loop = asyncio.get_running_loop()
+    reload_now = asyncio.Event()
+    stop = asyncio.Event()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, reload_now.set)
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+    except (AttributeError, NotImplementedError):
+        pass  # No signal handlers on Windows: the periodic reload still works
+
+    async def reloader():
+        while True:
+            try:
+                await asyncio.wait_for(reload_now.wait(), args.reload_interval)
+            except asyncio.TimeoutError:
+                pass
+            reload_now.clear()
+            try:
+                changes = scheduler.reload()
+            except (OSError, KeyError, ValueError) as e:
+                print(f"⚠️ Inventory not reloaded: {e}")  # Keep the current schedule (e.g. file being rewritten)
+                continue
+            if changes:
+                print(f"🔄 Inventory reloaded: {changes[0]} added, {changes[1]} removed, {changes[2]} changed")
+
+    async def status():
+        while True:
+            await asyncio.sleep(args.status_interval)
+            minutes = args.status_interval / 60
+            print(f"{datetime.now():%H:%M:%S} ⏱️ {scheduler.runs} runs ({scheduler.runs / minutes:.1f}/min, expected "
+                  f"{scheduler.expected_per_minute():.1f}/min), ❌ {scheduler.failures} failed, "
+                  f"{len(scheduler.running)} in flight, {len(scheduler.entries)} devices")
+            scheduler.runs = scheduler.failures = 0
+            scheduler.metrics.export(args.metrics)
+
+    retention = None
+    if args.retention:
+        retention = RetentionWorker(scheduler.layout.root, args.retention, interval=args.retention_interval).start()
+
+    tasks = [asyncio.create_task(coroutine) for coroutine in (scheduler.dispatch(), reloader(), status())]
+    try:
+        await asyncio.wait_for(stop.wait(), args.run_for)
+    except asyncio.TimeoutError:
+        pass
+    for task in tasks:
+        task.cancel()
+    writer.close()
+    print(scheduler.metrics.summary())
+    print(f"📝 Results saved to {writer.path}")
+    if retention:
+        retention.stop()
+        print(retention.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect from devices on a schedule, spread over the interval")
+    parser.add_argument("--inventory", default="devices.csv", help="Inventory CSV file (default: devices.csv)", metavar="")
+    parser.add_argument("--job", default="backup", choices=sorted(JOBS), help="What to collect: backup or version (default: backup)", metavar="")
+    parser.add_argument("--layout", default="backups", help="Output directory, sharded by host and date (default: backups)", metavar="")
+    parser.add_argument("--results", default="results.jsonl", help="JSONL file, one record per run (default: results.jsonl)", metavar="")
+    parser.add_argument("--retention", type=parse_policy, help="Prune and compress old outputs in the background, e.g. 48h,30d,12m", metavar="")
+    parser.add_argument("--retention-interval", type=float, default=3600, help="Seconds between retention passes (default: 3600)", metavar="")
+    parser.add_argument("--interval", type=float, default=3600, help="Seconds between runs of a device (default: 3600)", metavar="")
+    parser.add_argument("--group-interval", type=parse_group_interval, action="append", default=[],
+                        help="COLUMN=VALUE:SECONDS, e.g. device_type=cisco_xr:900 (repeatable)", metavar="")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Random shift of each run, share of the interval (default: 0.1)", metavar="")
+    parser.add_argument("--concurrency", type=int, default=50, help="Max sessions in flight (default: 50)", metavar="")
+    parser.add_argument("--reload-interval", type=float, default=30, help="Seconds between inventory checks (default: 30)", metavar="")
+    parser.add_argument("--status-interval", type=float, default=60, help="Seconds between status lines (default: 60)", metavar="")
+    parser.add_argument("--metrics", default="phase_timings_daemon", help="Phase timing files, written with each status line (default: phase_timings_daemon)", metavar="")
+    parser.add_argument("--run-for", type=float, help="Stop after this many seconds (default: run until stopped)", metavar="")
+    parser.add_argument("--verbose", action="store_true", help="Print every result")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
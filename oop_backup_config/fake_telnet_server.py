@@ -0,0 +1,560 @@
+# Local Fake Network Devices (Telnet and SSH) for Load Testing the Backup Runners
+
+# Introduction
+# - Starts many fake Cisco IOS / Juniper Junos / Cisco IOS-XR / Cisco NX-OS devices on 127.0.0.1,
+#   one port per device, over Telnet or SSH.
+# - They answer the login, paging and show commands used by the backup scripts and by Netmiko's
+#   session preparation, so Netmiko and the asyncio engine can be tested without touching real routers:
+#     show version, show bgp summary / show ip bgp summary, show ip int brief / show interfaces terse,
+#     show running-config / show configuration (a short configuration that changes with 'config_version')
+# - Paging is on until the client sends 'terminal length 0' (Cisco) or 'set cli screen-length 0' (Junos):
+#   long outputs then stop at --More-- / ---(more)--- until a key is pressed, like a real vty line.
+# - 'latency' is added before every reply, 'bandwidth' (bytes per second, per session) slows down
+#   the output, 'output_lines' controls the size of the show output.
+# - Each device also answers the change probe command of its platform (change_probe.py). The answer
+#   depends on 'config_version': raise it (farm.devices[i].config_version += 1) to simulate a change.
+# - 'failure_rate' makes that share of the devices refuse every session (picked with 'seed',
+#   so the same devices fail in every run).
+# - By default IOS and Junos devices use Telnet, IOS-XR and NX-OS use SSH (like sandbox_cisco_devices.py).
+#   SSH needs the 'asyncssh' package (pip install asyncssh).
+# - Everything runs on one asyncio event loop, so thousands of devices fit on one machine
+#   (the open-file limit is raised to fit, if the hard limit allows it).
+#
+# Usage:
+#   python fake_telnet_server.py --devices 50 --latency 0.2
+#   python fake_telnet_server.py --devices 2000 --platforms ios,junos,xr,nxos --bandwidth 100000
+
+# Step 1: Import Required Modules
+import argparse
+import asyncio
+import random
+import threading
+import zlib
+from functools import partial
+
+try:
+    import asyncssh  # Optional: pip install asyncssh (only needed for SSH devices)
+except ImportError:
+    asyncssh = None
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+# Step 2: Platforms and Canned Command Outputs
+# platform → vendor, hostname prefix, Netmiko device_type per transport, default transport
+PLATFORMS = {
+    "ios": {"vendor": "cisco", "prefix": "cisco", "telnet": "cisco_ios_telnet", "ssh": "cisco_ios", "transport": "telnet"},
+    "junos": {"vendor": "juniper", "prefix": "juniper", "telnet": "juniper_junos_telnet", "ssh": "juniper_junos", "transport": "telnet"},
+    "xr": {"vendor": "cisco", "prefix": "xr", "telnet": "cisco_xr_telnet", "ssh": "cisco_xr", "transport": "ssh"},
+    "nxos": {"vendor": "cisco", "prefix": "nxos", "telnet": "cisco_nxos_telnet", "ssh": "cisco_nxos", "transport": "ssh"},
+}
+
+VERSION = {
+    "ios": """Cisco IOS Software, 7200 Software (C7200-ADVENTERPRISEK9-M), Version 15.2(4)S7, RELEASE SOFTWARE (fc4)
+Technical Support: http://www.cisco.com/techsupport
+ROM: System Bootstrap, Version 12.2(20)S6, RELEASE SOFTWARE (fc1)
+{hostname} uptime is 5 weeks, 2 days, 3 hours, 12 minutes
+System image file is "disk0:c7200-adventerprisek9-mz.152-4.S7.bin"
+cisco 7206VXR (NPE-G2) processor (revision A) with 917504K/65536K bytes of memory.
+Processor board ID {serial}
+Configuration register is 0x2102""",
+    "junos": """Hostname: {hostname}
+Model: mx960
+Junos: 20.4R3-S4.8
+JUNOS OS Kernel 64-bit  [20220615.9c6b4a4_builder_stable_11]
+JUNOS OS runtime [20220615.9c6b4a4_builder_stable_11]
+JUNOS network stack and utilities [20220801.180431_builder_junos_204_r3_s4]
+JUNOS modules [20220801.180431_builder_junos_204_r3_s4]""",
+    "xr": """Cisco IOS XR Software, Version 7.3.2
+Copyright (c) 2013-2021 by Cisco Systems, Inc.
+
+Build Information:
+ Built By     : ingunawa
+ Built On     : Wed Oct 13 20:00:55 PDT 2021
+ Version      : 7.3.2
+ Location     : /opt/cisco/XR/packages/
+
+cisco IOS-XRv 9000 () processor with 20508696K bytes of memory.
+Processor board ID {serial}
+System uptime is 12 days 4 hours 33 minutes""",
+    "nxos": """Cisco Nexus Operating System (NX-OS) Software
+TAC support: http://www.cisco.com/tac
+
+Software
+  BIOS: version
+  NXOS: version 9.3(8)
+  NXOS image file is: bootflash:///nxos.9.3.8.bin
+  NXOS compile time:  8/18/2021 16:00:00 [08/19/2021 00:42:26]
+
+Hardware
+  cisco Nexus9000 C9300v Chassis
+  Intel(R) Xeon(R) CPU E5-2690 v4 @ 2.60GHz with 16409064 kB of memory.
+  Processor Board ID {serial}
+
+  Device name: {hostname}
+  bootflash: 4287040 kB
+Kernel uptime is 12 day(s), 3 hour(s), 20 minute(s), 45 second(s)""",
+}
+
+BGP_SUMMARY = {
+    "ios": """BGP router identifier 192.0.2.1, local AS number 6447
+BGP table version is 1234567, main routing table version 1234567
+945012 network entries using 234562976 bytes of memory
+
+Neighbor        V           AS MsgRcvd MsgSent   TblVer  InQ OutQ Up/Down  State/PfxRcd
+192.0.2.10      4         3356 1203441   10332  1234567    0    0 5w2d       931877""",
+    "junos": """Threading mode: BGP I/O
+Groups: 2 Peers: 3 Down peers: 0
+Table          Tot Paths  Act Paths Suppressed    History Damp State    Pending
+inet.0               945012     931877          0          0          0          0
+Peer                     AS      InPkt     OutPkt    OutQ   Flaps Last Up/Dwn State|#Active/Received/Accepted/Damped...""",
+    "xr": """BGP router identifier 192.0.2.1, local AS number 65000
+BGP generic scan interval 60 secs
+BGP main routing table version 1234567
+
+Neighbor        Spk    AS MsgRcvd MsgSent   TblVer  InQ OutQ  Up/Down  St/PfxRcd
+192.0.2.10        0  3356 1203441   10332  1234567    0    0     5w2d     931877""",
+    "nxos": """BGP summary information for VRF default, address family IPv4 Unicast
+BGP router identifier 192.0.2.1, local AS number 65000
+BGP table version is 1234567, IPv4 Unicast config peers 1, capable peers 1
+
+Neighbor        V    AS MsgRcvd MsgSent   TblVer  InQ OutQ Up/Down  State/PfxRcd
+192.0.2.10      4  3356 1203441   10332  1234567    0    0    5w2d 931877""",
+}
+
+INVALID_INPUT = {
+    "ios": "% Invalid input detected at '^' marker.",
+    "junos": "syntax error, expecting <command>.",
+    "xr": "% Invalid input detected at '^' marker.",
+    "nxos": "% Invalid command at '^' marker.",
+}
+
+VERSION_COMMANDS = {"show version"}
+BGP_COMMANDS = {"show bgp summary", "show ip bgp summary", "show bgp ipv4 unicast summary"}
+INTERFACE_COMMANDS = {"show ip int brief", "show ip interface brief", "show ipv4 interface brief", "show interfaces terse"}
+CONFIG_COMMANDS = {"show running-config", "show configuration"}
+
+# Change probe command → output per platform; {version} is the device's config_version
+PROBE_COMMANDS = {
+    "show running-config | include Last configuration change":
+        "! Last configuration change at 10:{version:02d}:00 UTC Mon Jun 2 2025 by admin",
+    'show system commit | match "^0 "':
+        "0   2025-06-02 10:00:{version:02d} UTC by admin via cli",
+    "show configuration commit list 1":
+        "SNo. Label/ID              User      Line                Client      Time Stamp\n"
+        "~~~~ ~~~~~~~~              ~~~~      ~~~~                ~~~~~~      ~~~~~~~~~~\n"
+        "1    {commit_id}            admin     vty0                CLI         Mon Jun  2 10:00:00 2025",
+    "show accounting log last-index": "accounting-log last-index : {index}",
+}
+
+FILLER_LINE = "  10.{a}.{b}.0/24        192.0.2.{c}            0    100      0 65000 65001 i"
+
+
+def interface_table(platform, count):
+    # 'show ip interface brief' (Cisco) / 'show interfaces terse' (Junos) with 'count' interfaces
+    if platform == "junos":
+        lines = ["Interface               Admin Link Proto    Local                 Remote"]
+        for i in range(count):
+            lines.append(f"ge-0/0/{i:<16} up    up")
+            lines.append(f"ge-0/0/{i}.0{'':<14} up    up   inet     10.0.{i}.1/30")
+        return "\n".join(lines)
+    if platform == "nxos":
+        lines = ['IP Interface Status for VRF "default"(1)', "Interface            IP Address      Interface Status"]
+        lines += [f"Eth1/{i + 1:<16} {f'10.0.{i}.1':<15} protocol-up/link-up/admin-up" for i in range(count)]
+        return "\n".join(lines)
+    if platform == "xr":
+        lines = ["Interface                      IP-Address      Status          Protocol Vrf-Name"]
+        lines += [f"{f'GigabitEthernet0/0/0/{i}':<30} {f'10.0.{i}.1':<15} Up              Up       default" for i in range(count)]
+        return "\n".join(lines)
+    lines = ["Interface              IP-Address      OK? Method Status                Protocol"]
+    lines += [f"{f'GigabitEthernet0/{i}':<22} {f'10.0.{i}.1':<15} YES NVRAM  up                    up" for i in range(count)]
+    return "\n".join(lines)
+
+
+class LineReader:
+    # Telnet clients end lines with "\r", "\n" or "\r\n" (Netmiko sends the username with "\r" only)
+    def __init__(self, reader):
+        self.reader = reader
+        self.buffer = b""
+        self.last_cr = False
+
+    async def _fill(self):
+        chunk = await self.reader.read(4096)
+        self.buffer += chunk
+        return bool(chunk)
+
+    def _skip_lf_after_cr(self):
+        if self.last_cr and self.buffer.startswith(b"\n"):
+            self.buffer = self.buffer[1:]
+        if self.buffer:
+            self.last_cr = False
+
+    async def readline(self):
+        while True:
+            self._skip_lf_after_cr()
+            for index, byte in enumerate(self.buffer):
+                if byte in (10, 13):
+                    line, self.buffer = self.buffer[:index], self.buffer[index + 1:]
+                    self.last_cr = byte == 13
+                    return line + b"\n"
+            if not await self._fill():
+                return b""
+
+    async def read_key(self):
+        # One keystroke, to answer a --More-- prompt
+        while True:
+            self._skip_lf_after_cr()
+            if self.buffer:
+                key, self.buffer = self.buffer[:1], self.buffer[1:]
+                self.last_cr = key == b"\r"
+                return key
+            if not await self._fill():
+                return b""
+
+
+class FakeDevice:
+    def __init__(self, hostname, platform="ios", latency=0.0, output_lines=0, username="rviews", password="rviews",
+                 ask_password=True, refuse=False, transport="telnet", bandwidth=None, page_length=24, interfaces=8):
+        self.hostname = hostname
+        self.platform = platform
+        self.latency = latency
+        self.output_lines = output_lines
+        self.username = username
+        self.password = password
+        self.ask_password = ask_password
+        self.refuse = refuse  # Broken device: print an error and drop every connection
+        self.transport = transport
+        self.bandwidth = bandwidth  # Bytes per second per session, None = as fast as possible
+        self.page_length = page_length
+        self.interfaces = interfaces
+        self.serial = f"SIM{zlib.crc32(hostname.encode()):08X}"
+        self.config_version = 0  # Changes the change probe output
+
+    @property
+    def vendor(self):
+        return PLATFORMS[self.platform]["vendor"]
+
+    @property
+    def device_type(self):
+        return PLATFORMS[self.platform][self.transport]
+
+    @property
+    def prompt(self):
+        if self.platform == "junos":
+            return f"{self.username}@{self.hostname}> "
+        if self.platform == "xr":
+            return f"RP/0/RP0/CPU0:{self.hostname}#"
+        if self.platform == "nxos":
+            return f"{self.hostname}# "
+        return f"{self.hostname}>"
+
+    @property
+    def more_marker(self):
+        return "---(more)---" if self.platform == "junos" else " --More-- "
+
+    def reply(self, command):
+        # Yield the text the device prints for a command (without the prompt), in pieces,
+        # so very large outputs never have to exist as one string
+        if command.startswith("terminal") or command == "":
+            return
+        if command == "set cli screen-width 511":
+            yield "Screen width set to 511\n"
+        elif command == "set cli complete-on-space off":
+            yield "Disabling complete-on-space\n"
+        elif command.startswith("set cli screen-length "):
+            yield f"Screen length set to {command.rsplit(' ', 1)[1]}\n"
+        elif command in VERSION_COMMANDS or command in BGP_COMMANDS:
+            canned = VERSION if command in VERSION_COMMANDS else BGP_SUMMARY
+            yield canned[self.platform].format(hostname=self.hostname, serial=self.serial) + "\n"
+            for start in range(0, self.output_lines, 1000):
+                yield "".join(
+                    FILLER_LINE.format(a=i // 256 % 256, b=i % 256, c=i % 250 + 1) + "\n"
+                    for i in range(start, min(start + 1000, self.output_lines))
+                )
+        elif command in INTERFACE_COMMANDS:
+            yield interface_table(self.platform, self.interfaces) + "\n"
+        elif command in CONFIG_COMMANDS:
+            yield (f"! Configuration version {self.config_version}\nhostname {self.hostname}\n"
+                   f"snmp-server location rack-{self.config_version}\nend\n")
+        elif command in PROBE_COMMANDS:
+            yield PROBE_COMMANDS[command].format(version=self.config_version, commit_id=1000000001 + self.config_version,
+                                                 index=4200 + self.config_version) + "\n"
+        else:
+            yield f"\n{INVALID_INPUT[self.platform]}\n"
+
+    async def _send(self, writer, text):
+        data = text.replace("\n", "\r\n").encode()
+        writer.write(data)
+        await writer.drain()
+        if self.bandwidth:
+            await asyncio.sleep(len(data) / self.bandwidth)
+
+    async def _send_paged(self, reader, writer, pieces, page_length):
+        # Stop after every page until the client presses a key: space = next page, Enter = one line, q = stop
+        shown = 0
+        for piece in pieces:
+            for line in piece.splitlines(keepends=True):
+                if shown == page_length:
+                    writer.write(self.more_marker.encode())
+                    await writer.drain()
+                    key = await reader.read_key()
+                    writer.write(("\r" + " " * len(self.more_marker) + "\r").encode())
+                    if key in (b"", b"q", b"Q"):
+                        return
+                    shown = 0 if key == b" " else page_length - 1
+                await self._send(writer, line)
+                shown += 1
+
+    async def serve(self, reader, writer, login=True):
+        # Step 3: Emulate the Login Dialog (Telnet only, SSH logs in before this), then a Command Loop
+        reader = LineReader(reader)
+        if login:
+            writer.write(b"\r\nUser Access Verification\r\n\r\n")
+            writer.write(b"login: " if self.platform == "junos" else b"Username: ")
+            await reader.readline()
+            if self.ask_password:
+                writer.write(b"Password: ")
+                await reader.readline()
+        await asyncio.sleep(self.latency)
+        writer.write(b"\r\n" + self.prompt.encode())
+
+        page_length = self.page_length
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            # Drop Telnet negotiation bytes and control characters from the client
+            command = " ".join(bytes(b for b in line if 32 <= b < 127).decode().split())
+            if command in ("exit", "quit", "logout"):
+                break
+            await asyncio.sleep(self.latency)
+            # Echo the command back, like a real vty line does
+            writer.write((command + "\r\n").encode())
+            if command.startswith(("terminal length ", "set cli screen-length ")):
+                length = command.rsplit(" ", 1)[1]
+                page_length = int(length) if length.isdigit() else page_length
+            if page_length:
+                await self._send_paged(reader, writer, self.reply(command), page_length)
+            else:
+                for piece in self.reply(command):
+                    await self._send(writer, piece)
+            writer.write(self.prompt.encode())
+            await writer.drain()
+
+    async def handle(self, reader, writer):
+        # Telnet session
+        try:
+            if self.refuse:
+                writer.write(b"\r\n% Connection refused by remote host\r\n")
+                await writer.drain()
+                return
+            await self.serve(reader, writer)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_ssh(self, process):
+        # SSH session (asyncssh has already checked the password, see SshLogin)
+        try:
+            await self.serve(process.stdin, process.stdout, login=False)
+        except (ConnectionError, OSError, asyncssh.Error):
+            pass
+        finally:
+            process.exit(0)
+
+
+class SshLogin(asyncssh.SSHServer if asyncssh else object):
+    # Password authentication for one SSH device; a refusing device rejects every login.
+    # 'connections' is the farm's set of open SSH connections, closed when the farm stops.
+    def __init__(self, device, connections):
+        self.device = device
+        self.connections = connections
+        self.connection = None
+
+    def connection_made(self, connection):
+        self.connection = connection
+        self.connections.add(connection)
+
+    def connection_lost(self, exc):
+        self.connections.discard(self.connection)
+
+    def begin_auth(self, username):
+        return True
+
+    def password_auth_supported(self):
+        return True
+
+    def validate_password(self, username, password):
+        device = self.device
+        return not device.refuse and username == device.username and password == device.password
+
+
+def raise_open_file_limit(needed):
+    # Every device listens on its own socket, and every session adds one more
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        limit = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+
+
+# Step 4: Run a Farm of Fake Devices
+class FakeDeviceFarm:
+    # 'platforms' is a list such as ["ios", "junos", "xr", "nxos"], used in turn for the devices;
+    # without it every 'juniper_every'-th device is Junos and the rest are IOS.
+    # 'transport' forces "telnet" or "ssh" for all devices instead of each platform's default.
+    def __init__(self, count, latency=0.0, output_lines=0, juniper_every=5, host="127.0.0.1",
+                 failure_rate=0.0, seed=0, platforms=None, transport=None, bandwidth=None):
+        self.host = host
+        chance = random.Random(seed)
+        self.devices = []
+        for i in range(count):
+            if platforms:
+                platform = platforms[i % len(platforms)]
+            else:
+                platform = "junos" if juniper_every and i % juniper_every == 0 else "ios"
+            self.devices.append(FakeDevice(
+                hostname=f"sim-{PLATFORMS[platform]['prefix']}-{i:05d}",
+                platform=platform,
+                latency=latency,
+                output_lines=output_lines,
+                refuse=chance.random() < failure_rate,
+                transport=transport or PLATFORMS[platform]["transport"],
+                bandwidth=bandwidth,
+            ))
+        self.ports = []
+        self._servers = []
+        self._sessions = set()  # Handler tasks of the open sessions, cancelled by stop_async()
+        self._connections = set()  # Open SSH connections, closed by stop_async()
+        self._host_key = None
+        self._loop = None
+        self._thread = None
+
+    async def _start_ssh(self, device):
+        if asyncssh is None:
+            raise RuntimeError("SSH devices need the asyncssh package: pip install asyncssh")
+        if self._host_key is None:
+            self._host_key = asyncssh.generate_private_key("ssh-ed25519")  # One host key for the whole farm
+        server = await asyncssh.create_server(
+            partial(SshLogin, device, self._connections), self.host, 0, server_host_keys=[self._host_key],
+            process_factory=partial(self._session, device.handle_ssh), encoding=None, line_editor=False,
+        )
+        return server, server.get_port()
+
+    async def _session(self, handler, *args):
+        # Runs one session and remembers its task while it is open
+        task = asyncio.current_task()
+        self._sessions.add(task)
+        try:
+            await handler(*args)
+        except asyncio.CancelledError:
+            pass  # Cancelled by stop_async(); asyncio.start_server on Python 3.11 logs tasks that end cancelled
+        finally:
+            self._sessions.discard(task)
+
+    async def start_async(self):
+        raise_open_file_limit(len(self.devices) * 3 + 1024)
+        for device in self.devices:
+            # Port 0 lets the OS pick a free port for every device
+            if device.transport == "ssh":
+                server, port = await self._start_ssh(device)
+            else:
+                server = await asyncio.start_server(partial(self._session, device.handle), self.host, 0)
+                port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+            self.ports.append(port)
+
+    async def stop_async(self):
+        # Stop accepting, then cancel the open sessions and wait for their handlers to close the
+        # connections, so nothing is left pending when the loop stops
+        for server in self._servers:
+            server.close()
+        for task in self._sessions:
+            task.cancel()
+        await asyncio.gather(*self._sessions, return_exceptions=True)
+        connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+        for connection in connections:
+            await connection.wait_closed()
+        for server in self._servers:
+            await server.wait_closed()
+        await asyncio.sleep(0)  # Let the closed transports run their connection_lost callbacks
+
+    def start(self):
+        # Run the farm in a background thread so blocking Netmiko code can talk to it
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start_async())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.stop_async(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def inventory(self):
+        # Rows in the same shape as devices.csv, plus where to connect
+        for device, port in zip(self.devices, self.ports):
+            yield {
+                "hostname": device.hostname,
+                "username": device.username,
+                "password": device.password,
+                "device_type": device.device_type,
+                "host": self.host,
+                "port": port,
+            }
+
+
+# Step 5: Run Standalone
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run fake Telnet / SSH network devices on localhost")
+    parser.add_argument("--devices", type=int, default=10, help="Number of fake devices", metavar="")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added before every reply", metavar="")
+    parser.add_argument("--output-lines", type=int, default=0, help="Extra lines in show output", metavar="")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of devices that refuse sessions (0-1)", metavar="")
+    parser.add_argument("--platforms", help="Comma-separated mix of ios,junos,xr,nxos (default: IOS with every 5th Junos)", metavar="")
+    parser.add_argument("--transport", choices=["telnet", "ssh"], help="Force one transport (default: per platform)", metavar="")
+    parser.add_argument("--bandwidth", type=float, help="Output bytes per second per session (default: unlimited)", metavar="")
+    parser.add_argument("--inventory", help="Also write the devices to this CSV file (for --inventory of the runners)", metavar="")
+    args = parser.parse_args()
+
+    async def main():
+        farm = FakeDeviceFarm(args.devices, latency=args.latency, output_lines=args.output_lines,
+                              failure_rate=args.failure_rate, transport=args.transport, bandwidth=args.bandwidth,
+                              platforms=args.platforms.split(",") if args.platforms else None)
+        await farm.start_async()
+        rows = list(farm.inventory())
+        if args.inventory:
+            import csv
+
+            with open(args.inventory, "w", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"Inventory written to {args.inventory}")
+        for row in rows[:20]:
+            print(f"{row['hostname']:<22} {row['device_type']:<22} {row['host']}:{row['port']}")
+        if len(rows) > 20:
+            print(f"... and {len(rows) - 20} more")
+        print("Fake devices running, press Ctrl + C to stop.")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
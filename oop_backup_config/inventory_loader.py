@@ -0,0 +1,64 @@
+# High-Volume Inventory Loader (100k+ Devices)
+
+# Introduction
+# - pd.read_csv(...).to_dict("records") + build_devices() keeps three copies of the inventory in memory
+#   at the same time: the DataFrame, one dict per row, and the device objects.
+# - iter_devices() reads the CSV row by row with the csv module and creates each device object only when
+#   the runner asks for the next one, so only the devices in flight are in memory.
+# - Device objects use __slots__ (see network_devices.py), and repeated strings such as the username and
+#   password are interned so 100k rows share one copy.
+# - load_devices() returns a list instead, for scripts that need len() or several passes.
+# - tag_columns=("site", ...) keeps those extra columns in device.tags (used by rate_limits.py);
+#   other columns are not kept.
+#
+# Usage:
+#   for device in iter_devices("devices.csv"):
+#       print(device)
+
+# Step 1: Import Required Modules
+import csv
+import sys
+from network_devices import get_device_class
+
+REQUIRED_COLUMNS = ("hostname", "username", "password", "device_type")
+
+
+# Step 2: Stream Device Objects from the CSV File
+def iter_devices(path, on_unknown=print, tag_columns=()):
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        columns = {name.strip(): position for position, name in enumerate(header)}
+        missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"{path} is missing column(s): {', '.join(missing)}")
+
+        hostname_at, username_at = columns["hostname"], columns["username"]
+        password_at, type_at = columns["password"], columns["device_type"]
+        host_at, port_at = columns.get("host"), columns.get("port")
+        tags_at = [(sys.intern(name), columns[name]) for name in tag_columns if name in columns]
+
+        for row in reader:
+            if not row:
+                continue
+            device_class = get_device_class(row[type_at])
+            if device_class is None:
+                if on_unknown:
+                    on_unknown(f"Skipping unknown device type: {row[type_at]}")
+                continue
+            host = row[host_at] or None if host_at is not None else None
+            port = int(row[port_at]) if port_at is not None and row[port_at] else None
+            device = device_class(
+                hostname=row[hostname_at],
+                username=sys.intern(row[username_at]),
+                password=sys.intern(row[password_at]),
+                host=sys.intern(host) if host else None,
+                port=port,
+            )
+            if tags_at:
+                device.tags = {name: sys.intern(row[position]) for name, position in tags_at}
+            yield device
+
+
+def load_devices(path, on_unknown=print, tag_columns=()):
+    return list(iter_devices(path, on_unknown, tag_columns))
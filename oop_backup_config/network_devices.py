@@ -0,0 +1,556 @@
+# Shared Network Device Classes for the Backup Runners
+
+# Introduction
+# - Same CiscoDevice / JuniperDevice classes as backup_config.py (same commands, same filenames); the
+#   backup_multithreaded*.py and backup_sequential.py scripts use these ones through build_devices().
+#   Each vendor class lives in its own module under vendors/ and is looked up by Netmiko device_type
+#   in DEVICE_DRIVERS; a vendor module is only imported when the inventory has a device of that type.
+# - backup_config()       → blocking Netmiko session, used by the thread-based runners.
+# - backup_config_async() → lightweight asyncio Telnet session, used by backup_asyncio.py.
+# - run_commands() / run_commands_async() → several commands in ONE login, returns {command: output}.
+# - fetch_and_save()      → backup_config() without the extras, also returning the output text
+#   (for backup_pipeline.py, which post-processes it in other processes).
+# - 'hostname' is the device name used in filenames; 'host' and 'port' are where we connect
+#   (they default to the hostname and Telnet port 23).
+# - Pass store=BackupStore(...) (backup_store.py) to keep outputs deduplicated instead of as .txt files,
+#   or store=ArchiveWriter(...) (backup_archive.py) to write them into one compressed archive per run.
+# - Pass stream=True to write the output to the file in chunks as it arrives, instead of holding the
+#   whole output in memory (e.g. 'show ip bgp' on route-views is hundreds of MB).
+# - Pass timeouts=PhaseTimeouts(...) for separate connect / login / command limits. abort() ends a
+#   backup from another thread (run deadline); it is then reported as "Not reached", not as a failure.
+# - Pass probe=ChangeProbe(...) (change_probe.py) to run the cheap probe_command first and skip the
+#   full backup when the device did not change since its last backup. The probe follows configuration
+#   commits, so it is only used by classes whose 'command' prints the configuration (config_command = True):
+#   the "*_config" device types of DEVICE_DRIVERS, e.g. cisco_ios_telnet_config.
+# - backup_config() / backup_config_async() return a BackupResult record (result_records.py): host, vendor,
+#   status, error class, bytes, timings and output path; str(result) is the line printed to the console.
+# - Every operation records how long each phase took (connect, auth, prompt, command, write) in
+#   device.timings; the runners add them up with PhaseHistograms (phase_timing.py).
+
+# Step 1: Import Required Modules
+import asyncio
+import importlib
+import os
+import re
+import time
+from datetime import datetime
+
+from phase_timing import PhaseTimer, open_connection
+from result_records import BackupResult
+
+# Step 2: Minimal asyncio Telnet Session
+# Telnet option negotiation bytes (RFC 854)
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+
+USERNAME_PATTERN = re.compile(r"(?:user:|username|login|user name)\s*:?\s*$", re.IGNORECASE)
+PASSWORD_PATTERN = re.compile(r"assword\s*:?\s*$")
+PROMPT_PATTERN = re.compile(r"[>#%$]\s*$")
+# A new login or password prompt on its own line after the password (not "Last login: ..." in a banner)
+LOGIN_AGAIN_PATTERN = re.compile(r"(?:\A|\n)[^\S\n]*(?:username|login|user name|password)\s*:\s*\Z", re.IGNORECASE)
+
+
+def prompt_line_pattern(prompt, rest=""):
+    # The prompt as the last, unterminated line of what was read. Anchored to the start of that line,
+    # so a config line containing the prompt text (a banner, a description, 'hostname R1#') is not
+    # taken for the end of the output.
+    return re.compile(r"(?m)^\r?" + re.escape(prompt) + rest + r"[ \t]*\Z")
+
+
+class StreamingWriter:
+    # Writes command output to a file as it arrives. Only the echoed command and a short tail
+    # (which might be the start of the prompt) are held in memory.
+    def __init__(self, file, command, prompt_pattern, keep=256):
+        self.file = file
+        self.command = command
+        self.prompt_pattern = prompt_pattern
+        self.keep = keep
+        self.pending = ""
+        self.before = "\n"  # Last character already written: tells whether 'pending' starts a line
+        self.echo_removed = False
+        self.bytes_written = 0
+
+    def _write(self, text):
+        self.file.write(text)
+        self.bytes_written += len(text)
+
+    def feed(self, text):
+        # Returns True once the prompt has been seen (the output is complete)
+        self.pending += text.replace("\r", "")
+        if not self.echo_removed:
+            if "\n" not in self.pending:
+                return False
+            first_line, rest = self.pending.split("\n", 1)
+            if first_line.strip() == self.command:
+                self.pending = rest
+            self.echo_removed = True
+
+        # Searched from index 1 of before + pending, so a prompt pattern anchored with ^ only matches
+        # where a line starts, also when 'pending' was cut in the middle of a line
+        match = self.prompt_pattern.search(self.before + self.pending, 1)
+        if match:
+            self._write(self.pending[:match.start() - 1].rstrip("\n"))
+            self.pending = ""
+            return True
+        if len(self.pending) > self.keep:
+            self._write(self.pending[:-self.keep])
+            self.before = self.pending[-self.keep - 1]
+            self.pending = self.pending[-self.keep:]
+        return False
+
+
+class AsyncTelnetSession:
+    def __init__(self, host, port=23, timeout=30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.prompt = None
+        self._buffer = ""
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+
+    def _strip_negotiation(self, data):
+        # Refuse every option the device offers and drop the negotiation bytes from the text
+        text = bytearray()
+        i = 0
+        while i < len(data):
+            byte = data[i]
+            if byte != IAC:
+                text.append(byte)
+                i += 1
+                continue
+            command = data[i + 1] if i + 1 < len(data) else None
+            if command in (DO, DONT, WILL, WONT) and i + 2 < len(data):
+                reply = WONT if command in (DO, DONT) else DONT
+                self.writer.write(bytes([IAC, reply, data[i + 2]]))
+                i += 3
+            elif command == SB:
+                end = data.find(bytes([IAC, SE]), i)
+                i = len(data) if end == -1 else end + 2
+            elif command == IAC:
+                text.append(IAC)
+                i += 2
+            else:
+                i += 2
+        return text.decode("utf-8", errors="replace")
+
+    async def read_until(self, *patterns):
+        # Read until the tail of the buffer matches one of the patterns, return everything read
+        while True:
+            for pattern in patterns:
+                if pattern.search(self._buffer):
+                    data, self._buffer = self._buffer, ""
+                    return data
+            chunk = await asyncio.wait_for(self.reader.read(65536), self.timeout)
+            if not chunk:
+                raise ConnectionError(f"{self.host}:{self.port} closed the connection")
+            self._buffer += self._strip_negotiation(chunk)
+
+    def write_line(self, line):
+        self.writer.write(line.encode() + b"\r\n")
+
+    async def login(self, username, password):
+        data = await self.read_until(USERNAME_PATTERN, PASSWORD_PATTERN, PROMPT_PATTERN)
+        if USERNAME_PATTERN.search(data):
+            self.write_line(username)
+            data = await self.read_until(PASSWORD_PATTERN, PROMPT_PATTERN)
+        if PASSWORD_PATTERN.search(data):
+            self.write_line(password)
+            data = await self.read_until(PROMPT_PATTERN, LOGIN_AGAIN_PATTERN)
+            if LOGIN_AGAIN_PATTERN.search(data):
+                # Asked for the username or password again: the credentials were rejected
+                raise PermissionError(f"{self.host}:{self.port} rejected the login of {username}")
+        # The last line of the output is the device prompt (e.g. "route-views>")
+        self.prompt = data.strip().splitlines()[-1].strip()
+
+    async def send_command(self, command):
+        self.write_line(command)
+        output = await self.read_until(prompt_line_pattern(self.prompt))
+        lines = output.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        # Drop the echoed command and the trailing prompt, like Netmiko does
+        if lines and lines[0].strip() == command:
+            lines = lines[1:]
+        if lines and lines[-1].strip() == self.prompt:
+            lines = lines[:-1]
+        return "\n".join(lines)
+
+    async def stream_command(self, command, file):
+        # Like send_command, but every chunk goes straight to 'file'; returns the bytes written
+        self.write_line(command)
+        writer = StreamingWriter(file, command, prompt_line_pattern(self.prompt))
+        data, self._buffer = self._buffer, ""
+        while not writer.feed(data):
+            chunk = await asyncio.wait_for(self.reader.read(65536), self.timeout)
+            if not chunk:
+                raise ConnectionError(f"{self.host}:{self.port} closed the connection")
+            data = self._strip_negotiation(chunk)
+        return writer.bytes_written
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+# Step 3: Separate Timeouts for Each Phase of a Session (seconds)
+class PhaseTimeouts:
+    def __init__(self, connect=10, auth=20, command=60):
+        self.connect = connect  # TCP connect
+        self.auth = auth        # Login dialog and prompt detection
+        self.command = command  # Waiting for command output (no data for this long)
+
+
+# Step 4: Define the Base Class for Network Devices
+# __slots__ instead of a per-object __dict__ keeps 100k+ device objects small
+class NetworkDevice:
+    __slots__ = ("hostname", "username", "password", "host", "port", "aborted", "timings", "tags", "_connection")
+    vendor = None
+    device_type = None
+    transport = "telnet"  # "ssh" devices use Netmiko in a thread for backup_config_async()
+    default_port = 23
+    command = None
+    probe_command = None  # Small command whose output changes with the configuration (change_probe.py)
+    config_command = False  # True when 'command' prints the configuration: only then can the probe stand in for it
+    default_commands = []
+    paging_command = None
+
+    def __init__(self, hostname, username, password, host=None, port=None):
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.host = host or hostname
+        self.port = port or self.default_port
+        self.aborted = False
+        self.timings = None  # {phase: seconds} of the last operation
+        self.tags = None     # Extra inventory columns, e.g. {"site": "lon"} (only the ones a runner asks for)
+        self._connection = None
+
+    def __str__(self):
+        # Defines string representation of the object
+        return f"{self.__class__.__name__}(hostname={self.hostname})"
+
+    def _filename(self):
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+        return f"{self.hostname}_{self.vendor.lower()}_config_{timestamp}.txt"
+
+    def _store_file(self, filename, store):
+        # Move a streamed file into the store (read in chunks, never fully loaded)
+        if store is None:
+            return filename
+        return store.save_output_file(self.hostname, self.command, filename)
+
+    def _save_output(self, output, store=None):
+        if store is not None:
+            return store.save_output(self.hostname, self.command, output)
+        filename = self._filename()
+        with open(filename, "w") as file:
+            file.write(output)
+        return filename
+
+    def connect(self, timeouts=None, timer=None):
+        from netmiko import ConnectHandler  # Imported here: asyncio-only runs never load Netmiko (~0.2 s)
+
+        extra = {}
+        if timeouts:
+            extra = {"conn_timeout": timeouts.connect, "auth_timeout": timeouts.auth, "banner_timeout": timeouts.auth}
+        # Created without connecting, so abort() can already close the socket during login
+        self._connection = ConnectHandler(
+            device_type=self.device_type,
+            host=self.host,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            auto_connect=False,
+            **extra
+        )
+        return open_connection(self._connection, timer or PhaseTimer())
+
+    def abort(self):
+        # Called from another thread when the run deadline is reached: closing the socket
+        # makes the blocked Netmiko read fail right away instead of waiting for its timeout
+        self.aborted = True
+        connection = self._connection
+        if connection is not None and connection.remote_conn is not None:
+            try:
+                connection.remote_conn.close()
+            except Exception:
+                pass
+
+    def _result(self, status, message, **fields):
+        # Structured record of a backup (result_records.py); str() of it is 'message'
+        return BackupResult(self.hostname, self.vendor, status, message, timings=self.timings, **fields)
+
+    def _saved(self, filename, size):
+        return self._result("ok", f"{self.vendor}: {self.hostname} backup saved to {filename}", path=filename, bytes=size)
+
+    def _failed(self, error, reason=None):
+        return self._result("failed", f"{self.vendor}: Failed to back up {self.hostname}: {reason or error}",
+                            error_class=type(error).__name__)
+
+    def _not_reached(self, reason):
+        return self._result("not_reached", f"{self.vendor}: Not reached {self.hostname}: {reason}")
+
+    def _unchanged(self, probe):
+        path = probe.last_backup(self.hostname)
+        return self._result("unchanged", f"{self.vendor}: {self.hostname} unchanged (change probe), last backup saved to {path}",
+                            path=path, bytes=probe.hosts[self.hostname]["bytes"])
+
+    def _probes(self, probe):
+        # 'show version' or 'show bgp summary' change without a commit: a probe would hide those changes
+        return probe is not None and self.probe_command is not None and self.config_command
+
+    def _probe_done(self, probe, fingerprint, filename, size, timer):
+        # Remember the probe result of a successful full backup, with what the full pull cost
+        if probe is not None:
+            pull_seconds = timer.phases.get("command", 0.0) + timer.phases.get("write", 0.0)
+            probe.update(self.hostname, fingerprint, filename, size, pull_seconds)
+
+    def run_commands(self, commands=None):
+        # Log in once, run every command, return ({command: output}, wall time in seconds)
+        commands = commands or self.default_commands
+        start = time.perf_counter()
+        timer = PhaseTimer()
+        self.timings = timer.phases
+        connection = self.connect(timer=timer)
+        try:
+            with timer.phase("command"):
+                results = {command: connection.send_command(command) for command in commands}
+        finally:
+            connection.disconnect()
+        return results, time.perf_counter() - start
+
+    async def run_commands_async(self, commands=None, timeout=30):
+        if self.transport != "telnet":
+            return await asyncio.to_thread(self.run_commands, commands)
+        commands = commands or self.default_commands
+        start = time.perf_counter()
+        timer = PhaseTimer()
+        self.timings = timer.phases
+        session = AsyncTelnetSession(self.host, self.port, timeout=timeout)
+        try:
+            await session.connect()
+            timer.lap("connect")
+            await session.login(self.username, self.password)
+            timer.lap("auth")
+            await session.send_command(self.paging_command)
+            timer.lap("prompt")
+            results = {}
+            for command in commands:
+                results[command] = await session.send_command(command)
+            timer.lap("command")
+        finally:
+            await session.close()
+        return results, time.perf_counter() - start
+
+    def _stream_command(self, connection, command, file, read_timeout=120):
+        # Netmiko's send_command collects the whole output in one string, so read the channel ourselves
+        writer = StreamingWriter(file, command, prompt_line_pattern(connection.base_prompt, r"[^\n]*[>#%$]"))
+        connection.write_channel(command + connection.RETURN)
+        last_data = time.time()
+        while True:
+            chunk = connection.read_channel()
+            if chunk:
+                last_data = time.time()
+                if writer.feed(chunk):
+                    return writer.bytes_written
+            elif time.time() - last_data > read_timeout:
+                raise TimeoutError(f"No output from {self.hostname} for {read_timeout} seconds")
+            else:
+                time.sleep(0.01)
+
+    def fetch_output(self, timeouts=None, timer=None):
+        # Only the network part of backup_config: connect, run the backup command, return the text
+        timer = timer or PhaseTimer()
+        self.timings = timer.phases
+        connection = self.connect(timeouts, timer)
+        try:
+            with timer.phase("command"):
+                return connection.send_command(self.command, read_timeout=timeouts.command if timeouts else 120)
+        finally:
+            connection.disconnect()
+
+    def fetch_and_save(self, store=None, timeouts=None):
+        # For callers that also need the text (backup_pipeline.py): (BackupResult, output or None on failure)
+        timer = PhaseTimer()
+        try:
+            output = self.fetch_output(timeouts, timer)
+            with timer.phase("write"):
+                filename = self._save_output(output, store)
+        except Exception as e:
+            return self._failed(e), None
+        return self._saved(filename, len(output)), output
+
+    def backup_config(self, store=None, stream=False, timeouts=None, probe=None):
+        if self.aborted:
+            return self._not_reached("run deadline reached before start")
+        read_timeout = timeouts.command if timeouts else 120
+        timer = PhaseTimer()
+        self.timings = timer.phases
+        try:
+            connection = self.connect(timeouts, timer)
+            if self.aborted:
+                connection.disconnect()
+                return self._not_reached("cancelled at run deadline")
+            fingerprint = None
+            if self._probes(probe):
+                with timer.phase("probe"):
+                    fingerprint = probe.fingerprint(connection.send_command(self.probe_command, read_timeout=read_timeout))
+                if probe.unchanged(self.hostname, fingerprint, timer.phases["probe"],
+                                   check_file=store is None or getattr(store, "keeps_files", False)):
+                    connection.disconnect()
+                    return self._unchanged(probe)
+            if stream:
+                # Output goes to disk while it arrives, so 'command' includes the file write
+                filename = self._filename()
+                try:
+                    with open(filename, "w") as file, timer.phase("command"):
+                        self._stream_command(connection, self.command, file, read_timeout)
+                except BaseException:
+                    os.remove(filename)  # Don't leave half a backup behind
+                    raise
+                connection.disconnect()
+                size = os.path.getsize(filename)
+                with timer.phase("write"):
+                    filename = self._store_file(filename, store)
+                self._probe_done(probe, fingerprint, filename, size, timer)
+                return self._saved(filename, size)
+
+            with timer.phase("command"):
+                output = connection.send_command(self.command, read_timeout=read_timeout)
+            connection.disconnect()
+
+            with timer.phase("write"):
+                filename = self._save_output(output, store)
+            self._probe_done(probe, fingerprint, filename, len(output), timer)
+            return self._saved(filename, len(output))
+        except Exception as e:
+            if self.aborted:
+                return self._not_reached("cancelled at run deadline")
+            return self._failed(e)
+        finally:
+            self._connection = None
+
+    async def backup_config_async(self, timeout=30, store=None, stream=False, timeouts=None, probe=None):
+        if self.transport != "telnet":
+            # No asyncio SSH client here: run the Netmiko backup in a thread, abort it if cancelled
+            try:
+                return await asyncio.to_thread(self.backup_config, store, stream, timeouts, probe)
+            except asyncio.CancelledError:
+                self.abort()
+                raise
+
+        # Without 'timeouts', every read may take up to 'timeout' seconds
+        session = AsyncTelnetSession(self.host, self.port, timeout=timeouts.command if timeouts else timeout)
+        timer = PhaseTimer()
+        self.timings = timer.phases
+        phase = "connect"
+        try:
+            await asyncio.wait_for(session.connect(), timeouts.connect if timeouts else None)
+            timer.lap("connect")
+            phase = "auth"
+            await asyncio.wait_for(session.login(self.username, self.password), timeouts.auth if timeouts else None)
+            timer.lap("auth")
+            phase = "command"
+            await session.send_command(self.paging_command)
+            timer.lap("prompt")
+            fingerprint = None
+            if self._probes(probe):
+                fingerprint = probe.fingerprint(await session.send_command(self.probe_command))
+                timer.lap("probe")
+                if probe.unchanged(self.hostname, fingerprint, timer.phases["probe"],
+                                   check_file=store is None or getattr(store, "keeps_files", False)):
+                    return self._unchanged(probe)
+            if stream:
+                # Chunks of at most 64 KB go to the OS page cache, small enough to write from the event loop
+                filename = self._filename()
+                try:
+                    with open(filename, "w") as file:
+                        await session.stream_command(self.command, file)
+                except BaseException:
+                    os.remove(filename)  # Don't leave half a backup behind (error, timeout or run deadline)
+                    raise
+                timer.lap("command")
+                size = os.path.getsize(filename)
+                filename = await asyncio.to_thread(self._store_file, filename, store)
+                timer.lap("write")
+                self._probe_done(probe, fingerprint, filename, size, timer)
+                return self._saved(filename, size)
+
+            output = await session.send_command(self.command)
+            timer.lap("command")
+
+            # Write in a worker thread so a big file never blocks the other sessions
+            filename = await asyncio.to_thread(self._save_output, output, store)
+            timer.lap("write")
+            self._probe_done(probe, fingerprint, filename, len(output), timer)
+            return self._saved(filename, len(output))
+        except asyncio.TimeoutError as e:
+            return self._failed(e, f"{phase} timeout")
+        except Exception as e:
+            return self._failed(e, repr(e))
+        finally:
+            await session.close()
+
+
+# Step 5: Vendor Driver Registry (Netmiko device_type → vendor module and class)
+# Vendor modules are imported on first use, so a run only pays for the vendors in its inventory
+DEVICE_DRIVERS = {
+    "cisco_ios_telnet": ("vendors.cisco_ios", "CiscoDevice"),
+    "juniper_junos_telnet": ("vendors.juniper_junos", "JuniperDevice"),
+    "cisco_xr": ("vendors.cisco_xr", "CiscoXrDevice"),
+    "cisco_nxos": ("vendors.cisco_nxos", "CiscoNxosDevice"),
+    # Configuration backups (show running-config / show configuration), which the change probe can skip
+    "cisco_ios_telnet_config": ("vendors.cisco_ios", "CiscoConfigDevice"),
+    "juniper_junos_telnet_config": ("vendors.juniper_junos", "JuniperConfigDevice"),
+    "cisco_xr_config": ("vendors.cisco_xr", "CiscoXrConfigDevice"),
+    "cisco_nxos_config": ("vendors.cisco_nxos", "CiscoNxosConfigDevice"),
+}
+_device_classes = {}  # device_type → class, filled as the vendor modules are imported
+
+
+def register_driver(device_type, module_name, class_name):
+    DEVICE_DRIVERS[device_type] = (module_name, class_name)
+    _device_classes.pop(device_type, None)
+
+
+def get_device_class(device_type):
+    # One dict lookup once the vendor module is loaded; None for an unknown device_type
+    device_class = _device_classes.get(device_type)
+    if device_class is None:
+        driver = DEVICE_DRIVERS.get(device_type)
+        if driver is None:
+            return None
+        module_name, class_name = driver
+        device_class = _device_classes[device_type] = getattr(importlib.import_module(module_name), class_name)
+    return device_class
+
+
+def __getattr__(name):
+    # Keeps 'from network_devices import CiscoDevice' working without importing every vendor up front
+    for module_name, class_name in DEVICE_DRIVERS.values():
+        if class_name == name:
+            return getattr(importlib.import_module(module_name), class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Step 6: Build Device Objects from Inventory Rows (devices.csv, optionally with host/port columns)
+def build_devices(rows, tag_columns=()):
+    devices = []
+    for row in rows:
+        device_class = get_device_class(row["device_type"])
+        if device_class is None:
+            print(f"Skipping unknown device type: {row['device_type']}")
+            continue
+        extra = {"host": row["host"], "port": int(row["port"])} if "port" in row else {}
+        device = device_class(hostname=row["hostname"], username=row["username"], password=row["password"], **extra)
+        if tag_columns:
+            device.tags = {column: row[column] for column in tag_columns if column in row}
+        devices.append(device)
+    return devices
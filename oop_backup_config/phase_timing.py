@@ -0,0 +1,203 @@
+# Per-Device Phase Timing, Histograms and Metrics Export
+
+# Introduction
+# - A single "Total execution time" does not say where the time goes. Every device operation is
+#   split into phases and each phase is timed on its own:
+#     connect → TCP connection is open
+#     auth    → login finished (for SSH: TCP connect, key exchange and login are one paramiko call, so
+#               'connect' is not measured separately and everything is counted as 'auth')
+#     prompt  → prompt detected and paging turned off (Netmiko session preparation)
+#     probe   → change probe command, only with a ChangeProbe (change_probe.py)
+#     command → command output received
+#     write   → output file written (or saved into the store / archive)
+# - PhaseHistograms adds the timings of all devices into histograms (per operation, vendor and phase),
+#   prints a summary, and exports them as JSON and as a Prometheus textfile (for node_exporter's
+#   textfile collector).
+#
+# Usage:
+#   timer = PhaseTimer()
+#   connection = open_netmiko(timer, device_type="cisco_ios_telnet", host="route-views.routeviews.org", username="rviews")
+#   with timer.phase("command"):
+#       output = connection.send_command("show version")
+#   metrics = PhaseHistograms()
+#   metrics.observe("collect_version_info", "Cisco", timer.phases)
+#   metrics.export("phase_timings")   # → phase_timings.json and phase_timings.prom
+
+# Step 1: Import Required Modules
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PHASES = ("connect", "auth", "prompt", "probe", "command", "write")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)  # Upper bounds in seconds
+METRIC = "network_device_phase_seconds"
+
+
+# Step 2: Time the Phases of One Device Operation
+class PhaseTimer:
+    def __init__(self):
+        self.phases = {}  # Phase name → seconds
+        self._mark = time.perf_counter()
+
+    def reset(self):
+        self._mark = time.perf_counter()
+
+    def lap(self, phase):
+        # Time since the last lap (or reset) is counted for 'phase'
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def phase(self, name):
+        self.reset()
+        try:
+            yield
+        finally:
+            self.lap(name)
+
+
+def open_connection(connection, timer):
+    # The same steps as Netmiko's BaseConnection._open(), with a lap after each phase.
+    # 'connection' must be created with ConnectHandler(..., auto_connect=False).
+    timer.reset()
+    if connection.protocol == "telnet":
+        login = connection.telnet_login
+
+        def timed_login(*args, **kwargs):
+            timer.lap("connect")  # telnetlib has opened the TCP connection, the login dialog starts now
+            return login(*args, **kwargs)
+
+        connection.telnet_login = timed_login
+    connection._modify_connection_params()
+    connection.establish_connection()
+    timer.lap("auth")
+    connection._try_session_preparation()
+    timer.lap("prompt")
+    return connection
+
+
+def open_netmiko(timer, **device):
+    # Drop-in for ConnectHandler(**device) that records connect / auth / prompt in 'timer'
+    from netmiko import ConnectHandler  # Imported here, like in network_devices.py
+
+    return open_connection(ConnectHandler(auto_connect=False, **device), timer)
+
+
+# Step 3: Histograms for All Devices of a Run
+class PhaseHistograms:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.series = {}  # (operation, vendor, phase) → {"counts": [...], "sum": s, "count": n, "max": m}
+
+    def observe(self, operation, vendor, phases):
+        # 'phases' is PhaseTimer.phases (or any {phase: seconds}); None or {} is ignored
+        if not phases:
+            return
+        with self.lock:
+            for phase, seconds in phases.items():
+                entry = self.series.setdefault((operation, vendor or "unknown", phase), {
+                    "counts": [0] * len(self.buckets), "sum": 0.0, "count": 0, "max": 0.0,
+                })
+                for index, bound in enumerate(self.buckets):
+                    if seconds <= bound:
+                        entry["counts"][index] += 1
+                        break
+                entry["sum"] += seconds
+                entry["count"] += 1
+                entry["max"] = max(entry["max"], seconds)
+
+    def _cumulative(self, counts):
+        total, result = 0, []
+        for count in counts:
+            total += count
+            result.append(total)
+        return result
+
+    def _quantile(self, entry, fraction):
+        # Upper bound of the bucket that holds the quantile (what Prometheus' histogram_quantile rounds to)
+        target = fraction * entry["count"]
+        for bound, cumulative in zip(self.buckets, self._cumulative(entry["counts"])):
+            if cumulative >= target:
+                return bound
+        return entry["max"]
+
+    def _merged(self):
+        # Per (operation, phase), all vendors together, in PHASES order
+        merged = {}
+        for (operation, _, phase), entry in sorted(self.series.items()):
+            target = merged.setdefault((operation, phase), {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0, "max": 0.0})
+            target["counts"] = [a + b for a, b in zip(target["counts"], entry["counts"])]
+            target["sum"] += entry["sum"]
+            target["count"] += entry["count"]
+            target["max"] = max(target["max"], entry["max"])
+        order = {phase: index for index, phase in enumerate(PHASES)}
+        return sorted(merged.items(), key=lambda item: (item[0][0], order.get(item[0][1], len(PHASES)), item[0][1]))
+
+    def summary(self):
+        with self.lock:
+            merged = self._merged()
+        if not merged:
+            return "⏱️ No phase timings recorded"
+        lines = ["⏱️ Phase timings per device:",
+                 f"   {'Operation':<22} {'Phase':<8} {'Devices':>7} {'Mean':>8} {'p95 ≤':>8} {'Max':>8} {'Share':>6}"]
+        totals = {}
+        for (operation, _), entry in merged:
+            totals[operation] = totals.get(operation, 0.0) + entry["sum"]
+        for (operation, phase), entry in merged:
+            share = entry["sum"] / totals[operation] * 100 if totals[operation] else 0.0
+            lines.append(f"   {operation:<22} {phase:<8} {entry['count']:>7} {entry['sum'] / entry['count']:>7.3f}s "
+                         f"{self._quantile(entry, 0.95):>7g}s {entry['max']:>7.3f}s {share:>5.0f}%")
+        for operation in totals:
+            (_, phase), entry = max(((key, entry) for key, entry in merged if key[0] == operation), key=lambda item: item[1]["sum"])
+            lines.append(f"   → {operation}: '{phase}' takes the most time")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        with self.lock:
+            series = [
+                {
+                    "operation": operation, "vendor": vendor, "phase": phase,
+                    "count": entry["count"], "sum": entry["sum"], "mean": entry["sum"] / entry["count"], "max": entry["max"],
+                    "p50": self._quantile(entry, 0.50), "p95": self._quantile(entry, 0.95), "p99": self._quantile(entry, 0.99),
+                    "buckets": dict(zip([str(bound) for bound in self.buckets], self._cumulative(entry["counts"]))),
+                }
+                for (operation, vendor, phase), entry in sorted(self.series.items())
+            ]
+        return {"generated": datetime.now().isoformat(timespec="seconds"), "buckets": list(self.buckets), "series": series}
+
+    def to_prometheus(self):
+        lines = [
+            f"# HELP {METRIC} Time spent per device in each phase of an operation",
+            f"# TYPE {METRIC} histogram",
+        ]
+        with self.lock:
+            for (operation, vendor, phase), entry in sorted(self.series.items()):
+                labels = f'operation="{operation}",vendor="{vendor}",phase="{phase}"'
+                for bound, cumulative in zip(self.buckets, self._cumulative(entry["counts"])):
+                    lines.append(f'{METRIC}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC}_bucket{{{labels},le="+Inf"}} {entry["count"]}')
+                lines.append(f"{METRIC}_sum{{{labels}}} {entry['sum']:.6f}")
+                lines.append(f"{METRIC}_count{{{labels}}} {entry['count']}")
+        lines += [
+            f"# HELP {METRIC}_last_run_timestamp Unix time when these timings were written",
+            f"# TYPE {METRIC}_last_run_timestamp gauge",
+            f"{METRIC}_last_run_timestamp {time.time():.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export(self, prefix="phase_timings"):
+        # Writes <prefix>.json and <prefix>.prom; each file is replaced in one step, so the
+        # textfile collector never reads a half-written file
+        paths = []
+        for path, text in ((f"{prefix}.json", json.dumps(self.to_dict(), indent=2)), (f"{prefix}.prom", self.to_prometheus())):
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "w") as file:
+                file.write(text)
+            os.replace(temp_path, path)
+            paths.append(path)
+        return paths
@@ -0,0 +1,205 @@
+# Hierarchical Token-Bucket Rate Limits per Vendor, Site / Tag and Globally
+
+# Introduction
+# - max_workers only limits how many sessions are open, not how fast new logins start. A burst of
+#   logins trips TACACS/RADIUS rate limits and the vty limits of some platforms.
+# - A token bucket allows 'rate' logins per second on average and up to 'burst' at once.
+#   Buckets can be set:
+#     globally                → global:20            (all devices together)
+#     per value of a column   → device_type=cisco_xr:2, site=lon:5, aaa_server=tacacs1:10
+#     per every value         → site=*:5             (one bucket for each site)
+#   A rule for one value wins over the '*' rule of the same column (site=*:5 with site=lon:1).
+#   A device may only log in when EVERY bucket that applies to it has a token (hierarchical limits).
+# - Workers are never idle because of one bucket: LimitedDevices hands out the next device whose
+#   buckets all have a token. Devices that must wait are parked (up to 'lookahead' of them) and
+#   handed out in their original order as soon as their buckets refill.
+# - The columns used by the rules are read from the inventory (iter_devices(..., tag_columns=...)).
+# - Every login takes a token, not only the first one: a retry (circuit_breaker.py) or an extra session
+#   of the same device calls limiter.acquire(device) / acquire_async(device) first, which waits for a
+#   token of every bucket of that device.
+#
+# Usage (in a runner):
+#   limiter = RateLimiter(["global:20", "device_type=cisco_xr:2", "site=*:5:10"])
+#   devices = limiter.schedule(iter_devices("devices.csv", tag_columns=limiter.columns))
+#   device = await devices.next_async()     # or devices.next() in threads; None when all are handed out
+#   print(limiter.summary())
+
+# Step 1: Import Required Modules
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+# Step 2: Define the Token Bucket
+class TokenBucket:
+    def __init__(self, name, rate, burst=None):
+        self.name = name
+        self.rate = rate                                  # Tokens (logins) per second
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.taken = 0
+
+    def refill(self, now):
+        # 'now' can be a little older than 'updated' when the bucket was created after it was read
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now):
+        # Seconds until one token is available (0 = available now)
+        self.refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+def parse_rule(text):
+    # "global:20", "device_type=cisco_xr:2", "site=*:5:10" → (column or None, value, rate, burst or None)
+    scope, _, numbers = text.partition(":")
+    values = numbers.split(":")
+    if not numbers or len(values) > 2:
+        raise ValueError(f"expected global:RATE[:BURST] or COLUMN=VALUE:RATE[:BURST], got {text!r}")
+    rate, burst = float(values[0]), float(values[1]) if len(values) == 2 else None
+    if scope == "global":
+        return None, None, rate, burst
+    column, _, value = scope.partition("=")
+    if not column or not value:
+        raise ValueError(f"expected COLUMN=VALUE in {text!r}")
+    return column, value, rate, burst
+
+
+# Step 3: Define the RateLimiter (all buckets, and which ones apply to a device)
+class RateLimiter:
+    def __init__(self, rules):
+        self.rules = [parse_rule(rule) if isinstance(rule, str) else rule for rule in rules]
+        self.columns = sorted({column for column, _, _, _ in self.rules if column and column != "device_type"})
+        self.explicit = {(column, value) for column, value, _, _ in self.rules if column and value != "*"}
+        self.buckets = {}  # (column, value) → TokenBucket
+        self.lock = threading.Lock()
+        self.deferred = 0  # Devices that had to be parked at least once
+
+    def _value(self, device, column):
+        if column == "device_type":
+            return device.device_type
+        return (device.tags or {}).get(column)
+
+    def buckets_for(self, device):
+        buckets = []
+        for column, value, rate, burst in self.rules:
+            if column is None:
+                key, name = ("global", None), "global"
+            else:
+                actual = self._value(device, column)
+                if actual is None or actual != value and (value != "*" or (column, actual) in self.explicit):
+                    continue
+                key, name = (column, actual), f"{column}={actual}"
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(name, rate, burst)
+            buckets.append(bucket)
+        return tuple(buckets)
+
+    def try_take(self, buckets, now):
+        # Takes one token from every bucket, or none at all; returns the seconds to wait (0 = taken)
+        wait = max((bucket.wait_time(now) for bucket in buckets), default=0.0)
+        if wait == 0:
+            for bucket in buckets:
+                bucket.tokens -= 1
+                bucket.taken += 1
+        return wait
+
+    def acquire(self, device):
+        # For threads: blocks until one token is taken from every bucket of 'device'
+        while True:
+            with self.lock:
+                wait = self.try_take(self.buckets_for(device), time.monotonic())
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, device):
+        while True:
+            with self.lock:
+                wait = self.try_take(self.buckets_for(device), time.monotonic())
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    def schedule(self, devices, lookahead=1000):
+        return LimitedDevices(self, devices, lookahead)
+
+    def summary(self):
+        lines = [f"🚦 Rate limits: {self.deferred} devices waited for a token"]
+        for bucket in sorted(self.buckets.values(), key=lambda bucket: bucket.name):
+            lines.append(f"   {bucket.name:<32} {bucket.rate:g}/s (burst {bucket.burst:g}): {bucket.taken} logins")
+        return "\n".join(lines)
+
+
+# Step 4: Hand Out Devices in Inventory Order, Skipping Ahead Past Devices that Must Wait
+class LimitedDevices:
+    def __init__(self, limiter, devices, lookahead=1000):
+        self.limiter = limiter
+        self.source = iter(devices)
+        self.lookahead = lookahead
+        self.parked = {}      # Bucket tuple → deque of devices waiting for exactly those buckets
+        self.parked_count = 0
+        self.exhausted = False
+
+    def take(self):
+        # Non-blocking: (device, 0) when one may log in now, (None, seconds) when all must wait,
+        # (None, None) when every device has been handed out
+        with self.limiter.lock:
+            now = time.monotonic()
+            shortest = None
+            for buckets, waiting in list(self.parked.items()):
+                wait = self.limiter.try_take(buckets, now)
+                if wait == 0:
+                    device = waiting.popleft()
+                    if not waiting:
+                        del self.parked[buckets]
+                    self.parked_count -= 1
+                    return device, 0
+                shortest = wait if shortest is None else min(shortest, wait)
+
+            while not self.exhausted and self.parked_count < self.lookahead:
+                device = next(self.source, None)
+                if device is None:
+                    self.exhausted = True
+                    break
+                buckets = self.limiter.buckets_for(device)
+                if buckets not in self.parked:
+                    wait = self.limiter.try_take(buckets, now)
+                    if wait == 0:
+                        return device, 0
+                    shortest = wait if shortest is None else min(shortest, wait)
+                # Same buckets as devices already waiting: queue behind them to keep the order
+                self.parked.setdefault(buckets, deque()).append(device)
+                self.parked_count += 1
+                self.limiter.deferred += 1
+
+            if not self.parked:
+                return None, None
+            return None, shortest if shortest is not None else 0.01
+
+    def next(self):
+        # For threads: blocks until a device may log in, None when all are handed out
+        while True:
+            device, wait = self.take()
+            if device is not None or wait is None:
+                return device
+            time.sleep(wait)
+
+    async def next_async(self):
+        while True:
+            device, wait = self.take()
+            if device is not None or wait is None:
+                return device
+            await asyncio.sleep(wait)
+
+    def __iter__(self):
+        # Everything not handed out yet, without rate limiting (e.g. to report "Not reached" devices)
+        for waiting in self.parked.values():
+            yield from waiting
+        self.parked.clear()
+        self.parked_count = 0
+        yield from self.source
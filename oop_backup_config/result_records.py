@@ -0,0 +1,173 @@
+# Structured Backup Result Records, Streamed to a JSONL File
+
+# Introduction
+# - The runners used to decide success with "backup saved to" in result: a substring check on the
+#   line printed to the console, and the only summary was a few counters.
+# - backup_config() and friends now return a BackupResult record:
+#     host, vendor, status, error_class, bytes, timings, path (+ the console message)
+#   status is one of ok, unchanged (change probe), skipped (circuit breaker), not_reached (run deadline)
+#   or failed. str(result) is still the console line, so printing a result looks the same as before.
+# - ResultWriter appends one compact JSON line per result to a JSONL file as soon as the result is in:
+#     {"host": "route-views.routeviews.org", "vendor": "Cisco", "status": "ok", "bytes": 2567,
+#      "timings": {"connect": 0.081, ...}, "path": "backups/3f/...", "run": "2025-06-27_01-53-00", "time": ...}
+#   Downstream tools can 'tail -f' it and aggregate tens of thousands of results without parsing console text.
+# - ResultSummary counts a stream of records (status, error classes, bytes) without keeping them;
+#   'python result_records.py summary results.jsonl' does the same for a file.
+#
+# Usage (in a runner):
+#   writer = ResultWriter("results.jsonl", run_id=journal.run_id)
+#   result = device.backup_config()
+#   writer.write(result)
+#   writer.close()
+#
+#   python result_records.py summary results.jsonl
+#   python result_records.py summary results.jsonl --run 2025-06-27_01-53-00 --hosts failed
+
+# Step 1: Import Required Modules
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+
+STATUSES = ("ok", "unchanged", "skipped", "not_reached", "failed")
+
+
+# Step 2: Define the BackupResult Record
+class BackupResult:
+    __slots__ = ("host", "vendor", "status", "error_class", "bytes", "timings", "path", "message", "time")
+
+    def __init__(self, host, vendor, status, message, error_class=None, bytes=None, timings=None, path=None):
+        self.host = host
+        self.vendor = vendor
+        self.status = status
+        self.message = message          # The console line, e.g. "Cisco: host backup saved to file.txt"
+        self.error_class = error_class  # Exception class name of a failure, e.g. "TimeoutError"
+        self.bytes = bytes              # Output size (for 'unchanged': the size of the last backup)
+        self.timings = timings          # {phase: seconds}
+        self.path = path                # Output file, store or archive entry
+        self.time = time.time()
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"BackupResult(host={self.host!r}, status={self.status!r}, path={self.path!r})"
+
+    @property
+    def ok(self):
+        # A current backup exists: written now, or unchanged since the last one
+        return self.status in ("ok", "unchanged")
+
+    def to_dict(self):
+        # Compact: empty fields are left out, timings rounded to the millisecond
+        record = {"host": self.host, "vendor": self.vendor, "status": self.status}
+        if self.error_class:
+            record["error_class"] = self.error_class
+        if self.bytes is not None:
+            record["bytes"] = self.bytes
+        if self.timings:
+            record["timings"] = {phase: round(seconds, 3) for phase, seconds in self.timings.items()}
+        if self.path:
+            record["path"] = self.path
+        record["message"] = self.message[-300:]
+        record["time"] = round(self.time, 3)
+        return record
+
+
+# Step 3: Stream Records to a JSONL File
+class ResultWriter:
+    def __init__(self, path="results.jsonl", run_id=None, flush_interval=1.0):
+        self.path = path
+        self.run_id = run_id
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.file = open(path, "a", buffering=1024 * 1024)
+        self.flushed = time.monotonic()
+        self.written = 0
+
+    def write(self, result):
+        # A few hundred bytes into the buffer: cheap enough for worker threads and the event loop.
+        # The buffer goes to the file at least every 'flush_interval' seconds, so 'tail -f' keeps up.
+        record = result.to_dict()
+        if self.run_id:
+            record["run"] = self.run_id
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.written += 1
+            now = time.monotonic()
+            if now - self.flushed >= self.flush_interval:
+                self.file.flush()
+                self.flushed = now
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+# Step 4: Aggregate Records Without Keeping Them
+class ResultSummary:
+    def __init__(self):
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.vendors = Counter()
+        self.bytes = 0
+
+    def add(self, result):
+        # A BackupResult or a dict read from a JSONL file
+        if isinstance(result, dict):
+            status, vendor, error_class, size = result["status"], result.get("vendor"), result.get("error_class"), result.get("bytes")
+        else:
+            status, vendor, error_class, size = result.status, result.vendor, result.error_class, result.bytes
+        self.statuses[status] += 1
+        self.vendors[vendor] += 1
+        if error_class:
+            self.errors[error_class] += 1
+        if status == "ok":
+            self.bytes += size or 0
+        return self
+
+    def lines(self, top=5):
+        lines = ["📊 Results: " + ", ".join(f"{self.statuses[status]} {status}" for status in STATUSES
+                                             if self.statuses[status]) + f", {self.bytes / 1024 / 1024:.1f} MB written"]
+        if self.errors:
+            lines.append("   Top errors: " + ", ".join(f"{name} ×{count}" for name, count in self.errors.most_common(top)))
+        return lines
+
+    def summary(self, top=5):
+        return "\n".join(self.lines(top))
+
+
+def read_results(path, run_id=None):
+    # Yields one dict per line; a line cut off by a crash is skipped
+    with open(path) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if run_id is None or record.get("run") == run_id:
+                yield record
+
+
+# Step 5: Command-Line Summary of a Results File
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a JSONL results file")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    summary_parser = subparsers.add_parser("summary", help="Counts per status and error class")
+    summary_parser.add_argument("path")
+    summary_parser.add_argument("--run", help="Only this run id", metavar="")
+    summary_parser.add_argument("--hosts", choices=STATUSES, help="Also list the hosts with this status", metavar="")
+    args = parser.parse_args()
+
+    summary = ResultSummary()
+    hosts = []
+    for record in read_results(args.path, args.run):
+        summary.add(record)
+        if args.hosts and record["status"] == args.hosts:
+            hosts.append(f"   {record['host']:<40} {record.get('error_class', '')}")
+    print(summary.summary(top=10))
+    if hosts:
+        print(f"{args.hosts}:")
+        print("\n".join(hosts))
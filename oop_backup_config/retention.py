@@ -0,0 +1,273 @@
+# Tiered (Grandfather-Father-Son) Retention and Background Compaction of Old Backups
+
+# Introduction
+# - Nothing ever deleted the timestamped .txt outputs of the backup, version collector and
+#   polymorphism scripts, so the backup directory only grows.
+# - A retention policy keeps, for every host and command:
+#     * every output of the last 48 hours                  (son)
+#     * the newest output of each day for 30 days           (father)
+#     * the newest output of each month for 12 months       (grandfather)
+#   Everything older, or not picked by a tier, is deleted. The newest output of a host is always kept,
+#   however old it is (a device that was down for a month still has its last backup).
+# - Kept outputs that left the 48-hour tier are compressed (gzip, .txt.gz) to save more space; the
+#   newest output stays plain text, so the change probe and 'backup_layout.py latest' read it as before.
+# - Outputs in the backup layout (backup_layout.py) are found through its index, one host at a time.
+#   Flat directories of old {host}_{command}_{timestamp}.txt files (e.g. from polymorphism.py) can be
+#   cleaned too (--flat).
+# - RetentionWorker runs in a background thread at the lowest CPU priority (Linux) and pauses
+#   between small batches, so a backup run next to it never waits for it: the collection path only
+#   writes new files and index rows, which retention never touches.
+# - The summary reports how many bytes were reclaimed.
+#
+# Usage:
+#   python retention.py --root backups --policy 48h,30d,12m --dry-run
+#   python retention.py --root backups --flat ../polymorphism --flat ../abstraction
+#   In a runner: retention = RetentionWorker("backups", parse_policy("48h,30d,12m")).start()
+#                ... backups ...
+#                retention.stop(); print(retention.summary())
+
+# Step 1: Import Required Modules
+import argparse
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from backup_layout import parse_filename
+from backup_store import parse_timestamp
+
+
+# Step 2: Define the Retention Policy
+class RetentionPolicy:
+    def __init__(self, keep_all_hours=48, daily_days=30, monthly_months=12):
+        self.keep_all = timedelta(hours=keep_all_hours)
+        self.daily = timedelta(days=daily_days)
+        self.monthly = timedelta(days=monthly_months * 31)
+
+    def __str__(self):
+        return (f"all for {self.keep_all.total_seconds() / 3600:g}h, daily for {self.daily.days}d, "
+                f"monthly for {self.monthly.days // 31} months")
+
+    def select(self, outputs, now):
+        # 'outputs' are (timestamp, ...) tuples of one host and command, newest first.
+        # Returns (keep, compress, prune): 'compress' are kept outputs older than the keep-all tier.
+        keep, compress, prune = [], [], []
+        seen = set()  # Days and months that already have a kept output
+        for index, output in enumerate(outputs):
+            timestamp = output[0]
+            age = now - timestamp
+            day, month = timestamp.strftime("%Y-%m-%d"), timestamp.strftime("%Y-%m")
+            if index == 0 or age <= self.keep_all:
+                kept = True
+            elif age <= self.daily:
+                kept = day not in seen
+            elif age <= self.monthly:
+                kept = month not in seen
+            else:
+                kept = False
+            if not kept:
+                prune.append(output)
+                continue
+            seen.update((day, month))
+            keep.append(output)
+            if index > 0 and age > self.keep_all:
+                compress.append(output)
+        return keep, compress, prune
+
+
+def parse_policy(text):
+    # "48h,30d,12m" → keep all for 48 hours, daily for 30 days, monthly for 12 months
+    try:
+        hours, days, months = (part.strip() for part in text.split(","))
+        if not (hours.endswith("h") and days.endswith("d") and months.endswith("m")):
+            raise ValueError
+        return RetentionPolicy(float(hours[:-1]), int(days[:-1]), int(months[:-1]))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected HOURSh,DAYSd,MONTHSm (e.g. 48h,30d,12m), got {text!r}")
+
+
+def compress_file(path):
+    # Returns (new path, bytes saved); the .gz file is complete before the original is removed
+    gz_path = f"{path}.gz"
+    temp_path = f"{gz_path}.tmp"
+    with open(path, "rb") as source, gzip.open(temp_path, "wb", compresslevel=6) as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    os.replace(temp_path, gz_path)
+    saved = os.path.getsize(path) - os.path.getsize(gz_path)
+    os.remove(path)
+    return gz_path, saved
+
+
+def lower_priority():
+    # Lowest CPU priority for the calling thread (on Linux every thread has its own nice value)
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass  # Not available (e.g. Windows): the pauses between batches still keep it in the background
+
+
+# Step 3: Define the RetentionWorker (one pass, or repeated every 'interval' seconds, in a thread)
+class RetentionWorker:
+    def __init__(self, root="backups", policy=None, flat_dirs=(), interval=None, batch_size=50, pause=0.05,
+                 dry_run=False):
+        self.root = root
+        self.policy = policy or RetentionPolicy()
+        self.flat_dirs = list(flat_dirs)
+        self.interval = interval      # None = one pass
+        self.batch_size = batch_size  # File operations between two pauses
+        self.pause = pause
+        self.dry_run = dry_run
+        self.stopped = threading.Event()
+        self.thread = None
+        self.operations = 0
+        self.passes = 0
+        self.pruned = self.compressed = 0
+        self.pruned_bytes = self.compressed_bytes = 0  # Bytes reclaimed by deleting / by compressing
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="retention", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        # Finishes the current file operation and returns; the next pass picks up the rest
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        lower_priority()
+        while not self.stopped.is_set():
+            self.run_once()
+            if self.interval is None or self.stopped.wait(self.interval):
+                return
+
+    def _step(self):
+        # Called after every file operation: a short pause every batch_size operations
+        self.operations += 1
+        if self.operations % self.batch_size == 0:
+            self.stopped.wait(self.pause)
+        return not self.stopped.is_set()
+
+    def run_once(self):
+        now = datetime.now()
+        if os.path.exists(os.path.join(self.root, "index.db")):
+            self._clean_layout(now)
+        for directory in self.flat_dirs:
+            self._clean_flat(directory, now)
+        self.passes += 1
+
+    def _clean_layout(self, now):
+        db = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=60)
+        db.execute("PRAGMA synchronous=NORMAL")
+        try:
+            groups = db.execute("SELECT host, command FROM latest ORDER BY host, command").fetchall()
+            for host, command in groups:
+                rows = db.execute("SELECT timestamp, path FROM history WHERE host = ? AND command = ? "
+                                  "ORDER BY timestamp DESC", (host, command)).fetchall()
+                outputs = [(parse_timestamp(timestamp), timestamp, path) for timestamp, path in rows]
+                _, compress, prune = self.policy.select(outputs, now)
+                # Files first, without holding the index lock; then one short write transaction
+                # per host and command, so the collection path never waits on retention
+                deleted, moved = [], []
+                running = True
+                for _, timestamp, path in prune:
+                    self.pruned_bytes += self._delete(path)
+                    self.pruned += 1
+                    deleted.append((host, command, timestamp))
+                    if not self.dry_run:
+                        self._remove_empty_dirs(os.path.dirname(path))
+                    if not (running := self._step()):
+                        break
+                for _, timestamp, path in compress if running else ():
+                    if path.endswith(".gz") or self.dry_run or not os.path.exists(path):
+                        continue
+                    gz_path, saved = compress_file(path)
+                    self.compressed += 1
+                    self.compressed_bytes += saved
+                    moved.append((gz_path, host, command, timestamp))
+                    if not (running := self._step()):
+                        break
+                if not self.dry_run:
+                    with db:
+                        db.executemany("DELETE FROM history WHERE host = ? AND command = ? AND timestamp = ?", deleted)
+                        db.executemany("UPDATE history SET path = ? WHERE host = ? AND command = ? AND timestamp = ?", moved)
+                if not running:
+                    return
+        finally:
+            db.close()
+
+    def _clean_flat(self, directory, now):
+        groups = {}
+        for path in glob.glob(os.path.join(directory, "*_*.txt")) + glob.glob(os.path.join(directory, "*_*.txt.gz")):
+            try:
+                host, command, timestamp = parse_filename(path.removesuffix(".gz"))
+            except ValueError:
+                continue  # Not a timestamped output
+            groups.setdefault((host, command), []).append((parse_timestamp(timestamp), path))
+        for outputs in groups.values():
+            outputs.sort(reverse=True)
+            _, compress, prune = self.policy.select(outputs, now)
+            for _, path in prune:
+                self.pruned_bytes += self._delete(path)
+                self.pruned += 1
+                if not self._step():
+                    return
+            for _, path in compress:
+                if path.endswith(".gz") or self.dry_run:
+                    continue
+                _, saved = compress_file(path)
+                self.compressed += 1
+                self.compressed_bytes += saved
+                if not self._step():
+                    return
+
+    def _delete(self, path):
+        try:
+            size = os.path.getsize(path)
+            if not self.dry_run:
+                os.remove(path)
+            return size
+        except FileNotFoundError:
+            return 0  # Already gone: only the index row is removed
+
+    def _remove_empty_dirs(self, directory):
+        # Day, month and year directories of the layout that became empty. Pruned outputs are older than
+        # the keep-all tier, so a backup running now never writes into these directories.
+        root = os.path.abspath(self.root)
+        directory = os.path.abspath(directory)
+        for _ in range(3):
+            if os.path.dirname(directory) == root:
+                return  # Never remove the fan-out level
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return  # Not empty
+            directory = os.path.dirname(directory)
+
+    def summary(self):
+        reclaimed = (self.pruned_bytes + self.compressed_bytes) / 1024 / 1024
+        verb = "would be reclaimed" if self.dry_run else "reclaimed"
+        return (f"🧹 Retention ({self.policy}): {self.pruned} outputs pruned, {self.compressed} compressed, "
+                f"{reclaimed:.1f} MB {verb}")
+
+
+# Step 4: Run One Retention Pass from the Command Line
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete and compress old backups (grandfather-father-son)")
+    parser.add_argument("--root", default="backups", help="Backup layout directory (default: backups)", metavar="")
+    parser.add_argument("--policy", type=parse_policy, default=RetentionPolicy(),
+                        help="HOURSh,DAYSd,MONTHSm: keep all, daily, monthly (default: 48h,30d,12m)", metavar="")
+    parser.add_argument("--flat", action="append", default=[], help="Also clean a directory of flat .txt outputs (repeatable)", metavar="")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    worker = RetentionWorker(args.root, args.policy, args.flat, dry_run=args.dry_run)
+    lower_priority()
+    worker.run_once()
+    print(worker.summary())
+    print(f"⏱️ Total execution time: {time.time() - start_time:.2f} seconds")
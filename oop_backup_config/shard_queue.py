@@ -0,0 +1,290 @@
+# Consistent-Hash Sharding and a SQLite Work Queue for Multi-Process / Multi-Node Backups
+
+# Introduction
+# - One Python process with a thread pool (or one event loop) is the ceiling of the other runners.
+# - Here the inventory is loaded once into a SQLite file (the work queue). Any number of worker
+#   processes, on this machine or on other machines that share the file, back up devices from it.
+# - Which worker backs up which device is decided by a consistent-hash ring over the live workers:
+#     * every hostname and every worker (128 virtual nodes each) gets a point on a 63-bit ring,
+#     * a device belongs to the first worker point at or after its own point.
+#   Adding a worker only moves the devices that fall into its new ranges (about 1/N of them),
+#   the rest of the devices keep their worker.
+# - Workers send a heartbeat and store their 'lease' in the queue file. When a worker stops sending
+#   it for its lease seconds, it drops out of the ring: its ranges (its shard) go to the other workers,
+#   and the devices it had claimed but not finished are put back as pending, so they are backed up
+#   by someone else.
+# - Claiming and recording results are short transactions (BEGIN IMMEDIATE), so two workers can never
+#   claim the same device. Results are written in batches together with the next claim.
+#
+# Note: the queue file holds the inventory, credentials included (like devices.csv). SQLite on a
+# network filesystem needs working file locks (NFSv4, SMB); otherwise run the workers on one machine.
+#
+# Usage:
+#   queue = WorkQueue("work_queue.sqlite")
+#   queue.enqueue(rows)                      # dicts with hostname, username, password, device_type, ...
+#   worker = queue.worker("node1-w1")        # Registers and starts the heartbeat
+#   for device in worker.claim():            # This worker's next batch
+#       worker.record(device.hostname, device.backup_config())
+#   worker.close()
+#   print(queue.summary())
+#   In asyncio: run_backups(worker.stream(), ...)   # Claims run in a thread, never on the event loop
+
+# Step 1: Import Required Modules
+import asyncio
+import bisect
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import deque
+from checkpoint_journal import result_status
+from network_devices import get_device_class
+
+RING_SIZE = 2 ** 63  # Points fit in a signed 64-bit SQLite INTEGER
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    hostname TEXT PRIMARY KEY, device_type TEXT, username TEXT, password TEXT, host TEXT, port INTEGER,
+    point INTEGER, status TEXT DEFAULT 'pending', worker TEXT, attempts INTEGER DEFAULT 0,
+    claimed REAL, finished REAL, result TEXT
+);
+CREATE INDEX IF NOT EXISTS devices_status_point ON devices (status, point);
+CREATE TABLE IF NOT EXISTS workers (name TEXT PRIMARY KEY, started REAL, heartbeat REAL, finished REAL, lease REAL);
+"""
+
+
+# Step 2: The Consistent-Hash Ring
+def hash_point(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big") % RING_SIZE
+
+
+class HashRing:
+    def __init__(self, nodes, vnodes=128):
+        self.points = sorted((hash_point(f"{node}#{index}"), node) for node in nodes for index in range(vnodes))
+        self.keys = [point for point, _ in self.points]
+
+    def owner(self, point):
+        if not self.points:
+            return None
+        index = bisect.bisect_left(self.keys, point)
+        return self.points[index % len(self.points)][1]
+
+    def ranges(self, node):
+        # Inclusive (low, high) point ranges that belong to 'node'
+        ranges = []
+        for index, (point, owner) in enumerate(self.points):
+            if owner != node:
+                continue
+            low = self.points[index - 1][0] + 1 if index else 0
+            ranges.append((low, point))
+            if index == 0 and self.points[-1][0] < RING_SIZE - 1:
+                ranges.append((self.points[-1][0] + 1, RING_SIZE - 1))  # Wraps around the end of the ring
+        return ranges
+
+
+# Step 3: The SQLite Work Queue
+class WorkQueue:
+    def __init__(self, path="work_queue.sqlite", lease=30.0, vnodes=128):
+        self.path = path
+        self.lease = lease      # Seconds without a heartbeat before a worker counts as dead (stored per worker)
+        self.vnodes = vnodes
+        self.db = self.connect()
+        self.db.executescript(SCHEMA)
+        if "lease" not in [row[1] for row in self.db.execute("PRAGMA table_info(workers)")]:
+            self.db.execute("ALTER TABLE workers ADD COLUMN lease REAL")  # Queue files of older versions
+
+    def connect(self):
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def enqueue(self, rows, reset=True, on_unknown=print):
+        # Loads the inventory; reset=True starts a new run (old results and workers are removed)
+        def records():
+            for row in rows:
+                if get_device_class(row["device_type"]) is None:
+                    if on_unknown:
+                        on_unknown(f"Skipping unknown device type: {row['device_type']}")
+                    continue
+                yield (row["hostname"], row["device_type"], row["username"], row["password"],
+                       row.get("host") or None, int(row["port"]) if row.get("port") else None, hash_point(row["hostname"]))
+
+        self.db.execute("BEGIN IMMEDIATE")
+        if reset:
+            self.db.execute("DELETE FROM devices")
+            self.db.execute("DELETE FROM workers")
+        self.db.executemany("INSERT OR IGNORE INTO devices (hostname, device_type, username, password, host, port, point) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)", records())
+        self.db.execute("COMMIT")
+        return self.db.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+
+    def live_workers(self, db=None):
+        # Every worker is judged by the lease it registered with, so 'summary' (or a worker started
+        # with another --lease) sees the same live workers as the workers themselves
+        db = db or self.db
+        rows = db.execute("SELECT name FROM workers WHERE finished IS NULL AND heartbeat + COALESCE(lease, ?) >= ?",
+                          (self.lease, time.time()))
+        return sorted(name for name, in rows)
+
+    def counts(self):
+        return dict(self.db.execute("SELECT status, COUNT(*) FROM devices GROUP BY status").fetchall())
+
+    def worker(self, name, batch_size=50):
+        return ShardWorker(self, name, batch_size)
+
+    def moved_devices(self, workers, new_worker):
+        # How many devices of the queue change owner when 'new_worker' joins 'workers'
+        before = HashRing(workers, self.vnodes)
+        after = HashRing(workers + [new_worker], self.vnodes)
+        total = moved = 0
+        per_worker = {}
+        for point, in self.db.execute("SELECT point FROM devices"):
+            owner = before.owner(point)
+            per_worker[owner] = per_worker.get(owner, 0) + 1
+            moved += owner != after.owner(point)
+            total += 1
+        return total, moved, per_worker
+
+    def summary(self):
+        # One merged report for all workers of the run
+        counts = self.counts()
+        total = sum(counts.values())
+        first, last, reclaimed = self.db.execute(
+            "SELECT MIN(claimed), MAX(finished), SUM(attempts > 1) FROM devices").fetchone()
+        lines = [
+            f"✅ Successful backups: {counts.get('ok', 0)}",
+            f"❌ Failed backups: {counts.get('failed', 0)}",
+        ]
+        if counts.get("pending") or counts.get("running"):
+            lines.append(f"⏳ Not finished: {counts.get('pending', 0)} pending, {counts.get('running', 0)} running")
+        lines.append(f"♻️ Devices reclaimed from dead workers: {reclaimed or 0}")
+        if first and last:
+            lines.append(f"⏱️ Total execution time: {last - first:.2f} seconds ({total / (last - first):.1f} devices/s)")
+        lines.append(f"   {'Worker':<28} {'Devices':>8} {'OK':>8} {'Rate':>10}  State")
+        alive = set(self.live_workers())
+        rows = self.db.execute("""
+            SELECT w.name, w.finished, COUNT(d.hostname), SUM(d.status = 'ok'), MIN(d.claimed), MAX(d.finished)
+            FROM workers w LEFT JOIN devices d ON d.worker = w.name AND d.status NOT IN ('pending', 'running')
+            GROUP BY w.name ORDER BY w.name""")
+        for name, finished, done, ok, started, ended in rows:
+            rate = f"{done / (ended - started):.1f}/s" if done and ended > started else "-"
+            state = "finished" if finished else "running" if name in alive else "dead"
+            lines.append(f"   {name:<28} {done:>8} {ok or 0:>8} {rate:>10}  {state}")
+        return "\n".join(lines)
+
+
+# Step 4: One Worker - Heartbeat, Claim its Shard, Record Results
+class ShardWorker:
+    def __init__(self, queue, name, batch_size=50):
+        self.queue = queue
+        self.name = name
+        self.batch_size = batch_size
+        self.db = queue.connect()
+        self.results = []  # (status, result, finished, hostname) waiting to be written
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        now = time.time()
+        self.db.execute("INSERT OR REPLACE INTO workers (name, started, heartbeat, finished, lease) VALUES (?, ?, ?, NULL, ?)",
+                        (name, now, now, queue.lease))
+        self.heartbeat = threading.Thread(target=self._beat, name="heartbeat", daemon=True)
+        self.heartbeat.start()
+
+    def _beat(self):
+        db = self.queue.connect()
+        while not self.stopped.wait(self.queue.lease / 3):
+            db.execute("UPDATE workers SET heartbeat = ? WHERE name = ?", (time.time(), self.name))
+        db.close()
+
+    def record(self, hostname, result):
+        # Same signature as RunJournal.record(), so it can be passed as run_backups(journal=...)
+        with self.lock:
+            self.results.append((result_status(result), str(result)[-300:], time.time(), hostname))
+
+    def _flush(self):
+        with self.lock:
+            results, self.results = self.results, []
+        self.db.executemany("UPDATE devices SET status = ?, result = ?, finished = ? WHERE hostname = ?", results)
+
+    def claim(self):
+        # Writes the finished results, puts back devices of dead workers, then claims up to
+        # batch_size pending devices from this worker's ranges of the ring. Returns device objects.
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self._flush()
+            live = self.queue.live_workers(db)
+            if self.name not in live:
+                live = sorted(live + [self.name])
+            placeholders = ", ".join("?" * len(live))
+            db.execute(f"UPDATE devices SET status = 'pending', worker = NULL "
+                       f"WHERE status = 'running' AND worker NOT IN ({placeholders})", live)
+            claimed = []
+            for low, high in HashRing(live, self.queue.vnodes).ranges(self.name):
+                claimed += db.execute("SELECT hostname, device_type, username, password, host, port FROM devices "
+                                      "WHERE status = 'pending' AND point BETWEEN ? AND ? LIMIT ?",
+                                      (low, high, self.batch_size - len(claimed))).fetchall()
+                if len(claimed) >= self.batch_size:
+                    break
+            db.executemany("UPDATE devices SET status = 'running', worker = ?, claimed = ?, attempts = attempts + 1 "
+                           "WHERE hostname = ?", [(self.name, time.time(), row[0]) for row in claimed])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return [get_device_class(device_type)(hostname=hostname, username=username, password=password, host=host, port=port)
+                for hostname, device_type, username, password, host, port in claimed]
+
+    def devices(self):
+        # Lazy stream of this worker's devices for run_backups(); ends when its shard is empty
+        while True:
+            batch = self.claim()
+            if not batch:
+                return
+            yield from batch
+
+    def stream(self):
+        # The same stream for the asyncio runner (backup_asyncio.run_backups)
+        return ShardStream(self)
+
+    def unfinished(self):
+        # Writes this worker's last results, then counts the devices still pending or running anywhere
+        # (another worker may die and leave its shard to us)
+        self.db.execute("BEGIN IMMEDIATE")
+        self._flush()
+        self.db.execute("COMMIT")
+        return self.db.execute("SELECT COUNT(*) FROM devices WHERE status IN ('pending', 'running')").fetchone()[0]
+
+    def close(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        self._flush()
+        self.db.execute("UPDATE workers SET finished = ? WHERE name = ?", (time.time(), self.name))
+        self.db.execute("COMMIT")
+        self.stopped.set()
+        self.heartbeat.join()
+        self.db.close()
+
+
+# Step 5: The Device Stream of a Worker for asyncio
+class ShardStream:
+    # claim() waits up to 60 s for the queue lock when other workers hold it. Run on the event loop,
+    # that wait would stall every session in flight, so the claims run in a thread; one at a time,
+    # since the worker has one connection and one transaction.
+    def __init__(self, worker):
+        self.worker = worker
+        self.batch = deque()
+        self.finished = False
+        self.lock = None  # asyncio.Lock, created on the running event loop
+
+    async def next_async(self):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if not self.batch and not self.finished:
+                self.batch.extend(await asyncio.to_thread(self.worker.claim))
+                self.finished = not self.batch
+            return self.batch.popleft() if self.batch else None
+
+    def __iter__(self):
+        # Claimed devices not handed out yet (e.g. to report as not reached)
+        while self.batch:
+            yield self.batch.popleft()
@@ -0,0 +1,167 @@
+# Parse 'show bgp summary' and 'show ip interface brief' Outputs
+
+# Introduction
+# - The backups keep these outputs as text (see default_commands of the vendor classes); to compare
+#   neighbor states or interface IPs across the fleet they have to be parsed.
+# - parse_bgp_summary() reads the Cisco table (IOS 'show ip bgp summary', IOS-XR and NX-OS
+#   'show bgp summary') and the Junos 'show bgp summary', including the per-table lines under each
+#   Junos peer, into:
+#     {"router_id": ..., "local_as": ..., "neighbors": [{"neighbor", "remote_as", "up_down", "state", "prefixes"}]}
+#   An established Cisco session shows its prefix count instead of a state: state is then "Established".
+# - parse_interface_brief() reads 'show ip interface brief' (IOS, IOS-XR, NX-OS) and Junos
+#   'show interfaces terse' into [{"interface", "ip", "status", "protocol"}].
+# - Like version_parser.parse_version(), both take only the output text, so parse_cache.py can cache them.
+#
+# Usage:
+#   python show_parsers.py bgp route-server.ip.att.net_juniper_config_20250627-0153.txt
+#   python show_parsers.py interfaces backups/*/*/2025/06/27/*_show_ip_interface_brief_*.txt --cache parse_cache.db
+
+# Step 1: Import Required Modules
+import argparse
+import glob
+import gzip
+import re
+from parse_cache import ParseCache
+
+ROUTER_ID_PATTERN = re.compile(r"BGP router identifier ([^,\s]+)")
+LOCAL_AS_PATTERN = re.compile(r"local AS number (\d+)")
+JUNOS_PEER_PATTERN = re.compile(r"^(\S+)\s+(\d+)\s+\d+\s+\d+\s+\d+\s+\d+\s+(.+?)\s+(\S+)$")
+JUNOS_TABLE_PATTERN = re.compile(r"^\s+\S+: (\d+)/(\d+)/(\d+)/(\d+)")
+
+
+# Step 2: BGP Summary
+def parse_bgp_summary(output):
+    router_id = ROUTER_ID_PATTERN.search(output)
+    local_as = LOCAL_AS_PATTERN.search(output)
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        if line.startswith("Neighbor"):
+            neighbors = _cisco_neighbors(lines[index + 1:])
+            break
+        if line.startswith("Peer") and "InPkt" in line:
+            neighbors = _junos_peers(lines[index + 1:])
+            break
+    else:
+        neighbors = []
+    return {
+        "router_id": router_id.group(1) if router_id else None,
+        "local_as": int(local_as.group(1)) if local_as else None,
+        "neighbors": neighbors,
+    }
+
+
+def _cisco_neighbors(lines):
+    # Neighbor  V/Spk  AS  MsgRcvd  MsgSent  TblVer  InQ  OutQ  Up/Down  State/PfxRcd
+    neighbors = []
+    wrapped = None  # A long IPv6 neighbor address is printed on a line of its own
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 1 and ":" in fields[0]:
+            wrapped = fields[0]
+            continue
+        if wrapped:
+            fields.insert(0, wrapped)
+            wrapped = None
+        if len(fields) < 10 or not fields[2].isdigit():
+            continue
+        state = fields[-1]
+        established = state.isdigit()
+        neighbors.append({
+            "neighbor": fields[0],
+            "remote_as": int(fields[2]),
+            "up_down": fields[-2],
+            "state": "Established" if established else state,
+            "prefixes": int(state) if established else None,
+        })
+    return neighbors
+
+
+def _junos_peers(lines):
+    # Peer  AS  InPkt  OutPkt  OutQ  Flaps  Last Up/Dwn  State|#Active/Received/Accepted/Damped
+    #   inet.0: 977293/977298/977298/0      ← one line per table of an established peer
+    peers = []
+    for line in lines:
+        table = JUNOS_TABLE_PATTERN.match(line)
+        if table and peers:
+            peers[-1]["prefixes"] = (peers[-1]["prefixes"] or 0) + int(table.group(2))  # Received
+            continue
+        peer = JUNOS_PEER_PATTERN.match(line)
+        if peer is None:
+            continue
+        state = peer.group(4)
+        prefixes = None
+        if "/" in state:  # Established, table counts on the same line ('show bgp summary' of older releases)
+            prefixes, state = int(state.split("/")[1]), "Establ"
+        peers.append({
+            "neighbor": peer.group(1),
+            "remote_as": int(peer.group(2)),
+            "up_down": peer.group(3),
+            "state": "Established" if state == "Establ" else state,
+            "prefixes": prefixes,
+        })
+    return peers
+
+
+# Step 3: Interface Brief
+def parse_interface_brief(output):
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        if line.startswith("Interface"):
+            header, rows = line.split(), lines[index + 1:]
+            break
+    else:
+        return []
+    interfaces = []
+    for row in rows:
+        fields = row.split()
+        if not fields:
+            continue
+        if "OK?" in header:  # IOS: Interface IP-Address OK? Method Status Protocol ('administratively down')
+            interface = {"interface": fields[0], "ip": fields[1], "status": " ".join(fields[4:-1]), "protocol": fields[-1]}
+        elif "Admin" in header:  # Junos terse: Interface Admin Link Proto Local Remote
+            ip = fields[4] if len(fields) > 4 and fields[3] == "inet" else None
+            interface = {"interface": fields[0], "ip": ip, "status": fields[1], "protocol": fields[2] if len(fields) > 2 else None}
+        elif len(fields) == 3 and fields[2].count("/") == 2:  # NX-OS: protocol-up/link-up/admin-up
+            protocol, link, _ = (part.split("-", 1)[1] for part in fields[2].split("/"))
+            interface = {"interface": fields[0], "ip": fields[1], "status": link, "protocol": protocol}
+        elif len(fields) >= 4:  # IOS-XR: Interface IP-Address Status Protocol Vrf-Name ('Up', 'Shutdown')
+            interface = {"interface": fields[0], "ip": fields[1], "status": fields[2].lower(), "protocol": fields[3].lower()}
+        else:
+            continue
+        if interface["ip"] == "unassigned":
+            interface["ip"] = None
+        interfaces.append(interface)
+    return interfaces
+
+
+PARSERS = {"bgp": parse_bgp_summary, "interfaces": parse_interface_brief}
+
+
+# Step 4: Parse Saved Outputs from the Command Line
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse saved BGP summary or interface brief outputs")
+    parser.add_argument("kind", choices=sorted(PARSERS), help="bgp or interfaces")
+    parser.add_argument("patterns", nargs="+", help="Output files (glob patterns, .txt or .txt.gz)")
+    parser.add_argument("--cache", help="Parse cache file: unchanged outputs are not parsed again (parse_cache.py)", metavar="")
+    args = parser.parse_args()
+
+    parse = PARSERS[args.kind]
+    cache = None
+    if args.cache:
+        cache = ParseCache(args.cache)
+        parse = cache.cached(parse)
+
+    for path in sorted({path for pattern in args.patterns for path in glob.glob(pattern)}):
+        with (gzip.open if path.endswith(".gz") else open)(path, "rt") as file:
+            result = parse(file.read())
+        if args.kind == "bgp":
+            established = sum(neighbor["state"] == "Established" for neighbor in result["neighbors"])
+            prefixes = sum(neighbor["prefixes"] or 0 for neighbor in result["neighbors"])
+            print(f"{path}: AS {result['local_as']}, {established}/{len(result['neighbors'])} neighbors established, "
+                  f"{prefixes} prefixes received")
+        else:
+            up = sum(interface["protocol"] == "up" for interface in result)
+            print(f"{path}: {up}/{len(result)} interfaces up")
+    if cache:
+        cache.close()
+        print(cache.summary())
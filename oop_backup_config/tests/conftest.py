@@ -0,0 +1,5 @@
+# The scripts in oop_backup_config import each other by module name (they are run from that directory)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+
+from backup_multithreaded_adaptive import AimdController, run_adaptive_backups
+from result_records import BackupResult
+
+
+def run_round(controller, latency=0.1, failed=False):
+    for _ in range(controller.limit):
+        controller.record(latency, failed)
+
+
+def test_slow_start_doubles_once_per_round():
+    controller = AimdController(start=2, maximum=100)
+    controller.record(0.1, False)
+    assert controller.limit == 2  # Half a round: no change yet
+    controller.record(0.1, False)
+    assert controller.limit == 4
+    run_round(controller)
+    assert controller.limit == 8
+
+
+def test_failures_halve_and_end_slow_start():
+    controller = AimdController(start=8, maximum=100)
+    run_round(controller, failed=True)
+    assert controller.limit == 4
+    assert not controller.slow_start
+    run_round(controller)
+    assert controller.limit == 5  # Additive increase after the first back-off
+
+
+def test_rising_latency_halves():
+    controller = AimdController(start=4, maximum=100, latency_factor=2.0)
+    run_round(controller, latency=0.1)
+    assert controller.limit == 8
+    for _ in range(8):
+        controller.record(10.0, False)
+    assert controller.limit == 4
+    assert controller.trajectory[-1][2] == "slow"
+
+
+def test_always_slow_devices_in_a_mixed_fleet_are_not_overload():
+    # 30% of the devices always take 10x longer: the median stays with the fast ones
+    rng = random.Random(1)
+    controller = AimdController(start=5, maximum=100)
+    for _ in range(600):
+        controller.record(1.0 if rng.random() < 0.3 else 0.1, False)
+    assert controller.limit == 100
+    assert all(reason != "slow" for _, _, reason in controller.trajectory)
+
+
+def test_a_permanently_slower_fleet_becomes_the_new_baseline():
+    controller = AimdController(start=8, minimum=1, maximum=100)
+    run_round(controller, latency=0.1)
+    for _ in range(400):
+        controller.record(1.0, False)
+    reasons = [reason for _, _, reason in controller.trajectory]
+    assert "slow" in reasons
+    assert reasons[-1] == "increase"  # Backed off, then grew again at the new latency
+    assert controller.limit > controller.minimum
+
+
+def test_small_limit_backs_off_on_failures():
+    # With a limit of 2, a round has 2 samples: the failure check must not wait for 5 of them
+    controller = AimdController(start=4, minimum=1, maximum=100)
+    run_round(controller, failed=True)
+    run_round(controller, failed=True)
+    assert controller.limit == 1
+
+
+def test_limit_stays_within_bounds():
+    controller = AimdController(start=3, minimum=2, maximum=5)
+    run_round(controller)
+    assert controller.limit == 5
+    run_round(controller)
+    assert controller.limit == 5
+    for _ in range(4):
+        run_round(controller, failed=True)
+    assert controller.limit == 2
+
+
+def test_trajectory_points_all_have_a_reason():
+    controller = AimdController(start=2)
+    run_round(controller)
+    run_round(controller, failed=True)
+    assert controller.trajectory[0] == (0.0, 2, "start")
+    assert all(len(point) == 3 for point in controller.trajectory)
+    assert "(start)" in controller.summary()
+
+
+class FakeDevice:
+    # Counts the backups running at the same time
+    running = peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, hostname):
+        self.hostname = hostname
+        self.vendor = "Fake"
+
+    def backup_config(self, store=None, stream=False, timeouts=None, probe=None):
+        with FakeDevice.lock:
+            FakeDevice.running += 1
+            FakeDevice.peak = max(FakeDevice.peak, FakeDevice.running)
+        time.sleep(0.005)
+        with FakeDevice.lock:
+            FakeDevice.running -= 1
+        return BackupResult(self.hostname, self.vendor, "ok", f"{self.hostname} backup saved")
+
+
+def test_runner_never_exceeds_the_limit():
+    FakeDevice.peak = 0
+    controller = AimdController(start=3, maximum=3)
+    results = run_adaptive_backups((FakeDevice(f"r{i}") for i in range(30)), controller, on_result=None)
+    assert len(results) == 30
+    assert FakeDevice.peak <= 3
+
+
+class StuckDevice(FakeDevice):
+    # Sleeps through abort(), like a thread in a retry backoff or waiting for a login token
+    def backup_config(self, store=None, stream=False, timeouts=None, probe=None):
+        time.sleep(2)
+        return BackupResult(self.hostname, self.vendor, "ok", f"{self.hostname} backup saved")
+
+    def abort(self):
+        pass
+
+    def _not_reached(self, reason):
+        return BackupResult(self.hostname, self.vendor, "not_reached", reason)
+
+
+def test_deadline_does_not_wait_for_stuck_backups():
+    controller = AimdController(start=2, maximum=2)
+    start = time.monotonic()
+    results = run_adaptive_backups((StuckDevice(f"r{i}") for i in range(5)), controller, on_result=None, deadline=0.2)
+    assert time.monotonic() - start < 1
+    assert [result.status for result in results] == ["not_reached"] * 5
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from backup_archive import ArchiveReader, ArchiveWriter
+
+
+@pytest.mark.parametrize("codec", ["gzip", "lzma"])
+def test_outputs_and_streamed_files_can_be_extracted(tmp_path, codec):
+    archive = ArchiveWriter(str(tmp_path / "run.bkar"), codec=codec)
+    archive.save_output("r1", "show version", "Cisco IOS Software\n")
+    streamed = tmp_path / "r2_config.txt"
+    streamed.write_text("line\n" * 300_000)  # Several 1 MB chunks
+    assert archive.save_output_file("r2", "show bgp summary", str(streamed)) == "run.bkar#r2"
+    archive.close()
+
+    assert not streamed.exists()
+    assert os.listdir(tmp_path) == ["run.bkar"]  # The compressed temporary file is gone too
+    reader = ArchiveReader(str(tmp_path / "run.bkar"))
+    assert reader.extract("r1") == "Cisco IOS Software\n"
+    assert reader.extract("r2", "show bgp summary") == "line\n" * 300_000
+    assert reader.find("r2")["size"] == 5 * 300_000
+    reader.close()
+
+
+def test_unclosed_archive_is_rejected(tmp_path):
+    archive = ArchiveWriter(str(tmp_path / "run.bkar"))
+    archive.save_output("r1", "show version", "text")
+    archive.file.flush()
+    with pytest.raises(ValueError):
+        ArchiveReader(str(tmp_path / "run.bkar"))
+    archive.close()
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+
+import pytest
+
+from backup_layout import BackupLayout, parse_filename
+from retention import RetentionWorker
+
+
+def test_two_saves_in_the_same_second_keep_both_outputs(tmp_path):
+    layout = BackupLayout(str(tmp_path / "backups"))
+    first = layout.save("r1", "show version", "first")
+    second = layout.save("r1", "show version", "second")
+    assert first != second
+    assert [open(path).read() for _, _, path, _ in layout.history("r1")] == ["first", "second"]
+    assert layout.latest("r1", "show version")[2] == second
+    layout.close()
+
+
+def test_a_clashing_name_raises_instead_of_overwriting(tmp_path):
+    layout = BackupLayout(str(tmp_path / "backups"))
+    path = layout.save("r1", "show version", "first", "2025-06-27_01-53-00-000000")
+    with pytest.raises(FileExistsError):
+        layout.save("r1", "show version", "second", "2025-06-27_01-53-00-000000")
+    with pytest.raises(sqlite3.IntegrityError):
+        layout.add("r1", "show version", path, "2025-06-27_01-53-00-000000", 6)
+    assert open(path).read() == "first"
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]  # No temporary file left behind
+    layout.close()
+
+
+def test_seconds_timestamps_of_older_indexes_still_work(tmp_path):
+    root = str(tmp_path / "backups")
+    layout = BackupLayout(root)
+    layout.save("r1", "show version", "old", "2020-01-01_00-00-00")
+    layout.save("r1", "show version", "new")
+    new = layout.latest("r1")
+    assert parse_filename(new[2])[2] == new[1]  # The name holds the microseconds of the index row
+    layout.close()
+
+    worker = RetentionWorker(root)
+    worker.run_once()
+    assert worker.pruned == 1  # The old row parsed and was pruned, the new one kept
+    assert [row[2] for row in BackupLayout(root).history("r1")] == [new[2]]
@@ -0,0 +1,62 @@
+import os
+import threading
+
+from backup_pipeline import FetchProcessPipeline, summarize_output
+from result_records import BackupResult
+
+
+class StubDevice:
+    # The part of NetworkDevice the fetch stage uses, without a network
+    command = "show version"
+
+    def __init__(self, hostname):
+        self.hostname = hostname
+
+    def fetch_and_save(self, store=None, timeouts=None):
+        output = f"{self.hostname} uptime is 5 weeks\nline 2\n"
+        filename = f"{self.hostname}.txt"
+        return BackupResult(self.hostname, "Stub", "ok", f"{self.hostname} saved to {filename}", bytes=len(output),
+                            path=filename), output
+
+
+def crash(hostname, command, output):
+    os._exit(1)  # Kills the worker process: the pool becomes a BrokenProcessPool
+
+
+def test_outputs_are_processed_in_worker_processes():
+    pipeline = FetchProcessPipeline(fetch_workers=2, process_workers=1, queue_size=2)
+    results, processed = pipeline.run([StubDevice(f"r{i}") for i in range(6)], on_result=None)
+    assert all(result.ok for result in results)
+    assert sorted(summary["hostname"] for summary in processed) == [f"r{i}" for i in range(6)]
+    assert processed[0] == summarize_output(processed[0]["hostname"], "show version",
+                                            f"{processed[0]['hostname']} uptime is 5 weeks\nline 2\n")
+
+
+def test_broken_process_pool_does_not_block_the_fetch_stage():
+    # More devices than the queue holds: without draining, the fetch threads would wait forever
+    pipeline = FetchProcessPipeline(process_func=crash, fetch_workers=2, process_workers=1, queue_size=2)
+    results, processed = pipeline.run([StubDevice(f"r{i}") for i in range(10)], on_result=None)
+    assert len(results) == 10
+    assert len(processed) == 10
+    assert all("error" in summary for summary in processed)
+    assert {summary["hostname"] for summary in processed} == {f"r{i}" for i in range(10)}
+
+
+def test_failing_result_callback_does_not_hang_the_pipeline():
+    def on_result(result):
+        raise RuntimeError("callback failed")
+
+    errors = []
+
+    def run():
+        pipeline = FetchProcessPipeline(fetch_workers=2, process_workers=1, queue_size=2)
+        try:
+            pipeline.run([StubDevice(f"r{i}") for i in range(10)], on_result=on_result)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive()
+    assert [str(error) for error in errors] == ["callback failed"]
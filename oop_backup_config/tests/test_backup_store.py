@@ -0,0 +1,34 @@
+import os
+import shutil
+import subprocess
+import sys
+
+from backup_store import BackupStore
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_identical_outputs_are_stored_once(tmp_path):
+    store = BackupStore(str(tmp_path / "store"))
+    first = store.save("r1", "show version", "same text", "2025-06-27_01-53-00")
+    second = store.save("r1", "show version", "same text", "2025-06-28_01-53-00")
+    assert first == (first[0], True) and second == (first[0], False)
+    stats = store.stats()
+    assert (stats["backups"], stats["unique_blobs"]) == (2, 1)
+    assert store.latest("r1", "show version")[1] == "2025-06-28_01-53-00"
+    store.close()
+
+
+def test_import_stores_legacy_files_under_their_command(tmp_path):
+    for name in ("route-views.routeviews.org_cisco_config_20250627-0153.txt",
+                 "route-server.ip.att.net_juniper_config_20250627-0153.txt"):
+        shutil.copy(os.path.join(HERE, name), tmp_path)
+    root = str(tmp_path / "store")
+    subprocess.run([sys.executable, os.path.join(HERE, "backup_store.py"), "--root", root, "import", str(tmp_path / "*.txt")],
+                   check=True, capture_output=True)
+
+    store = BackupStore(root)
+    assert store.latest("route-views.routeviews.org", "show version")[1] == "2025-06-27_01-53-00-000000"
+    assert store.latest("route-server.ip.att.net", "show bgp summary") is not None
+    assert store.latest("route-views.routeviews.org", "cisco config") is None
+    store.close()
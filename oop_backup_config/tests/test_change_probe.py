@@ -0,0 +1,84 @@
+import asyncio
+import csv
+import os
+import subprocess
+import sys
+
+import pytest
+
+from backup_layout import BackupLayout
+from change_probe import ChangeProbe
+from fake_telnet_server import FakeDeviceFarm
+from network_devices import get_device_class
+from vendors.cisco_ios import CiscoDevice
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def farm():
+    farm = FakeDeviceFarm(1, platforms=["ios"]).start()
+    yield farm
+    farm.stop()
+
+
+@pytest.fixture
+def layout(tmp_path):
+    layout = BackupLayout(str(tmp_path / "backups"))
+    yield layout
+    layout.close()
+
+
+def make_device(device_class, farm):
+    row = next(farm.inventory())
+    return device_class(row["hostname"], row["username"], row["password"], host=row["host"], port=row["port"])
+
+
+def test_fingerprint_ignores_whitespace_and_rejects_errors():
+    probe = ChangeProbe("unused.json")
+    assert probe.fingerprint("  a \n\n b ") == probe.fingerprint("a\nb")
+    assert probe.fingerprint("") is None
+    assert probe.fingerprint("% Invalid input detected at '^' marker.") is None
+
+
+def test_configuration_backup_is_skipped_until_the_device_changes(farm, layout, tmp_path):
+    probe = ChangeProbe(str(tmp_path / "probe_state.json"))
+    device = make_device(get_device_class("cisco_ios_telnet_config"), farm)
+    assert device.backup_config(layout, probe=probe).status == "ok"
+    assert device.backup_config(layout, probe=probe).status == "unchanged"
+
+    farm.devices[0].config_version += 1
+    result = asyncio.run(device.backup_config_async(store=layout, probe=probe))
+    assert result.status == "ok"
+    with open(result.path) as file:
+        assert "Configuration version 1" in file.read()
+    assert (probe.probed, probe.avoided) == (3, 1)
+
+
+def test_operational_output_is_never_probed(farm, layout, tmp_path):
+    # 'show version' changes with the uptime, without a commit: the probe must not stand in for it
+    probe = ChangeProbe(str(tmp_path / "probe_state.json"))
+    device = make_device(CiscoDevice, farm)
+    assert device.backup_config(layout, probe=probe).status == "ok"
+    assert asyncio.run(device.backup_config_async(store=layout, probe=probe)).status == "ok"
+    assert probe.probed == 0
+    assert probe.hosts == {}
+
+
+def test_runner_skips_the_pull_of_unchanged_devices(tmp_path):
+    farm = FakeDeviceFarm(2, platforms=["ios", "junos"]).start()
+    try:
+        rows = [dict(row, device_type=f"{row['device_type']}_config") for row in farm.inventory()]
+        with open(tmp_path / "inventory.csv", "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        command = [sys.executable, os.path.join(HERE, "backup_asyncio.py"), "--inventory", "inventory.csv",
+                   "--probe", "probe_state.json"]
+        outputs = [subprocess.run(command + ["--run-id", f"run{i}"], cwd=tmp_path, check=True, capture_output=True,
+                                  text=True).stdout for i in range(2)]
+    finally:
+        farm.stop()
+    assert "2 devices probed, 0 full pulls avoided" in outputs[0]
+    assert "2 devices probed, 2 full pulls avoided" in outputs[1]
+    assert "✅ Successful backups: 2" in outputs[1]
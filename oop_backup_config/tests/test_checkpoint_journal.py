@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+import checkpoint_journal
+from checkpoint_journal import RunJournal, read_journal
+from result_records import BackupResult
+
+
+def result(host, status):
+    return BackupResult(host, "Cisco", status, f"{host} {status}")
+
+
+class FrozenClock(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2025, 6, 27, 1, 53, 0)
+
+
+def test_runs_started_in_the_same_second_get_their_own_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint_journal, "datetime", FrozenClock)
+    journals = [RunJournal(str(tmp_path)) for _ in range(3)]
+    for journal in journals:
+        journal.close()
+    assert [journal.run_id for journal in journals] == ["2025-06-27_01-53-00", "2025-06-27_01-53-00-2", "2025-06-27_01-53-00-3"]
+
+
+def test_explicit_run_id_is_never_reused(tmp_path):
+    RunJournal(str(tmp_path), run_id="nightly").close()
+    with pytest.raises(FileExistsError, match="--resume"):
+        RunJournal(str(tmp_path), run_id="nightly")
+
+
+def test_resume_skips_devices_backed_up_before(tmp_path):
+    journal = RunJournal(str(tmp_path), run_id="nightly", flush_interval=0)
+    journal.record("r1", result("r1", "ok"))
+    journal.record("r2", result("r2", "failed"))
+    journal.record("r3", result("r3", "unchanged"))
+    journal.close()
+    assert read_journal(journal.path) == {"r1": "ok", "r2": "failed", "r3": "ok"}
+
+    resumed = RunJournal(str(tmp_path), resume=True)
+    assert resumed.run_id == "nightly"
+
+    class Device:
+        def __init__(self, hostname):
+            self.hostname = hostname
+
+    pending = [device.hostname for device in resumed.pending(Device(f"r{i}") for i in range(1, 5))]
+    resumed.close()
+    assert pending == ["r2", "r4"]
+    assert resumed.resumed == 2
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from circuit_breaker import CircuitBreaker, retry
+from network_devices import AsyncTelnetSession
+from result_records import BackupResult
+
+
+def counting_backup(status, error_class=None):
+    calls = []
+
+    def backup():
+        calls.append(1)
+        return BackupResult("r1", "Cisco", status, "r1", error_class=error_class)
+    return backup, calls
+
+
+@pytest.mark.parametrize("error_class", ["NetmikoAuthenticationException", "PermissionError"])
+def test_rejected_login_is_not_retried(error_class):
+    backup, calls = counting_backup("failed", error_class)
+    assert retry(backup, attempts=3, base_delay=0).status == "failed"
+    assert len(calls) == 1
+
+
+def test_other_failures_are_retried():
+    backup, calls = counting_backup("failed", "TimeoutError")
+    retry(backup, attempts=3, base_delay=0)
+    assert len(calls) == 3
+
+
+def test_breaker_opens_after_failed_runs_and_is_saved(tmp_path):
+    path = str(tmp_path / "breaker.json")
+    breaker = CircuitBreaker(path, failure_threshold=2, cooldown=3600, attempts=1)
+
+    class Device:
+        hostname, vendor, host, port = "r1", "Cisco", "127.0.0.1", 9
+
+    backup, calls = counting_backup("failed", "TimeoutError")
+    breaker.call(Device, backup)
+    assert breaker.state("r1") == "closed"
+    breaker.call(Device, backup)
+    assert breaker.state("r1") == "open"
+    assert breaker.call(Device, backup).status == "skipped"
+    assert len(calls) == 2
+    breaker.save()
+    assert CircuitBreaker(path, failure_threshold=2).state("r1") == "open"
+
+
+def test_async_telnet_login_rejection_raises_permission_error():
+    async def device(reader, writer):
+        # Asks for the username again after any password, like a vty line with wrong credentials
+        writer.write(b"Username: ")
+        await reader.readline()
+        writer.write(b"Password: ")
+        await reader.readline()
+        writer.write(b"\r\n% Login invalid\r\n\r\nUsername: ")
+        await writer.drain()
+        await reader.read()
+
+    async def main():
+        server = await asyncio.start_server(device, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        session = AsyncTelnetSession("127.0.0.1", port, timeout=5)
+        await session.connect()
+        try:
+            with pytest.raises(PermissionError):
+                await session.login("rviews", "wrong")
+        finally:
+            await session.close()
+            server.close()
+
+    asyncio.run(main())
@@ -0,0 +1,34 @@
+import os
+
+from backup_layout import parse_filename
+from collect_multiple_commands import collect
+
+
+class FlakyDevice:
+    # The first session works, every later login fails
+    hostname, vendor = "r1", "Juniper"
+
+    def __init__(self):
+        self.sessions = 0
+        self.timings = None
+
+    def run_commands(self, commands):
+        self.sessions += 1
+        self.timings = {"connect": 0.01}
+        if self.sessions > 1:
+            raise ConnectionError("vty lines busy")
+        return {command: f"output of {command}" for command in commands}, 0.5
+
+
+def test_failed_compare_pass_keeps_the_collected_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    command = 'show interfaces terse | match "ge-"'
+    message, elapsed = collect(FlakyDevice(), ["show version", command], compare=True)
+    assert elapsed == 0.5
+    assert "one session per command failed: vty lines busy" in message
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 2
+    assert all("|" not in name and '"' not in name for name in names)
+    commands = {"show version": "show version", "show interfaces terse match ge-": command}
+    assert sorted(parse_filename(name, commands)[1] for name in names) == sorted(["show version", command])
@@ -0,0 +1,58 @@
+import asyncio
+import io
+
+from network_devices import AsyncTelnetSession, StreamingWriter, prompt_line_pattern
+
+# Config lines that contain the prompt text, one of them at the end of a chunk
+CONFIG = "hostname R1#\nbanner motd ^ R1# authorised use only ^\n interface Gi0/1\n description uplink to R1>\nend"
+
+
+def feed(writer, chunks):
+    for chunk in chunks:
+        if writer.feed(chunk):
+            return True
+    return False
+
+
+def test_prompt_text_inside_the_config_does_not_end_the_output():
+    file = io.StringIO()
+    writer = StreamingWriter(file, "show running-config", prompt_line_pattern("R1", r"[^\n]*[>#%$]"))
+    chunks = ["show running-config\r\n", "hostname R1#\r\n", CONFIG.split("\n", 1)[1].replace("\n", "\r\n"),
+              "\r\nR1#"]
+    assert feed(writer, chunks)
+    assert file.getvalue() == CONFIG
+
+
+def test_prompt_is_only_matched_at_a_line_start_after_the_tail_was_cut():
+    # With a small tail, 'pending' starts in the middle of a line whose rest looks like the prompt
+    file = io.StringIO()
+    writer = StreamingWriter(file, "show running-config", prompt_line_pattern("R1#"), keep=4)
+    assert not feed(writer, ["show running-config\n", "remark xxR1#"])
+    assert feed(writer, ["\nR1#"])
+    assert file.getvalue() == "remark xxR1#"
+
+
+def test_async_send_command_returns_the_whole_config():
+    async def device(reader, writer):
+        writer.write(b"R1#")
+        await reader.readline()
+        writer.write(b"show running-config\r\n" + CONFIG.replace("\n", "\r\n").encode()[:13])
+        await writer.drain()
+        await asyncio.sleep(0.05)  # "hostname R1#" arrives first, on its own
+        writer.write(CONFIG.replace("\n", "\r\n").encode()[13:] + b"\r\nR1#")
+        await writer.drain()
+        await reader.read()
+
+    async def main():
+        server = await asyncio.start_server(device, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        session = AsyncTelnetSession("127.0.0.1", port, timeout=5)
+        await session.connect()
+        try:
+            await session.login("rviews", "rviews")
+            return await session.send_command("show running-config")
+        finally:
+            await session.close()
+            server.close()
+
+    assert asyncio.run(main()) == CONFIG
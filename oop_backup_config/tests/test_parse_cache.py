@@ -0,0 +1,89 @@
+from parse_cache import ParseCache
+
+
+def counting_parser(version="1"):
+    calls = []
+
+    def parse(output):
+        calls.append(output)
+        return {"lines": output.splitlines()}
+    parse.parser_version = version
+    return parse, calls
+
+
+def stored(cache):
+    return cache.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def test_second_lookup_is_a_hit_and_returns_a_copy(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache.db"))
+    parse, calls = counting_parser()
+    cached = cache.cached(parse)
+    first = cached("a\nb")
+    first["lines"].append("changed")
+    assert cached("a\nb") == {"lines": ["a", "b"]}
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_new_results_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ParseCache(path, batch_size=3)
+    parse, calls = counting_parser()
+    for output in ("a", "b"):
+        cache.get_or_parse(parse, output)
+    assert stored(cache) == 0
+    cache.get_or_parse(parse, "c")
+    assert stored(cache) == 3
+    cache.close()
+
+    reopened = ParseCache(path)
+    reopened.get_or_parse(parse, "a")
+    assert len(calls) == 3 and reopened.hits == 1
+    reopened.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache.db"), max_entries=10, batch_size=1)
+    parse, calls = counting_parser()
+    for index in range(10):
+        cache.get_or_parse(parse, f"output {index}")
+    cache.get_or_parse(parse, "output 0")  # A hit: output 0 is now the most recently used
+    cache.get_or_parse(parse, "output 10")  # 11 entries: down to 90% of the bound
+    assert stored(cache) == 9 and cache.evicted == 2
+
+    del calls[:]
+    for index in (0, 3, 10, 1):  # Hits first: a miss writes a new entry and may evict again
+        cache.get_or_parse(parse, f"output {index}")
+    assert calls == ["output 1"]
+    cache.close()
+
+
+def test_byte_bound_evicts_too(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache.db"), max_bytes=1000, batch_size=1)
+    parse, _ = counting_parser()
+    for index in range(10):
+        cache.get_or_parse(parse, f"{index}" * 200)
+    size = cache.db.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+    assert size <= 900 and cache.evicted > 0
+    cache.close()
+
+
+def test_new_parser_version_invalidates_its_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    old, _ = counting_parser("1")
+    other, _ = counting_parser("1")
+    cache = ParseCache(path)
+    for output in ("a", "b"):
+        cache.get_or_parse(old, output, _name="parsers.parse")
+    cache.get_or_parse(other, "a", _name="parsers.other")
+    cache.close()
+
+    new, calls = counting_parser("2")
+    cache = ParseCache(path)
+    cache.get_or_parse(new, "a", _name="parsers.parse")
+    assert calls == ["a"]
+    assert cache.invalidated == 2
+    assert cache.stats() == [("parsers.other", 1, len('{"lines":["a"]}')), ("parsers.parse", 1, len('{"lines":["a"]}'))]
+    cache.close()
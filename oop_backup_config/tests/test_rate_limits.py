@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+
+from circuit_breaker import retry, retry_async
+from rate_limits import RateLimiter, TokenBucket, parse_rule
+from result_records import BackupResult
+
+
+class Device:
+    def __init__(self, hostname, device_type="cisco_ios_telnet", **tags):
+        self.hostname = hostname
+        self.device_type = device_type
+        self.tags = tags
+
+
+def test_bucket_starts_full_and_refills_at_its_rate():
+    bucket = TokenBucket("global", rate=2, burst=3)
+    now = bucket.updated
+    assert bucket.wait_time(now) == 0
+    bucket.tokens = 0
+    assert bucket.wait_time(now) == pytest.approx(0.5)
+    assert bucket.wait_time(now + 0.25) == pytest.approx(0.25)
+    bucket.refill(now + 100)
+    assert bucket.tokens == 3  # Never above the burst
+
+
+def test_parse_rule():
+    assert parse_rule("global:20") == (None, None, 20.0, None)
+    assert parse_rule("device_type=cisco_xr:2") == ("device_type", "cisco_xr", 2.0, None)
+    assert parse_rule("site=*:5:10") == ("site", "*", 5.0, 10.0)
+    for text in ("global", "site:1:2:3", "=lon:1", "site=:1"):
+        with pytest.raises(ValueError):
+            parse_rule(text)
+
+
+def test_explicit_value_wins_over_the_wildcard_rule():
+    limiter = RateLimiter(["global:100", "site=*:5", "site=lon:1"])
+    assert limiter.columns == ["site"]
+    names = lambda device: sorted(bucket.name for bucket in limiter.buckets_for(device))
+    assert names(Device("a", site="lon")) == ["global", "site=lon"]
+    assert names(Device("b", site="par")) == ["global", "site=par"]
+    assert names(Device("c")) == ["global"]
+    assert limiter.buckets["site", "lon"].rate == 1
+
+
+def test_take_is_all_or_nothing():
+    limiter = RateLimiter(["global:10:10", "site=lon:1:1"])
+    buckets = limiter.buckets_for(Device("a", site="lon"))
+    now = time.monotonic()
+    assert limiter.try_take(buckets, now) == 0
+    assert limiter.try_take(buckets, now) > 0  # site=lon is empty
+    assert limiter.buckets["global", None].taken == 1  # The global token was not spent on the refused login
+
+
+def test_parked_devices_do_not_block_the_others():
+    limiter = RateLimiter(["site=lon:0.001:1"])
+    devices = [Device("lon1", site="lon"), Device("lon2", site="lon"), Device("par1", site="par")]
+    schedule = limiter.schedule(devices)
+    assert schedule.take()[0].hostname == "lon1"
+    assert schedule.take()[0].hostname == "par1"  # lon2 waits for a token, par1 goes first
+    device, wait = schedule.take()
+    assert device is None and wait > 0
+    assert [device.hostname for device in schedule] == ["lon2"]  # Left over, e.g. to report as not reached
+    assert limiter.deferred == 1
+
+
+def test_acquire_waits_for_a_token():
+    limiter = RateLimiter(["global:20:1"])
+    device = Device("a")
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire(device)
+    assert time.monotonic() - start >= 0.09  # 1 from the burst, then 2 at 20/s
+    assert limiter.buckets["global", None].taken == 3
+
+
+def test_every_retry_takes_a_token():
+    tokens = []
+    attempts = iter(["failed", "failed", "ok"])
+
+    def backup():
+        return BackupResult("a", "Cisco", next(attempts), "")
+
+    result = retry(backup, attempts=3, base_delay=0, before_retry=lambda: tokens.append(1))
+    assert result.ok
+    assert len(tokens) == 2  # The first login's token was taken by the scheduler
+
+
+def test_every_async_retry_takes_a_token():
+    limiter = RateLimiter(["global:1000"])
+    device = Device("a")
+
+    async def backup():
+        return BackupResult("a", "Cisco", "failed", "")
+
+    result = asyncio.run(retry_async(backup, attempts=3, base_delay=0, before_retry=lambda: limiter.acquire_async(device)))
+    assert result.status == "failed"
+    assert limiter.buckets["global", None].taken == 2
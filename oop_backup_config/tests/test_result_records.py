@@ -0,0 +1,43 @@
+import json
+
+from result_records import BackupResult, ResultSummary, ResultWriter, read_results
+
+
+def test_ok_covers_unchanged_but_not_failures():
+    assert BackupResult("r1", "Cisco", "ok", "saved").ok
+    assert BackupResult("r1", "Cisco", "unchanged", "unchanged").ok
+    for status in ("skipped", "not_reached", "failed"):
+        assert not BackupResult("r1", "Cisco", status, "no").ok
+
+
+def test_str_is_the_console_line():
+    result = BackupResult("r1", "Cisco", "ok", "Cisco: r1 backup saved to r1.txt", path="r1.txt")
+    assert str(result) == "Cisco: r1 backup saved to r1.txt"
+
+
+def test_writer_streams_compact_records(tmp_path):
+    path = tmp_path / "results.jsonl"
+    writer = ResultWriter(str(path), run_id="run-1")
+    writer.write(BackupResult("r1", "Cisco", "ok", "saved", bytes=10, timings={"connect": 0.12345}, path="r1.txt"))
+    writer.write(BackupResult("r2", "Juniper", "failed", "Failed", error_class="TimeoutError"))
+    writer.close()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["host"] for record in records] == ["r1", "r2"]
+    assert records[0]["timings"] == {"connect": 0.123}
+    assert records[0]["run"] == "run-1"
+    assert "error_class" not in records[0] and records[1]["error_class"] == "TimeoutError"
+
+
+def test_summary_and_read_results_skip_a_truncated_line(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text('{"host":"r1","status":"ok","bytes":1048576,"run":"a"}\n'
+                    '{"host":"r2","status":"failed","error_class":"OSError","run":"a"}\n'
+                    '{"host":"r3","status":"ok","run":"b"}\n'
+                    '{"host":"r4","sta')
+    summary = ResultSummary()
+    for record in read_results(str(path), run_id="a"):
+        summary.add(record)
+    assert summary.statuses == {"ok": 1, "failed": 1}
+    assert summary.errors == {"OSError": 1}
+    assert "1.0 MB written" in summary.summary()
@@ -0,0 +1,45 @@
+import argparse
+from datetime import datetime, timedelta
+
+import pytest
+
+from retention import RetentionPolicy, parse_policy
+
+NOW = datetime(2025, 6, 27, 12, 0, 0)
+
+
+def outputs(*ages):
+    # Newest first, like the index query of RetentionWorker
+    return sorted(((NOW - age,) for age in ages), reverse=True)
+
+
+def test_recent_outputs_are_all_kept_and_not_compressed():
+    keep, compress, prune = RetentionPolicy().select(outputs(*(timedelta(hours=hours) for hours in range(0, 48, 6))), NOW)
+    assert len(keep) == 8
+    assert compress == prune == []
+
+
+def test_one_output_per_day_then_per_month():
+    ages = [timedelta(hours=1)]
+    ages += [timedelta(days=5, hours=hours) for hours in (1, 2, 3)]      # Three outputs of one day
+    ages += [timedelta(days=100, hours=hours) for hours in (1, 30)]      # Same month, two days
+    ages += [timedelta(days=500)]                                        # Older than 12 months
+    keep, compress, prune = RetentionPolicy().select(outputs(*ages), NOW)
+
+    assert [NOW - output[0] for output in keep] == [ages[0], ages[1], ages[4]]  # The newest of each day / month
+    assert compress == keep[1:]
+    assert len(prune) == 4
+
+
+def test_newest_output_is_kept_however_old():
+    keep, compress, prune = RetentionPolicy().select(outputs(timedelta(days=800), timedelta(days=900)), NOW)
+    assert [NOW - output[0] for output in keep] == [timedelta(days=800)]
+    assert compress == [] and len(prune) == 1
+
+
+def test_parse_policy():
+    policy = parse_policy("24h, 7d, 3m")
+    assert (policy.keep_all, policy.daily, policy.monthly) == (timedelta(hours=24), timedelta(days=7), timedelta(days=93))
+    for text in ("24h,7d", "7d,24h,3m", "xh,7d,3m"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_policy(text)
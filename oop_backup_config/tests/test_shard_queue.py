@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from result_records import BackupResult
+from shard_queue import RING_SIZE, HashRing, WorkQueue, hash_point
+
+
+def rows(count):
+    return [{"hostname": f"r{i}", "device_type": "cisco_ios_telnet", "username": "u", "password": "p"}
+            for i in range(count)]
+
+
+def test_ranges_cover_the_ring_once_and_match_owner():
+    ring = HashRing(["w1", "w2", "w3"], vnodes=16)
+    ranges = sorted((low, high, node) for node in ("w1", "w2", "w3") for low, high in ring.ranges(node))
+    assert ranges[0][0] == 0 and ranges[-1][1] == RING_SIZE - 1
+    assert all(previous[1] + 1 == following[0] for previous, following in zip(ranges, ranges[1:]))
+    for low, high, node in ranges:
+        assert ring.owner(low) == node and ring.owner(high) == node
+
+
+def test_new_worker_only_takes_devices_from_the_others():
+    points = [hash_point(f"r{i}") for i in range(2000)]
+    before, after = HashRing(["w1", "w2", "w3"]), HashRing(["w1", "w2", "w3", "w4"])
+    moved = [point for point in points if before.owner(point) != after.owner(point)]
+    assert all(after.owner(point) == "w4" for point in moved)
+    assert 0.15 < len(moved) / len(points) < 0.35  # About 1/4
+
+
+def test_dead_worker_devices_are_reclaimed(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    queue = WorkQueue(path, lease=1)
+    assert queue.enqueue(rows(40)) == 40
+    first = queue.worker("w1", batch_size=100)
+    assert len(first.claim()) == 40  # Alone on the ring: the whole inventory is its shard
+
+    # w1 is killed: no more heartbeats, no close()
+    first.stopped.set()
+    first.heartbeat.join()
+    first.db.execute("UPDATE workers SET heartbeat = ? WHERE name = 'w1'", (time.time() - 5,))
+
+    second = queue.worker("w2", batch_size=100)
+    devices = second.claim()
+    assert len(devices) == 40
+    for device in devices:
+        second.record(device.hostname, BackupResult(device.hostname, "Cisco", "ok", "saved"))
+    assert second.unfinished() == 0
+    second.close()
+
+    # A queue opened with the default lease still judges w1 by the 1 second lease it registered with
+    summary = WorkQueue(path).summary()
+    assert "Devices reclaimed from dead workers: 40" in summary
+    assert [line.split()[-1] for line in summary.splitlines() if line.strip().startswith("w1")] == ["dead"]
+    assert [line.split()[-1] for line in summary.splitlines() if line.strip().startswith("w2")] == ["finished"]
+
+
+def test_stream_claims_without_blocking_the_event_loop(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    queue = WorkQueue(path)
+    queue.enqueue(rows(3))
+    worker = queue.worker("w1")
+    other = queue.connect()
+    other.execute("BEGIN IMMEDIATE")  # Another worker holds the queue lock for a while
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def release():
+            await asyncio.sleep(0.5)
+            other.execute("COMMIT")
+
+        stream = worker.stream()
+        ticking = asyncio.create_task(ticker())
+        releasing = asyncio.create_task(release())
+        devices = [await stream.next_async() for _ in range(4)]
+        ticking.cancel()
+        await releasing
+        return devices, ticks
+
+    devices, ticks = asyncio.run(main())
+    assert sorted(device.hostname for device in devices[:3]) == ["r0", "r1", "r2"]
+    assert devices[3] is None
+    assert ticks >= 20  # The loop kept running while the claim waited for the lock
+    worker.close()
+    other.close()
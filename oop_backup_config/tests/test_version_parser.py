@@ -0,0 +1,67 @@
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from fake_telnet_server import VERSION
+from version_parser import COLUMNS, parse_file, parse_version, uptime_seconds, write_inventory
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "oop_version_collector")
+
+
+@pytest.mark.parametrize("os_name, vendor, version, model", [
+    ("ios", "Cisco", "15.2(4)S7", "7206VXR"),
+    ("junos", "Juniper", "20.4R3-S4.8", "mx960"),
+    ("xr", "Cisco", "7.3.2", "IOS-XRv 9000"),
+    ("nxos", "Cisco", "9.3(8)", "Nexus9000 C9300v"),
+])
+def test_parse_version_of_each_platform(os_name, vendor, version, model):
+    row = parse_version(VERSION[os_name].format(hostname="r1", serial="FOC123"))
+    assert list(row) == COLUMNS
+    assert (row["os"], row["vendor"], row["version"], row["model"]) == (os_name, vendor, version, model)
+
+
+def test_parse_version_of_saved_ios_xe_output():
+    path = glob.glob(os.path.join(SAMPLES, "route-views.routeviews.org_show_version_*.txt"))[0]
+    row = parse_file(path)
+    assert row["hostname"] == "route-views.routeviews.org"  # From the file name, not the prompt
+    assert row["os"] == "ios-xe"
+    assert row["version"] == "03.16.10.S"
+    assert row["model"] == "ASR1004"
+    assert row["serial"] == "FXS1739Q3LN"
+    assert row["memory_kb"] == 9882718  # Main + I/O memory
+    assert row["collected_at"] is not None
+
+
+def test_parse_version_of_frrouting_output():
+    path = glob.glob(os.path.join(SAMPLES, "route-views2.routeviews.org_show_version_*.txt"))[0]
+    row = parse_file(path)
+    assert (row["os"], row["vendor"], row["version"]) == ("frr", "FRRouting", "10.2")
+
+
+def test_unknown_output_gives_an_empty_row():
+    row = parse_version("% Invalid input detected at '^' marker.", hostname="r1")
+    assert row["hostname"] == "r1"
+    assert row["os"] is None and row["version"] is None
+
+
+def test_uptime_seconds():
+    assert uptime_seconds("1 year, 2 weeks, 3 days, 4 hours, 5 minutes") == 365 * 86400 + 17 * 86400 + 4 * 3600 + 300
+    assert uptime_seconds("12 day(s), 3 hour(s), 20 minute(s), 45 second(s)") == 12 * 86400 + 3 * 3600 + 20 * 60 + 45
+    assert uptime_seconds("") is None
+    assert uptime_seconds(None) is None
+
+
+def test_write_inventory_csv(tmp_path):
+    rows = [parse_version(VERSION[name].format(hostname=name, serial="FOC1")) for name in ("ios", "nxos")]
+    path = str(tmp_path / "inventory.csv")
+    write_inventory(rows, path)
+    frame = pd.read_csv(path)
+    assert list(frame.columns) == COLUMNS
+    assert list(frame["os"]) == ["ios", "nxos"]
+
+
+def test_write_inventory_rejects_unknown_suffix(tmp_path):
+    with pytest.raises(ValueError):
+        write_inventory([], str(tmp_path / "inventory.xlsx"))
@@ -0,0 +1,6 @@
+# Vendor Device Classes, One Module per Netmiko device_type
+#
+# - These modules are imported by network_devices.get_device_class() only when an inventory row
+#   with a matching device_type is found, so a Cisco-only run never imports the Juniper module.
+# - To add a vendor: write a module with a NetworkDevice subclass here, then add one line to
+#   DEVICE_DRIVERS in network_devices.py (or call register_driver() from your own script).
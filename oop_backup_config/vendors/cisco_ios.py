@@ -0,0 +1,22 @@
+# Cisco IOS over Telnet (device_type "cisco_ios_telnet")
+from network_devices import NetworkDevice
+
+
+class CiscoDevice(NetworkDevice):
+    __slots__ = ()
+    vendor = "Cisco"
+    device_type = "cisco_ios_telnet"
+    command = "show version"  # Fetch device version info
+    probe_command = "show running-config | include Last configuration change"
+    default_commands = ["show version", "show ip bgp summary"]
+    paging_command = "terminal length 0"
+
+    def __init__(self, hostname, username="rviews", password="", host=None, port=None):
+        super().__init__(hostname, username, password, host, port)
+
+
+class CiscoConfigDevice(CiscoDevice):
+    # Backs up the configuration (inventory device_type "cisco_ios_telnet_config"); the change probe can skip it
+    __slots__ = ()
+    command = "show running-config"
+    config_command = True
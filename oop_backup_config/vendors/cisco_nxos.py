@@ -0,0 +1,24 @@
+# Cisco NX-OS over SSH (device_type "cisco_nxos", e.g. sbx-nxos-mgmt.cisco.com)
+from network_devices import NetworkDevice
+
+
+class CiscoNxosDevice(NetworkDevice):
+    __slots__ = ()
+    vendor = "Cisco"
+    device_type = "cisco_nxos"
+    transport = "ssh"
+    default_port = 22
+    command = "show version"
+    probe_command = "show accounting log last-index"
+    default_commands = ["show version", "show ip bgp summary", "show ip interface brief"]
+    paging_command = "terminal length 0"
+
+    def __init__(self, hostname, username="admin", password="", host=None, port=None):
+        super().__init__(hostname, username, password, host, port)
+
+
+class CiscoNxosConfigDevice(CiscoNxosDevice):
+    # Backs up the configuration (inventory device_type "cisco_nxos_config"); the change probe can skip it
+    __slots__ = ()
+    command = "show running-config"
+    config_command = True
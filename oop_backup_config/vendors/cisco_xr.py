@@ -0,0 +1,24 @@
+# Cisco IOS-XR over SSH (device_type "cisco_xr", e.g. sandbox-iosxr-1.cisco.com)
+from network_devices import NetworkDevice
+
+
+class CiscoXrDevice(NetworkDevice):
+    __slots__ = ()
+    vendor = "Cisco"
+    device_type = "cisco_xr"
+    transport = "ssh"
+    default_port = 22
+    command = "show version"
+    probe_command = "show configuration commit list 1"
+    default_commands = ["show version", "show bgp summary", "show ip interface brief"]
+    paging_command = "terminal length 0"
+
+    def __init__(self, hostname, username="admin", password="", host=None, port=None):
+        super().__init__(hostname, username, password, host, port)
+
+
+class CiscoXrConfigDevice(CiscoXrDevice):
+    # Backs up the configuration (inventory device_type "cisco_xr_config"); the change probe can skip it
+    __slots__ = ()
+    command = "show running-config"
+    config_command = True
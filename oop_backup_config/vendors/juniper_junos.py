@@ -0,0 +1,22 @@
+# Juniper Junos over Telnet (device_type "juniper_junos_telnet")
+from network_devices import NetworkDevice
+
+
+class JuniperDevice(NetworkDevice):
+    __slots__ = ()
+    vendor = "Juniper"
+    device_type = "juniper_junos_telnet"
+    command = "show bgp summary"  # Fetch BGP summary
+    probe_command = 'show system commit | match "^0 "'
+    default_commands = ["show version", "show bgp summary"]
+    paging_command = "set cli screen-length 0"
+
+    def __init__(self, hostname, username="rviews", password="", host=None, port=None):
+        super().__init__(hostname, username, password, host, port)
+
+
+class JuniperConfigDevice(JuniperDevice):
+    # Backs up the configuration (inventory device_type "juniper_junos_telnet_config"); the change probe can skip it
+    __slots__ = ()
+    command = "show configuration"
+    config_command = True
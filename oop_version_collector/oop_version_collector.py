@@ -4,10 +4,20 @@
 # - Automatically collect 'show version' output from network devices using Python and Netmiko.
 # - This script gathers system information (not full configuration) and saves it to uniquely named files.
 # - Each file includes a readable timestamp for easy identification and tracking.
+# - Files go into backups/, sharded by host and date, with an index of the latest output per host
+#   (oop_backup_config/backup_layout.py), so finding the newest file never needs a directory listing.
 
 # Step 1: Import Required Modules
-from netmiko import ConnectHandler
-from datetime import datetime  # For timestamping filenames
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "oop_backup_config"))
+from backup_layout import BackupLayout  # Output files sharded by host and date, with a latest-output index
+from phase_timing import PhaseHistograms, PhaseTimer, open_netmiko  # Time spent in connect / auth / prompt / command / write
+from version_parser import DEFAULT_INVENTORY, parse_file, write_inventory  # 'show version' text → vendor, version, image, uptime, serial, memory
+
+metrics = PhaseHistograms()  # Phase timings of every device in this run
+layout = BackupLayout()  # Outputs go to backups/<xx>/<hostname>/<YYYY>/<MM>/<DD>/, indexed in backups/index.db
+inventory = []  # One parsed row per device
 
 # Step 2: Define the NetworkDevice Class
 class NetworkDevice:
@@ -18,23 +28,25 @@ class NetworkDevice:
 
     def collect_version_info(self):
         # Step 3: Connect to the device using Netmiko
-        connection = ConnectHandler(
+        timer = PhaseTimer()
+        connection = open_netmiko(
+            timer,
             device_type=self.device_type,
             host=self.hostname,
             username=self.username
         )
 
         # Step 4: Run 'show version' command to collect system info
-        output = connection.send_command("show version")
+        with timer.phase("command"):
+            output = connection.send_command("show version")
         connection.disconnect()
 
-        # Step 5: Generate timestamped filename
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"{self.hostname}_show_version_{timestamp}.txt"
-
-        # Step 6: Save output to the file
-        with open(filename, "w") as file:
-            file.write(output)
+        # Step 5: Save output to a file in the backup layout (backups/<xx>/<hostname>/<YYYY>/<MM>/<DD>/)
+        # Step 6: The layout index now points to it as the latest 'show version' of this host
+        with timer.phase("write"):
+            filename = layout.save_output(self.hostname, "show version", output)
+        metrics.observe("collect_version_info", self.device_type, timer.phases)
+        inventory.append(parse_file(filename))  # Host and collection time come from the file name
         print(f"'show version' info saved for {self.hostname} in {filename}")
 
 # Step 7: Create Device Objects
@@ -53,3 +65,10 @@ device2 = NetworkDevice(
 device1.collect_version_info()
 device2.collect_version_info()
 
+# Step 9: Print Where the Time Went and Save the Phase Timings
+print(metrics.summary())
+metrics.export("phase_timings")  # phase_timings.json and phase_timings.prom
+
+# Step 10: Write the Parsed Versions as a Fleet Inventory (Parquet with pyarrow installed, CSV otherwise)
+write_inventory(inventory, DEFAULT_INVENTORY)
+print(f"📋 Fleet inventory of {len(inventory)} devices written to {DEFAULT_INVENTORY}")
@@ -24,6 +24,13 @@
 # Step 1: Import Required Modules
 from netmiko import ConnectHandler
 from datetime import datetime
+import time  # For measuring wall time per device
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "oop_backup_config"))
+from phase_timing import PhaseHistograms, PhaseTimer, open_netmiko  # Time spent in connect / auth / prompt / command / write
+
+metrics = PhaseHistograms()  # Phase timings of every device in this run
 
 # Step 2: Define the Parent Class
 class NetworkDevice:
@@ -35,23 +42,45 @@ class NetworkDevice:
 
     # Define a generic method to run a show command
     def run_show_command(self):
-        connection = ConnectHandler(
+        timer = PhaseTimer()
+        connection = open_netmiko(
+            timer,
             device_type=self.device_type,
             host=self.hostname,
             username=self.username,
             password=self.password
         )
-        output = connection.send_command("show version")  # Default command
+        with timer.phase("command"):
+            output = connection.send_command("show version")  # Default command
         connection.disconnect()
 
         # Save the output with timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         filename = f"{self.hostname}_show_version_{timestamp}.txt"
 
-        with open(filename, "w") as file:
+        with timer.phase("write"), open(filename, "w") as file:
             file.write(output)
+        metrics.observe("run_show_command", self.device_type, timer.phases)
         print(f"'show version' info saved for {self.hostname} in {filename}")
 
+    # Log in once and run a list of commands in the same session
+    # Returns a dictionary {command: output}
+    def run_commands(self, commands):
+        start_time = time.time()
+        connection = ConnectHandler(
+            device_type=self.device_type,
+            host=self.hostname,
+            username=self.username,
+            password=self.password
+        )
+        results = {}
+        for command in commands:
+            results[command] = connection.send_command(command)
+        connection.disconnect()
+
+        print(f"{self.hostname}: {len(commands)} commands in one session took {time.time() - start_time:.2f} seconds")
+        return results
+
 # Step 3: Create Child Class for Cisco Devices
 class CiscoTelnetDevice(NetworkDevice):
     def __init__(self, hostname, username="rviews", password=""):
@@ -60,21 +89,25 @@ class CiscoTelnetDevice(NetworkDevice):
 
     # Override the method to send a Cisco-specific command
     def run_show_command(self):
-        connection = ConnectHandler(
+        timer = PhaseTimer()
+        connection = open_netmiko(
+            timer,
             device_type=self.device_type,
             host=self.hostname,
             username=self.username,
             password=self.password
         )
-        output = connection.send_command("show ip bgp summary")
+        with timer.phase("command"):
+            output = connection.send_command("show ip bgp summary")
         connection.disconnect()
 
         # Save the output with timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         filename = f"{self.hostname}_bgp_summary_{timestamp}.txt"
 
-        with open(filename, "w") as file:
+        with timer.phase("write"), open(filename, "w") as file:
             file.write(output)
+        metrics.observe("run_show_command", self.device_type, timer.phases)
         print(f"'show ip bgp summary' saved for {self.hostname} in {filename}")
 
 # Step 4: Create Child Class for Juniper Devices
@@ -85,21 +118,25 @@ class JuniperDevice(NetworkDevice):
 
     # Override the method to send a Juniper-specific command
     def run_show_command(self):
-        connection = ConnectHandler(
+        timer = PhaseTimer()
+        connection = open_netmiko(
+            timer,
             device_type=self.device_type,
             host=self.hostname,
             username=self.username,
             password=self.password
         )
-        output = connection.send_command("show bgp summary")
+        with timer.phase("command"):
+            output = connection.send_command("show bgp summary")
         connection.disconnect()
 
         # Save the output with timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         filename = f"{self.hostname}_juniper_bgp_summary_{timestamp}.txt"
 
-        with open(filename, "w") as file:
+        with timer.phase("write"), open(filename, "w") as file:
             file.write(output)
+        metrics.observe("run_show_command", self.device_type, timer.phases)
         print(f"'show bgp summary' saved for {self.hostname} in {filename}")
 
 # Step 5: Instantiate Device Objects
@@ -122,3 +159,20 @@ devices = [cisco_device, juniper_device]
 
 for device in devices:
     device.run_show_command()
+
+# Step 7: Run Several Commands in One Session
+# run_commands() is inherited from the parent class, so it works the same for every child class.
+device_commands = {
+    cisco_device: ["show version", "show ip bgp summary"],
+    juniper_device: ["show version", "show bgp summary"],
+}
+
+for device, commands in device_commands.items():
+    results = device.run_commands(commands)
+    for command, output in results.items():
+        print(f"--- {device.hostname}: {command} ---")
+        print(output)
+
+# Step 8: Print Where the Time Went and Save the Phase Timings
+print(metrics.summary())
+metrics.export("phase_timings")  # phase_timings.json and phase_timings.prom